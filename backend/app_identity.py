@@ -0,0 +1,67 @@
+import hashlib
+
+# Values that make two uninstall keys the same installation, wherever they are registered
+IDENTITY_FIELDS = ('DisplayName', 'DisplayVersion', 'InstallLocation', 'UninstallString')
+
+def identity_of(app):
+    """
+    Content hash of an uninstall entry: key name, DisplayName, version and paths.
+    The registry location (root and view) is left out, so the same product
+    registered under the 64-bit view, WOW6432Node and HKCU hashes the same.
+    Key name and paths are compared case-insensitively, like Windows does.
+    """
+    parts = [app.key_name.lower()]
+    for field in IDENTITY_FIELDS:
+        value = getattr(app, field)
+        value = str(value).strip() if value is not None else ""
+        parts.append(value if field == 'DisplayName' else value.lower())
+    return hashlib.blake2b("\0".join(parts).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+def group_locations(apps, listed=()):
+    """
+    Folds records with the same identity into one logical app.
+    Yields the first record of each identity, as soon as it is seen; later
+    matches are attached to its duplicates (see AppRecord.locations) instead
+    of being yielded, so they are neither listed nor health-checked again.
+    The group's Status is the one on the yielded record; attached duplicates have none.
+    listed: Records yielded earlier (e.g. the current list) that matches may join as well.
+    """
+    # Matches always share the key name, so only records whose names collide are hashed;
+    # for everything else this is a single dict lookup. Buckets are keyed by hash() of the
+    # lowercased name, which costs less memory than keeping the strings; identity_of settles collisions.
+    # hash(key name) -> record or list of records
+    by_name = {}
+    for app in listed:
+        _add_candidate(by_name, hash(app.key_name.lower()), app)
+
+    for app in apps:
+        name = hash(app.key_name.lower())
+        candidates = by_name.get(name)
+        primary = None
+        if candidates is not None:
+            identity = identity_of(app)
+            for candidate in candidates if isinstance(candidates, list) else (candidates,):
+                if identity_of(candidate) == identity:
+                    primary = candidate
+                    break
+
+        # Records reused from an earlier scan may still carry that scan's grouping
+        app.duplicates = None
+        if primary is None:
+            _add_candidate(by_name, name, app)
+            yield app
+            continue
+        app['Status'] = None
+        app['Reason'] = None
+        if primary.duplicates is None:
+            primary.duplicates = []
+        primary.duplicates.append(app)
+
+def _add_candidate(by_name, name, app):
+    candidates = by_name.get(name)
+    if candidates is None:
+        by_name[name] = app
+    elif isinstance(candidates, list):
+        candidates.append(app)
+    else:
+        by_name[name] = [candidates, app]
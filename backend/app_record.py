@@ -0,0 +1,164 @@
+import sys
+from enum import Enum
+
+class AppStatus(str, Enum):
+    """
+    Health of an uninstall entry. Members compare equal to their plain string,
+    so existing checks like status == "Ghost" keep working.
+    """
+    VALID = "Valid"
+    GHOST = "Ghost"
+    UNKNOWN = "Unknown"
+    UNREACHABLE = "Unreachable"  # Path on a drive/share that did not respond in time
+
+# Values read from each uninstall key
+REGISTRY_FIELDS = (
+    'DisplayName', 'DisplayVersion', 'Publisher',
+    'InstallLocation', 'UninstallString', 'QuietUninstallString',
+    'SystemComponent', 'WindowsInstaller',
+)
+
+# Optional values picked up during the same enumeration pass (no extra registry calls)
+EXTRA_FIELDS = ('EstimatedSize', 'InstallDate', 'ProductCode')
+
+# Names used by to_dict for the record's own fields
+_RESERVED = ('parent_path', 'root_key', 'key_name', 'wow64_flag', 'Status', 'Reason', 'duplicates')
+
+class AppRecord:
+    """
+    One uninstall entry. Slotted replacement for the per-app dict, with the same
+    item access (app['DisplayName'], app.get('Status'), app['Status'] = ...).
+    The parent path (e.g. SOFTWARE\\...\\Uninstall) and root name are interned, so
+    all records from the same hive/view share one copy; registry_path is derived.
+    The same product registered in several places (see app_identity.group_locations)
+    is one record whose duplicates hold the other locations.
+    """
+    __slots__ = REGISTRY_FIELDS + (
+        'parent_path', 'root_key', 'key_name', 'wow64_flag', 'status', 'reason', 'extra', 'duplicates',
+    )
+
+    def __init__(self, values, parent_path, root_key, key_name, wow64_flag):
+        """
+        values: Mapping of registry value names to data (missing names are stored as None).
+                Any other names in it (see EXTRA_FIELDS) are kept in a small side dict.
+        """
+        for field in REGISTRY_FIELDS:
+            setattr(self, field, values.get(field))
+        extra = {name: value for name, value in values.items()
+                 if name not in REGISTRY_FIELDS and name not in _RESERVED and value is not None}
+        self.extra = extra or None
+        self.parent_path = sys.intern(parent_path)
+        self.root_key = sys.intern(root_key)
+        self.key_name = key_name
+        self.wow64_flag = wow64_flag
+        self.status = None
+        self.reason = None
+        self.duplicates = None
+
+    @property
+    def registry_path(self):
+        return f"{self.parent_path}\\{self.key_name}"
+
+    @property
+    def unique_id(self):
+        return f"{self.root_key}\\{self.parent_path}\\{self.key_name}"
+
+    @property
+    def locations(self):
+        """
+        This record and its duplicates: every registry key the logical app is registered under.
+        """
+        return [self] + self.duplicates if self.duplicates else [self]
+
+    def copy(self, status=False):
+        """
+        A new record with the same registry data, but without duplicates, so it gets grouped afresh.
+        status: Keep Status/Reason; otherwise the copy has none and gets health-checked again.
+        """
+        record = AppRecord.__new__(AppRecord)
+        for field in REGISTRY_FIELDS:
+            setattr(record, field, getattr(self, field))
+        # Never modified after construction, so it can be shared
+        record.extra = self.extra
+        record.parent_path = self.parent_path
+        record.root_key = self.root_key
+        record.key_name = self.key_name
+        record.wow64_flag = self.wow64_flag
+        record.status = self.status if status else None
+        record.reason = self.reason if status else None
+        record.duplicates = None
+        return record
+
+    # --- dict compatibility ---
+
+    def __getitem__(self, name):
+        if name == 'Status':
+            return self.status.value if self.status is not None else None
+        if name == 'Reason':
+            return self.reason
+        if name == 'registry_path':
+            return self.registry_path
+        if name in REGISTRY_FIELDS or name in ('root_key', 'key_name', 'wow64_flag'):
+            return getattr(self, name)
+        if self.extra is not None and name in self.extra:
+            return self.extra[name]
+        raise KeyError(name)
+
+    def __setitem__(self, name, value):
+        if name == 'Status':
+            self.status = AppStatus(value) if value is not None else None
+        elif name == 'Reason':
+            self.reason = value
+        elif name in REGISTRY_FIELDS or name in ('root_key', 'key_name', 'wow64_flag'):
+            setattr(self, name, value)
+        else:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        if name == 'Status':
+            return self.status is not None
+        if name == 'Reason':
+            return self.reason is not None
+        if self.extra is not None and name in self.extra:
+            return True
+        return name == 'registry_path' or name in REGISTRY_FIELDS or name in ('root_key', 'key_name', 'wow64_flag')
+
+    def get(self, name, default=None):
+        try:
+            value = self[name]
+        except KeyError:
+            return default
+        # Status/Reason behave like keys that only exist once the health check ran
+        if value is None and name in ('Status', 'Reason'):
+            return default
+        return value
+
+    def __repr__(self):
+        return f"AppRecord({self.unique_id!r}, {self.DisplayName!r}, {self['Status']!r})"
+
+    # --- serialization ---
+
+    def to_dict(self, duplicates=True):
+        data = {field: getattr(self, field) for field in REGISTRY_FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        data['parent_path'] = self.parent_path
+        data['root_key'] = self.root_key
+        data['key_name'] = self.key_name
+        data['wow64_flag'] = self.wow64_flag
+        if self.status is not None:
+            data['Status'] = self.status.value
+            data['Reason'] = self.reason
+        if duplicates and self.duplicates:
+            data['duplicates'] = [app.to_dict(duplicates=False) for app in self.duplicates]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(data, data['parent_path'], data['root_key'], data['key_name'], data['wow64_flag'])
+        if data.get('Status'):
+            record['Status'] = data['Status']
+            record.reason = data.get('Reason')
+        if data.get('duplicates'):
+            record.duplicates = [cls.from_dict(entry) for entry in data['duplicates']]
+        return record
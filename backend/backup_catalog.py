@@ -0,0 +1,216 @@
+import os
+import re
+import json
+import hashlib
+import datetime
+import logging
+import threading
+
+from backend.registry_backend import ROOT_NAMES
+from backend.reg_file import iter_reg_operations, top_level_keys, RegFileError
+
+CATALOG_FILE = "catalog.jsonl"
+
+# Meta record import_existing appends once the backups made before the catalog are indexed
+IMPORT_DONE = "imported"
+
+# _backup_path names files "<label>_<YYYYmmdd>_<HHMMSS>.reg", with "_<n>" added on same-second collisions
+_FILENAME = re.compile(r"^(?P<label>.*)_(?P<stamp>\d{8}_\d{6})(?:_\d+)?$")
+
+def file_digest(filepath):
+    """
+    Returns (size, sha256 hex digest) of a file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+def make_entry(name, app_name, keys, size, sha256, timestamp=None, blob=None, stored_size=None):
+    """
+    Builds a catalog entry.
+    name: Backup file name; for blob backups a unique name that only exists in the catalog.
+    keys: List of (root_str, subpath) tuples the backup contains.
+    blob: Hash of the stored blob when the backup lives in the blob store.
+    """
+    if timestamp is None:
+        timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    root, registry_path = keys[0] if keys else ("", "")
+    entry = {
+        'file': name,
+        'app_name': app_name,
+        'root': root,
+        'registry_path': registry_path,
+        'keys': [f"{root_str}\\{subpath}" for root_str, subpath in keys],
+        'timestamp': timestamp,
+        'size': size,
+        'sha256': sha256,
+    }
+    if blob is not None:
+        entry['blob'] = blob
+        entry['stored_size'] = stored_size
+    return entry
+
+class BackupCatalog:
+    """
+    Append-only JSON-lines index of the backups in a directory, one entry per .reg file.
+    Entries are written when a backup is made, so the history window can list,
+    page and search thousands of backups without touching the files themselves.
+    """
+    def __init__(self, backup_dir, filename=CATALOG_FILE):
+        self.backup_dir = backup_dir
+        self.path = os.path.join(backup_dir, filename)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._entries = None   # Loaded on first use, oldest first
+        self._haystacks = []   # Lowercased searchable text per entry
+        self._by_file = {}     # file name -> latest entry
+        self._imported = False # import_existing has completed (its meta record is in the file)
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    def needs_import(self):
+        """
+        True until import_existing has completed once, i.e. backups made by older
+        versions may not be indexed yet. Backups recorded by add() before that
+        don't count: the catalog file existing says nothing about the older ones.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return not self._imported
+
+    def _ensure_loaded(self):
+        if self._entries is not None:
+            return
+        self._entries = []
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A write cut short by a crash leaves one torn line; the rest is still good
+                    self.logger.warning(f"Skipping corrupt catalog line {line_no} in {self.path}")
+                    continue
+                self._remember(entry)
+
+    def _remember(self, entry):
+        if 'meta' in entry:
+            if entry['meta'] == IMPORT_DONE:
+                self._imported = True
+            return
+        self._entries.append(entry)
+        self._by_file[entry['file']] = entry
+        keys = "\n".join(entry.get('keys') or ())
+        self._haystacks.append(f"{entry['file']}\n{entry['app_name']}\n{keys}".lower())
+
+    def append(self, entries):
+        """
+        Adds entries to the end of the catalog file (creating it if needed).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            with open(self.path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for entry in entries:
+                self._remember(entry)
+
+    def add(self, filepath, app_name, keys):
+        """
+        Records a backup written as a plain .reg file.
+        """
+        size, sha256 = file_digest(filepath)
+        entry = make_entry(os.path.basename(filepath), app_name, keys, size, sha256)
+        self.append([entry])
+        return entry
+
+    def add_blob(self, name, app_name, keys, digest, size, stored_size):
+        """
+        Records a backup kept in the blob store under digest.
+        """
+        entry = make_entry(name, app_name, keys, size, digest, blob=digest, stored_size=stored_size)
+        self.append([entry])
+        return entry
+
+    def find(self, name):
+        """
+        Returns the entry for a backup file name, or None.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return self._by_file.get(name)
+
+    def query(self, text="", offset=0, limit=50):
+        """
+        Returns (entries, total): one page of the entries matching text, newest first.
+        Every whitespace-separated word of text must appear in the file name,
+        app name or one of the key paths.
+        """
+        words = text.lower().split()
+        with self._lock:
+            self._ensure_loaded()
+            entries = self._entries
+            haystacks = self._haystacks
+            indexes = range(len(entries) - 1, -1, -1)
+            if words:
+                indexes = [i for i in indexes if all(word in haystacks[i] for word in words)]
+            total = len(indexes)
+            page = [entries[i] for i in indexes[offset:offset + limit]]
+        return page, total
+
+    def import_existing(self):
+        """
+        Indexes .reg files in the backup directory that the catalog does not know yet
+        (backups made before the catalog existed). Safe to run more than once.
+        Returns the number of files added.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            known = set(self._by_file)
+
+        entries = []
+        for name in os.listdir(self.backup_dir):
+            if not name.endswith(".reg") or name in known:
+                continue
+            filepath = os.path.join(self.backup_dir, name)
+            try:
+                entries.append(self._entry_for_file(filepath))
+            except (OSError, UnicodeError, RegFileError) as e:
+                self.logger.warning(f"Could not index backup {name}: {e}")
+
+        # Oldest first, so the file stays in the same order as if it had been there all along
+        entries.sort(key=lambda entry: entry['timestamp'])
+        # Written in the same append as the entries, so the import counts as done only once they are in
+        done = {'meta': IMPORT_DONE, 'timestamp': datetime.datetime.now().isoformat(timespec="seconds")}
+        self.append(entries + [done])
+        self.logger.info(f"Indexed {len(entries)} existing backups")
+        return len(entries)
+
+    def _entry_for_file(self, filepath):
+        stem = os.path.splitext(os.path.basename(filepath))[0]
+        match = _FILENAME.match(stem)
+        if match:
+            app_name = match.group('label')
+            timestamp = datetime.datetime.strptime(match.group('stamp'), "%Y%m%d_%H%M%S")
+        else:
+            app_name = stem
+            timestamp = datetime.datetime.fromtimestamp(os.path.getmtime(filepath))
+
+        # Top-level keys only; subkeys of a backed up key are part of the same backup
+        keys = top_level_keys(iter_reg_operations(filepath))
+        keys = [(ROOT_NAMES.get(root, hex(root)), path) for root, path in keys]
+        size, sha256 = file_digest(filepath)
+        return make_entry(os.path.basename(filepath), app_name, keys, size, sha256, timestamp.isoformat(timespec="seconds"))
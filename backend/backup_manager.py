@@ -1,14 +1,45 @@
 import subprocess
 import os
+import shutil
 import datetime
 import logging
 
+from backend.registry_backend import WinregBackend, ROOTS_BY_NAME, ROOT_NAMES
+from backend.backup_catalog import BackupCatalog
+from backend.blob_store import BlobStore
+from backend.metrics import METRICS
+from backend.reg_file import (
+    write_reg_file, iter_reg_operations, apply_operations, diff_operations, top_level_keys,
+)
+
+# Storage modes
+STORAGE_REG = "reg"    # One plain .reg file per backup
+STORAGE_BLOB = "blob"  # Compressed, deduplicated blobs; the catalog maps names to them
+
 class BackupManager:
-    def __init__(self, backup_dir="backups"):
+    def __init__(self, backup_dir="backups", backend=None, storage=STORAGE_REG):
+        """
+        backend: RegistryBackend used to write backups in-process.
+                 Defaults to the live registry; reg.exe is the fallback when
+                 no backend is available or the native export fails.
+        storage: STORAGE_REG or STORAGE_BLOB. Both kinds of backup can be restored
+                 whichever mode is active.
+        """
+        if storage not in (STORAGE_REG, STORAGE_BLOB):
+            raise ValueError(f"Unknown backup storage mode: {storage}")
         self.backup_dir = backup_dir
+        self.storage = storage
         self.logger = logging.getLogger(__name__)
+        if backend is None:
+            try:
+                backend = WinregBackend()
+            except OSError:
+                backend = None
+        self.backend = backend
         if not os.path.exists(self.backup_dir):
             os.makedirs(self.backup_dir)
+        self.catalog = BackupCatalog(self.backup_dir)
+        self.blobs = BlobStore(os.path.join(self.backup_dir, "blobs"))
 
     def backup_registry_key(self, root_str, subpath, app_name):
         """
@@ -17,40 +48,215 @@ class BackupManager:
         subpath: "SOFTWARE\Microsoft\..."
         app_name: Name of the app (used for filename)
         """
-        full_path = f"{root_str}\\{subpath}"
-        
+        filepath = self._backup_path(app_name)
+        target = self._export_target(filepath)
+        if not self._write_native([(root_str, subpath)], target):
+            self._export_key(f"{root_str}\\{subpath}", target)
+        self._store_backup(target, filepath, app_name, [(root_str, subpath)])
+        self.logger.info(f"Backup created: {filepath}")
+        return filepath
+
+    def backup_registry_keys(self, keys, label):
+        """
+        Exports several registry keys into one consolidated .reg file.
+        keys: List of (root_str, subpath) tuples
+        label: Used for the filename, e.g. "Batch purge (12 apps)"
+        Importing the file restores every key in it, which is what batch rollback relies on.
+        """
+        filepath = self._backup_path(label)
+        target = self._export_target(filepath)
+        if not self._write_native(keys, target):
+            self._export_keys_with_reg(keys, target)
+        self._store_backup(target, filepath, label, keys)
+        self.logger.info(f"Batch backup of {len(keys)} keys created: {filepath}")
+        return filepath
+
+    def _export_target(self, filepath):
+        # In blob mode the export is only a staging file, hashed and stored by _store_backup
+        return filepath if self.storage == STORAGE_REG else filepath + ".export"
+
+    def _store_backup(self, target, filepath, label, keys):
+        if self.storage == STORAGE_REG:
+            # The backup itself is what matters; a catalog failure only costs the history entry
+            try:
+                self.catalog.add(filepath, label, list(keys))
+            except OSError as e:
+                self.logger.warning(f"Could not add {filepath} to the backup catalog: {e}")
+            return
+
+        try:
+            digest, size, stored_size = self.blobs.put_file(target)
+        finally:
+            os.remove(target)
+        # Here the catalog is the only way back to the blob, so a failure fails the backup
+        self.catalog.add_blob(os.path.basename(filepath), label, list(keys), digest, size, stored_size)
+        if stored_size == 0:
+            self.logger.info(f"Backup {filepath} is identical to stored blob {digest[:12]}")
+
+    def _write_native(self, keys, filepath):
+        """
+        Serializes the keys in-process. Returns False if reg.exe should be used instead.
+        """
+        if self.backend is None:
+            return False
+        try:
+            with METRICS.span("backup.write_native"):
+                write_reg_file(self.backend, [(ROOTS_BY_NAME[root_str], subpath) for root_str, subpath in keys], filepath)
+            return True
+        except Exception as e:
+            self.logger.warning(f"Native export failed, falling back to reg.exe: {e}")
+            return False
+
+    def _export_keys_with_reg(self, keys, filepath):
+        tmp_path = filepath + ".part"
+        try:
+            with open(filepath, "w", encoding="utf-16", newline="") as out:
+                out.write("Windows Registry Editor Version 5.00\r\n")
+                for root_str, subpath in keys:
+                    full_path = f"{root_str}\\{subpath}"
+                    self._export_key(full_path, tmp_path)
+                    with open(tmp_path, "r", encoding="utf-16", newline="") as part:
+                        # Each export starts with its own header line; keep only the body
+                        part.readline()
+                        out.write(part.read())
+        except Exception:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _backup_path(self, app_name):
         # Sanitize app name for filename
         safe_name = "".join(x for x in app_name if x.isalnum() or x in " -_").strip()
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_name}_{timestamp}.reg"
-        filepath = os.path.join(self.backup_dir, filename)
-        
+        base = f"{safe_name}_{timestamp}"
+        filename = f"{base}.reg"
+        # Two backups of the same app within a second must not overwrite each other
+        n = 1
+        while os.path.exists(os.path.join(self.backup_dir, filename)) or self.catalog.find(filename) is not None:
+            n += 1
+            filename = f"{base}_{n}.reg"
+        return os.path.join(self.backup_dir, filename)
+
+    def _blob_for(self, filepath):
+        """
+        Returns the blob hash behind a backup name that is not a file on disk, or None.
+        """
+        entry = self.catalog.find(os.path.basename(filepath))
+        if entry is None:
+            return None
+        return entry.get('blob')
+
+    def _readable_path(self, filepath):
+        """
+        Returns (path of a .reg file to read, temp file to delete afterwards or None).
+        Blob backups are exported to a temporary .reg file next to where they would live.
+        """
+        if os.path.exists(filepath):
+            return filepath, None
+        digest = self._blob_for(filepath)
+        if digest is None:
+            raise FileNotFoundError(f"Backup file not found: {filepath}")
+        tmp_path = filepath + ".restore"
+        self.blobs.export(digest, tmp_path)
+        return tmp_path, tmp_path
+
+    def export_backup(self, filepath, dest):
+        """
+        Writes a backup (plain file or blob) out as a standalone .reg file at dest.
+        """
+        if os.path.exists(filepath):
+            shutil.copyfile(filepath, dest)
+            return dest
+        digest = self._blob_for(filepath)
+        if digest is None:
+            raise FileNotFoundError(f"Backup file not found: {filepath}")
+        return self.blobs.export(digest, dest)
+
+    def _export_key(self, full_path, filepath):
         # reg export "Key" "File" /y
         cmd = ["reg", "export", full_path, filepath, "/y"]
         
         try:
             # shell=True might be needed for some windows commands, but subprocess.run usually prefers list without shell=True
             # reg.exe is in PATH.
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            self.logger.info(f"Backup created: {filepath}")
-            return filepath
+            self._run_reg(cmd)
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Backup failed for {full_path}: {e.stderr}")
             raise Exception(f"Failed to backup registry key: {e.stderr}")
 
+    def _run_reg(self, cmd):
+        METRICS.incr("backup.subprocess")
+        with METRICS.span(f"backup.reg_{cmd[1]}"):
+            return subprocess.run(cmd, capture_output=True, text=True, check=True)
+
     def restore_backup(self, filepath):
         """
         Restores a .reg file.
+        Returns the unique_ids ("HKLM\\path") of the keys it restored.
         """
-        if not os.path.exists(filepath):
+        if not os.path.exists(filepath) and self._blob_for(filepath) is None:
             raise FileNotFoundError(f"Backup file not found: {filepath}")
-            
-        cmd = ["reg", "import", filepath]
+
+        if self.backend is not None:
+            return self.restore_backups([filepath])
+
+        path, tmp_path = self._readable_path(filepath)
+        cmd = ["reg", "import", path]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            self._run_reg(cmd)
             self.logger.info(f"Restored backup: {filepath}")
-            return True
+            return _unique_ids(iter_reg_operations(path))
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Restore failed: {e.stderr}")
             raise Exception(f"Failed to restore registry key: {e.stderr}")
+        finally:
+            if tmp_path is not None:
+                os.remove(tmp_path)
+
+    def restore_backups(self, filepaths, dry_run=False):
+        """
+        Restores many .reg files in-process through the registry backend.
+        Every file is parsed (strictly) before anything is written, so a corrupt
+        backup aborts the whole restore instead of leaving it half applied.
+        dry_run: Only compare against the current registry and return the changes,
+                 a list of (change, description) tuples (see reg_file.diff_operations).
+        Returns the unique_ids of the restored keys, so callers can re-read just those.
+        """
+        if self.backend is None:
+            raise Exception("Bulk restore needs a registry backend (Windows only)")
+
+        operations = []
+        for filepath in filepaths:
+            tmp_path = None
+            try:
+                path, tmp_path = self._readable_path(filepath)
+                operations.extend(iter_reg_operations(path, strict=True))
+            except (OSError, UnicodeError, ValueError) as e:
+                # ValueError covers RegFileError and a corrupt blob
+                raise Exception(f"Failed to read backup {filepath}: {e}")
+            finally:
+                if tmp_path is not None:
+                    os.remove(tmp_path)
+
+        changes = diff_operations(self.backend, operations)
+        if dry_run:
+            return changes
+
+        try:
+            with METRICS.span("backup.restore"):
+                apply_operations(self.backend, operations)
+        except OSError as e:
+            self.logger.error(f"Restore failed: {e}")
+            raise Exception(f"Failed to restore registry key: {e}")
+        self.logger.info(f"Restored {len(filepaths)} backups ({len(changes)} changes)")
+        return _unique_ids(operations)
+
+def _unique_ids(operations):
+    """
+    unique_ids, as RegistryManager builds them, of the keys a backup restores.
+    """
+    return [f"{ROOT_NAMES.get(root, hex(root))}\\{path}" for root, path in top_level_keys(operations)]
@@ -0,0 +1,116 @@
+"""
+Content-addressed storage for registry backups.
+
+Each export's text is hashed (sha256) and stored gzip-compressed once under
+its hash, so backing up the same key again costs no extra disk space.
+The text is stored exactly as exported, so a blob restores byte for byte.
+The backup catalog is the manifest that maps names and timestamps to blobs.
+
+    python -m backend.blob_store export <backup_dir> <backup name or hash> <out.reg>
+"""
+import os
+import sys
+import gzip
+import hashlib
+import logging
+
+from backend.reg_file import detect_encoding
+
+BLOB_SUFFIX = ".reg.gz"
+
+def read_reg_text(filepath):
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    return raw.decode(detect_encoding(raw[:4]))
+
+class BlobStore:
+    """
+    Directory of compressed blobs, sharded by the first two hex digits of the hash.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest + BLOB_SUFFIX)
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def put_file(self, filepath):
+        """
+        Stores the .reg file at filepath.
+        Returns (digest, size, stored_size); size is the UTF-8 size of the text and
+        stored_size is 0 when an identical blob already existed.
+        """
+        return self.put_text(read_reg_text(filepath))
+
+    def put_text(self, text):
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self.path_for(digest)
+        if os.path.exists(blob_path):
+            self.logger.debug(f"Backup blob {digest} already stored")
+            return digest, len(data), 0
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        tmp_path = blob_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as raw:
+                # mtime=0 keeps the compressed bytes a pure function of the content
+                with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                    f.write(data)
+            os.replace(tmp_path, blob_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return digest, len(data), os.path.getsize(blob_path)
+
+    def read_text(self, digest):
+        blob_path = self.path_for(digest)
+        if not os.path.exists(blob_path):
+            raise FileNotFoundError(f"Backup blob not found: {digest}")
+        with gzip.open(blob_path, "rb") as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Backup blob {digest} is corrupt (hash mismatch)")
+        return data.decode("utf-8")
+
+    def export(self, digest, filepath):
+        """
+        Writes a blob back out as a plain .reg file (UTF-16 LE, like reg export).
+        """
+        text = self.read_text(digest)
+        if "\r" not in text:
+            # Blobs stored by older versions had their line endings normalized to "\n"
+            text = text.replace("\n", "\r\n")
+        tmp_path = filepath + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-16", newline="") as f:
+                f.write(text)
+            os.replace(tmp_path, filepath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return filepath
+
+def main(argv):
+    if len(argv) != 4 or argv[0] != "export":
+        print(__doc__.strip().splitlines()[-1].strip(), file=sys.stderr)
+        return 2
+
+    from backend.backup_catalog import BackupCatalog
+
+    _, backup_dir, name, out_path = argv
+    store = BlobStore(os.path.join(backup_dir, "blobs"))
+    entry = BackupCatalog(backup_dir).find(name)
+    digest = entry.get('blob') if entry is not None else name
+    if not digest or digest not in store:
+        print(f"No stored backup named {name}", file=sys.stderr)
+        return 1
+    store.export(digest, out_path)
+    print(out_path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
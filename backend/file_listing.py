@@ -0,0 +1,97 @@
+import ntpath
+import logging
+
+from backend.reg_file import detect_encoding
+from backend.stat_cache import VolumeUnreachable
+
+class VolumeNotListed(VolumeUnreachable):
+    """
+    The path is on a drive the file listing doesn't cover, so nothing can be said about it.
+    """
+    def __init__(self, volume):
+        OSError.__init__(self, f"{volume or 'Volume'} is not covered by the file listing")
+        self.volume = volume
+        self.timeout = None
+
+class FileListing:
+    """
+    A machine's directory tree as recorded in a listing (e.g. `dir /s /b C:\\ D:\\`),
+    with the scandir/exists callables StatCache expects, so another machine's
+    uninstall entries can be checked offline.
+    Paths are Windows paths, matched case-insensitively. Paths on drives that never
+    appear in the listing raise VolumeNotListed, which the scanner reports as Unreachable.
+    """
+    def __init__(self):
+        self.dirs = {}       # normcased dir -> {normcased name: name}
+        self.volumes = set() # normcased drives seen in the listing
+
+    def read(self, path, directories=None):
+        """
+        Adds the entries of a listing file (one absolute path per line), read as a stream.
+        directories: Optional set of normcased directories to keep entries for
+                     (see AppScanner.directories_for); everything else is skipped,
+                     so memory is bounded by what the checks need, not by the disk size.
+        """
+        with open(path, "rb") as raw:
+            encoding = detect_encoding(raw.read(4))
+        with open(path, "r", encoding=encoding, errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                drive = ntpath.splitdrive(line)[0]
+                if not drive:
+                    # Headers and summaries of `dir` output
+                    continue
+                self.volumes.add(ntpath.normcase(drive))
+                parent, name = ntpath.split(ntpath.normpath(line))
+                if not name:
+                    continue
+                parent = ntpath.normcase(parent)
+                if directories is None or parent in directories:
+                    self.dirs.setdefault(parent, {})[ntpath.normcase(name)] = name
+        logging.getLogger(__name__).debug(
+            f"Read {path}: {len(self.dirs)} directories kept, volumes {sorted(self.volumes)}"
+        )
+
+    def add_file(self, path):
+        """
+        Records path and all of its parent directories.
+        """
+        path = ntpath.normpath(path)
+        self.volumes.add(ntpath.normcase(ntpath.splitdrive(path)[0]))
+        while True:
+            parent, name = ntpath.split(path)
+            if not name or parent == path:
+                break
+            self.dirs.setdefault(ntpath.normcase(parent), {})[ntpath.normcase(name)] = name
+            path = parent
+
+    def add_dir(self, path):
+        path = ntpath.normpath(path)
+        self.add_file(path)
+        self.dirs.setdefault(ntpath.normcase(path), {})
+
+    def _check_volume(self, path):
+        volume = ntpath.normcase(ntpath.splitdrive(path)[0])
+        if volume not in self.volumes:
+            raise VolumeNotListed(ntpath.splitdrive(path)[0])
+
+    def scandir(self, path):
+        self._check_volume(path)
+        entries = self.dirs.get(ntpath.normcase(ntpath.normpath(path)))
+        if entries is None:
+            raise FileNotFoundError(path)
+        return [_Entry(name) for name in entries.values()]
+
+    def exists(self, path):
+        self._check_volume(path)
+        path = ntpath.normcase(ntpath.normpath(path))
+        if path in self.dirs:
+            return True
+        parent, name = ntpath.split(path)
+        return name in self.dirs.get(parent, ())
+
+class _Entry:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
@@ -0,0 +1,386 @@
+"""
+Read-only access to offline registry hive files (the "regf" format of SOFTWARE,
+NTUSER.DAT etc.), e.g. copied off another machine or mounted from a VHD.
+
+The file is memory-mapped and cells are decoded in place with struct.unpack_from,
+so opening a hive costs nothing and a scan only touches the pages of the keys it
+actually visits (for the uninstall views, a few MB of a several hundred MB hive).
+"""
+import os
+import mmap
+import struct
+import logging
+
+from backend.registry_backend import (
+    RegistryBackend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER, KEY_READ, KEY_WRITE, KEY_WOW64_64KEY,
+    REG_SZ, REG_EXPAND_SZ, REG_DWORD, REG_MULTI_SZ, REG_QWORD, ROOT_NAMES,
+)
+
+REG_DWORD_BIG_ENDIAN = 5
+
+REGF_SIGNATURE = b"regf"
+# Cell offsets are relative to the first hive bin, which follows the 4 KiB base block
+HBIN_START = 4096
+NO_CELL = 0xFFFFFFFF
+
+KEY_COMP_NAME = 0x0020     # nk name stored as Latin-1 instead of UTF-16
+VALUE_COMP_NAME = 0x0001   # vk name stored as Latin-1 instead of UTF-16
+DATA_IN_OFFSET = 0x80000000  # vk data of up to 4 bytes kept in the offset field
+BIG_DATA_SEGMENT = 16344   # values larger than this are split over a "db" segment list
+
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+# nk: signature, flags, last write, (access bits, parent), subkey count, (volatile count),
+# subkey list, (volatile list), value count, value list, (security, class, 5 size hints),
+# name length, (class length)
+_NK = struct.Struct("<2sHQ8xI4xI4xII28xH2x")
+_NK_NAME = 76
+# vk: signature, name length, data size, data offset, type, flags
+_VK = struct.Struct("<2sHIIIH2x")
+_VK_NAME = 20
+# Bytes per entry of each subkey list kind: lf/lh hold (offset, hint) pairs, li/ri bare offsets
+_LIST_ENTRY_SIZES = {b"lf": 8, b"lh": 8, b"li": 4, b"ri": 4}
+
+class HiveError(OSError):
+    """
+    The file is not a hive or a cell is malformed.
+    An OSError like the one winreg raises for a corrupt hive (ERROR_BADDB),
+    so a damaged uninstall subkey is skipped instead of ending the scan.
+    """
+
+class HiveFile:
+    """
+    One memory-mapped hive. Keys are identified by the offset of their nk cell.
+    """
+    def __init__(self, path):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                # Empty file
+                raise HiveError(f"{path}: not a registry hive ({e})") from e
+        self._data = memoryview(self._mmap)
+        self._children = {}  # nk offset -> [child nk offsets]
+        self._names = {}     # nk offset -> {lowercased child name: child nk offset}
+        self._paths = {}     # lowercased path -> nk offset, for keys with subkeys
+
+        try:
+            signature, primary_seq, secondary_seq = struct.unpack_from("<4sII", self._data, 0)
+            major, minor = struct.unpack_from("<II", self._data, 0x14)
+            self.root = _U32.unpack_from(self._data, 0x24)[0]
+        except struct.error:
+            signature = None
+        if signature != REGF_SIGNATURE or major != 1:
+            self.close()
+            raise HiveError(f"{path}: not a registry hive")
+        self.minor_version = minor
+        if primary_seq != secondary_seq:
+            self.logger.warning(
+                f"{path} was not cleanly unloaded; changes still in its .LOG files are not visible"
+            )
+        self.key_name(self.root)
+
+    def close(self):
+        self._data.release()
+        self._mmap.close()
+
+    # --- cells ---
+
+    def _cell(self, offset):
+        """
+        Returns (start, size) of the data of the allocated cell at offset.
+        """
+        start = HBIN_START + offset
+        try:
+            size = _I32.unpack_from(self._data, start)[0]
+        except struct.error:
+            raise HiveError(f"{self.path}: cell offset {offset:#x} out of range") from None
+        # Allocated cells have a negative size; free ones must never be referenced
+        if size >= 0 or start - size > len(self._data):
+            raise HiveError(f"{self.path}: bad cell at {offset:#x}")
+        return start + 4, -size - 4
+
+    def _nk(self, offset):
+        """
+        Returns (data start, flags, last_write, subkey count, subkey list, value count, value list, name length).
+        """
+        # Hot path: the signature check stands in for _cell's size validation
+        start = HBIN_START + offset + 4
+        try:
+            fields = _NK.unpack_from(self._data, start)
+        except struct.error:
+            raise HiveError(f"{self.path}: truncated key cell at {offset:#x}") from None
+        if fields[0] != b"nk":
+            raise HiveError(f"{self.path}: expected a key cell at {offset:#x}")
+        return (start,) + fields[1:]
+
+    def _decode_name(self, start, length, compressed):
+        raw = self._data[start:start + length]
+        return str(raw, "latin-1") if compressed else str(raw, "utf-16-le")
+
+    def _list_offsets(self, list_offset, out):
+        """
+        Appends the nk offsets of a subkey list (lf/lh/li, or an ri list of those) to out.
+        """
+        start, size = self._cell(list_offset)
+        signature = bytes(self._data[start:start + 2])
+        count = _U16.unpack_from(self._data, start + 2)[0]
+        entry_size = _LIST_ENTRY_SIZES.get(signature)
+        if entry_size is None:
+            raise HiveError(f"{self.path}: unknown subkey list {signature!r} at {list_offset:#x}")
+        if 4 + count * entry_size > size:
+            raise HiveError(f"{self.path}: truncated subkey list at {list_offset:#x}")
+        if signature in (b"lf", b"lh"):
+            # (offset, name hint/hash) pairs
+            out.extend(struct.unpack_from(f"<{count * 2}I", self._data, start + 4)[::2])
+        elif signature == b"li":
+            out.extend(struct.unpack_from(f"<{count}I", self._data, start + 4))
+        else:
+            for sub_list in struct.unpack_from(f"<{count}I", self._data, start + 4):
+                self._list_offsets(sub_list, out)
+
+    # --- keys ---
+
+    def children(self, offset):
+        children = self._children.get(offset)
+        if children is None:
+            _, _, _, count, list_offset, _, _, _ = self._nk(offset)
+            children = []
+            if count and list_offset != NO_CELL:
+                self._list_offsets(list_offset, children)
+            self._children[offset] = children
+        return children
+
+    def child(self, offset, name):
+        names = self._names.get(offset)
+        if names is None:
+            names = self._names[offset] = {}
+            for child in self.children(offset):
+                names.setdefault(self.key_name(child).lower(), child)
+        return names.get(name.lower())
+
+    def find(self, path):
+        """
+        Returns the nk offset of path (relative to the hive root). Raises FileNotFoundError.
+        """
+        parts = [part for part in path.split("\\") if part]
+        key = "\\".join(parts).lower()
+        offset = self._paths.get(key)
+        if offset is not None:
+            return offset
+        if not parts:
+            return self.root
+        offset = self.child(self.find("\\".join(parts[:-1])), parts[-1])
+        if offset is None:
+            raise FileNotFoundError(f"Registry key not found: {path}")
+        if self._nk(offset)[3]:
+            self._paths[key] = offset
+        return offset
+
+    def key_info(self, offset):
+        """
+        Returns (num_subkeys, num_values, last_write FILETIME).
+        """
+        _, _, last_write, subkeys, _, values, _, _ = self._nk(offset)
+        return subkeys, values, last_write
+
+    def key_name(self, offset):
+        start, flags, _, _, _, _, _, name_len = self._nk(offset)
+        return self._decode_name(start + _NK_NAME, name_len, flags & KEY_COMP_NAME)
+
+    # --- values ---
+
+    def value_offsets(self, offset):
+        _, _, _, _, _, count, list_offset, _ = self._nk(offset)
+        if not count or list_offset == NO_CELL:
+            return ()
+        start, size = self._cell(list_offset)
+        if size < count * 4:
+            raise HiveError(f"{self.path}: truncated value list at {list_offset:#x}")
+        return struct.unpack_from(f"<{count}I", self._data, start)
+
+    def _vk(self, offset):
+        """
+        Returns (data start, name length, data size, data offset, type, flags).
+        """
+        start = HBIN_START + offset + 4
+        try:
+            fields = _VK.unpack_from(self._data, start)
+        except struct.error:
+            raise HiveError(f"{self.path}: truncated value cell at {offset:#x}") from None
+        if fields[0] != b"vk":
+            raise HiveError(f"{self.path}: expected a value cell at {offset:#x}")
+        return (start,) + fields[1:]
+
+    def value_name(self, vk_offset):
+        start, name_len, _, _, _, flags = self._vk(vk_offset)
+        return self._decode_name(start + _VK_NAME, name_len, flags & VALUE_COMP_NAME)
+
+    def value(self, vk_offset):
+        """
+        Returns (name, data, type) with data converted the way winreg does.
+        """
+        start, name_len, data_size, data_offset, value_type, flags = self._vk(vk_offset)
+        name = self._decode_name(start + _VK_NAME, name_len, flags & VALUE_COMP_NAME)
+        return name, _convert(self._value_bytes(data_size, data_offset), value_type), value_type
+
+    def _value_bytes(self, data_size, data_offset):
+        if data_size & DATA_IN_OFFSET:
+            return _U32.pack(data_offset)[:data_size & ~DATA_IN_OFFSET]
+        if not data_size:
+            return b""
+        start, size = self._cell(data_offset)
+        if data_size > BIG_DATA_SEGMENT and self._data[start:start + 2] == b"db":
+            count, segments = struct.unpack_from("<HI", self._data, start + 2)
+            list_start, _ = self._cell(segments)
+            parts = []
+            remaining = data_size
+            for segment in struct.unpack_from(f"<{count}I", self._data, list_start):
+                seg_start, seg_size = self._cell(segment)
+                take = min(remaining, seg_size, BIG_DATA_SEGMENT)
+                parts.append(self._data[seg_start:seg_start + take])
+                remaining -= take
+            return b"".join(parts)
+        if data_size > size:
+            raise HiveError(f"{self.path}: value data at {data_offset:#x} is truncated")
+        return bytes(self._data[start:start + data_size])
+
+def _convert(raw, value_type):
+    if value_type in (REG_SZ, REG_EXPAND_SZ):
+        return _utf16(raw).split("\x00", 1)[0]
+    if value_type == REG_MULTI_SZ:
+        text = _utf16(raw).rstrip("\x00")
+        return text.split("\x00") if text else []
+    if value_type == REG_DWORD and len(raw) == 4:
+        return _U32.unpack(raw)[0]
+    if value_type == REG_DWORD_BIG_ENDIAN and len(raw) == 4:
+        return struct.unpack(">I", raw)[0]
+    if value_type == REG_QWORD and len(raw) == 8:
+        return struct.unpack("<Q", raw)[0]
+    return raw
+
+def _utf16(raw):
+    return raw[:len(raw) & ~1].decode("utf-16-le", errors="replace")
+
+class _HiveKey:
+    __slots__ = ("hive", "offset", "_values")
+
+    def __init__(self, hive, offset):
+        self.hive = hive
+        self.offset = offset
+        self._values = None
+
+    def value_offsets(self):
+        # Read once per open key: RegistryManager enumerates every value of it in a row
+        if self._values is None:
+            self._values = self.hive.value_offsets(self.offset)
+        return self._values
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def Close(self):
+        pass
+
+class HiveBackend(RegistryBackend):
+    """
+    RegistryBackend over offline hive files.
+    A SOFTWARE hive is mounted at HKLM\\SOFTWARE and an NTUSER.DAT at HKCU, so
+    RegistryManager's uninstall paths (including SOFTWARE\\WOW6432Node, which is
+    an ordinary subkey in the file) resolve unchanged. WOW64 view flags are ignored.
+    Read-only: write operations raise PermissionError.
+    """
+    def __init__(self, *paths):
+        self.logger = logging.getLogger(__name__)
+        self.mounts = {}  # (root, lowercased prefix) -> HiveFile
+        try:
+            for path in paths:
+                hive = HiveFile(path)
+                try:
+                    root, prefix = self._detect_mount(hive)
+                    self.mount(hive, root, prefix)
+                except OSError:
+                    hive.close()
+                    raise
+        except OSError:
+            self.close()
+            raise
+
+    @staticmethod
+    def _detect_mount(hive):
+        top = {name.lower() for name in map(hive.key_name, hive.children(hive.root))}
+        if "software" in top:
+            return HKEY_CURRENT_USER, ""
+        if "microsoft" in top:
+            return HKEY_LOCAL_MACHINE, "SOFTWARE"
+        raise HiveError(f"{hive.path}: neither a SOFTWARE nor an NTUSER.DAT hive")
+
+    def mount(self, hive, root, prefix):
+        mount_point = (root, prefix.lower())
+        if mount_point in self.mounts:
+            raise HiveError(
+                f"{hive.path}: {ROOT_NAMES.get(root)}\\{prefix} is already mounted from "
+                f"{self.mounts[mount_point].path}"
+            )
+        self.mounts[mount_point] = hive
+        self.logger.info(f"Mounted {os.path.basename(hive.path)} at {ROOT_NAMES.get(root)}\\{prefix}")
+
+    def close(self):
+        for hive in self.mounts.values():
+            hive.close()
+        self.mounts = {}
+
+    def open_key(self, root, path, access=KEY_READ):
+        lowered = path.lower().strip("\\")
+        for (mount_root, prefix), hive in self.mounts.items():
+            if mount_root != root:
+                continue
+            if not prefix:
+                return _HiveKey(hive, hive.find(path))
+            if lowered == prefix or lowered.startswith(prefix + "\\"):
+                return _HiveKey(hive, hive.find(path.strip("\\")[len(prefix):]))
+        raise FileNotFoundError(f"Registry key not found: {ROOT_NAMES.get(root, hex(root))}\\{path}")
+
+    def enum_key(self, key, index):
+        children = key.hive.children(key.offset)
+        if index >= len(children):
+            raise OSError(f"No more data: subkey index {index}")
+        return key.hive.key_name(children[index])
+
+    def query_value(self, key, name):
+        lowered = name.lower()
+        for vk_offset in key.value_offsets():
+            if key.hive.value_name(vk_offset).lower() == lowered:
+                _, data, value_type = key.hive.value(vk_offset)
+                return data, value_type
+        raise FileNotFoundError(f"Registry value not found: {name}")
+
+    def enum_value(self, key, index):
+        offsets = key.value_offsets()
+        if index >= len(offsets):
+            raise OSError(f"No more data: value index {index}")
+        return key.hive.value(offsets[index])
+
+    def query_info(self, key):
+        return key.hive.key_info(key.offset)
+
+    def delete_key(self, key, name):
+        raise PermissionError("Hive files are opened read-only")
+
+    def create_key(self, root, path, access=KEY_WRITE):
+        raise PermissionError("Hive files are opened read-only")
+
+    def set_key_value(self, key, name, data, value_type):
+        raise PermissionError("Hive files are opened read-only")
+
+    def delete_value(self, key, name):
+        raise PermissionError("Hive files are opened read-only")
+
+    def delete_tree(self, root, path, access=KEY_WOW64_64KEY):
+        raise PermissionError("Hive files are opened read-only")
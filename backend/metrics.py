@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import bisect
+import threading
+import functools
+
+# Histogram bucket upper bounds, in milliseconds (the last bucket is open-ended)
+BUCKETS_MS = (0.01, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Spans kept for the JSON trace; older ones are dropped first
+MAX_SPANS = 20000
+
+class Histogram:
+    """
+    Latency distribution of one phase: count, total, min/max and fixed log-spaced buckets.
+    """
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += seconds
+        if self.min is None or ms < self.min:
+            self.min = ms
+        if self.max is None or ms > self.max:
+            self.max = ms
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, fraction):
+        """
+        Upper bound (ms) of the bucket holding the given fraction of samples.
+        """
+        if not self.count:
+            return None
+        wanted = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= wanted:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 4) if self.count else None,
+            'min_ms': round(self.min, 4) if self.min is not None else None,
+            'max_ms': round(self.max, 4) if self.max is not None else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'buckets': {
+                (f"<={bound}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}"): n
+                for i, (bound, n) in enumerate(zip(BUCKETS_MS + (None,), self.buckets)) if n
+            },
+        }
+
+class Metrics:
+    """
+    Process-wide counters, latency histograms and trace spans.
+    timer() is cheap enough for per-item phases (one perf_counter pair and a dict update);
+    span() additionally records a trace event, meant for coarse phases like a whole scan.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.counters = {}
+            self.histograms = {}
+            self.spans = []
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def timer(self, name):
+        return _Timer(self, name, False)
+
+    def span(self, name):
+        return _Timer(self, name, True)
+
+    def timed(self, name):
+        """
+        Decorator form of timer().
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Timer(self, name, False):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record_span(self, name, start):
+        """
+        Records a span that started at start (a perf_counter value) and ends now,
+        for phases that don't fit a with block (e.g. a generator's lifetime).
+        """
+        duration = time.perf_counter() - start
+        self.observe(name, duration)
+        self._add_span(name, start, duration)
+
+    def _add_span(self, name, start, duration):
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS:
+                del self.spans[:MAX_SPANS // 10]
+            self.spans.append((name, start, duration, threading.get_ident()))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'uptime_s': round(time.perf_counter() - self.started, 3),
+                'counters': dict(sorted(self.counters.items())),
+                'timers': {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+            }
+
+    def format_report(self):
+        """
+        Plain-text summary for the diagnostics panel.
+        """
+        data = self.snapshot()
+        lines = [f"Uptime: {data['uptime_s']:.1f} s", "", "Counters:"]
+        for name, value in data['counters'].items():
+            lines.append(f"  {name:<32} {value:>10}")
+        lines += ["", f"Timers:{'count':>34} {'total ms':>10} {'mean ms':>9} {'p95 ms':>8} {'max ms':>9}"]
+        for name, t in data['timers'].items():
+            lines.append(
+                f"  {name:<32} {t['count']:>7} {t['total_ms']:>10.1f} {t['mean_ms']:>9.3f} "
+                f"{t['p95_ms']:>8} {t['max_ms']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        """
+        Writes the snapshot plus the recorded spans as Chrome trace events
+        (loadable in chrome://tracing or Perfetto).
+        """
+        with self._lock:
+            spans = list(self.spans)
+            started = self.started
+        pid = os.getpid()
+        events = [
+            {
+                'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                'ts': round((start - started) * 1e6), 'dur': round(duration * 1e6),
+            }
+            for name, start, duration, tid in spans
+        ]
+        data = self.snapshot()
+        data['traceEvents'] = events
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, path)
+        return path
+
+class _Timer:
+    __slots__ = ("metrics", "name", "trace", "start")
+
+    def __init__(self, metrics, name, trace):
+        self.metrics = metrics
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        self.metrics.observe(self.name, duration)
+        if self.trace:
+            self.metrics._add_span(self.name, self.start, duration)
+        return False
+
+METRICS = Metrics()
@@ -0,0 +1,149 @@
+import os
+import re
+import ntpath
+import logging
+import threading
+
+from backend.registry_backend import (
+    HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER, KEY_READ, KEY_WOW64_64KEY,
+)
+
+# Where Windows Installer registers products, keyed by packed GUID
+MACHINE_PRODUCTS = r"SOFTWARE\Classes\Installer\Products"
+USER_PRODUCTS = r"Software\Microsoft\Installer\Products"
+USER_DATA = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Installer\UserData"
+
+_GUID = re.compile(r"\{([0-9A-Fa-f]{8})-([0-9A-Fa-f]{4})-([0-9A-Fa-f]{4})-([0-9A-Fa-f]{4})-([0-9A-Fa-f]{12})\}")
+
+def default_installer_dir():
+    return ntpath.join(os.environ.get("SystemRoot", "C:\\Windows"), "Installer")
+
+def find_product_code(text):
+    """
+    Returns the first {GUID} in text (e.g. "MsiExec.exe /X{...}"), uppercased, or None.
+    """
+    if not text:
+        return None
+    match = _GUID.search(text)
+    return match.group(0).upper() if match else None
+
+def pack_guid(guid):
+    """
+    Converts a product code to the packed form Windows Installer uses as key name:
+    {12345678-ABCD-EF01-2345-6789ABCDEF01} -> 87654321DCBA10FE32547698BADCFE10
+    The first three groups are reversed, the last two are byte-wise nibble-swapped.
+    """
+    match = _GUID.fullmatch(guid.strip())
+    if match is None:
+        raise ValueError(f"Not a GUID: {guid}")
+    g1, g2, g3, g4, g5 = (part.upper() for part in match.groups())
+    tail = g4 + g5
+    return g1[::-1] + g2[::-1] + g3[::-1] + "".join(tail[i + 1] + tail[i] for i in range(0, len(tail), 2))
+
+class MsiIndex:
+    """
+    Per-scan index of the products Windows Installer knows about.
+    Built once, on the first lookup after invalidate(), from the Installer
+    Products/UserData registry keys and one listing of the Installer cache
+    directory; every lookup afterwards is a dict/set membership test.
+    """
+    def __init__(self, backend, stat_cache, installer_dir=None):
+        """
+        backend: RegistryBackend to read the Installer keys from.
+        stat_cache: StatCache used to list the Installer cache directory (and check cached packages).
+        installer_dir: Defaults to %SystemRoot%\\Installer.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.stat_cache = stat_cache
+        self.installer_dir = installer_dir or default_installer_dir()
+        self._lock = threading.Lock()
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._built = False
+            self._products = {}     # packed GUID -> LocalPackage path or None
+            self._cache_names = None  # normcased names in the Installer dir, None if unlistable
+            self.available = False
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            sources = 0
+            for root, path in ((HKEY_LOCAL_MACHINE, MACHINE_PRODUCTS), (HKEY_CURRENT_USER, USER_PRODUCTS)):
+                for packed in self._subkeys(root, path):
+                    self._products.setdefault(packed.upper(), None)
+                    sources += 1
+            sources += self._read_user_data()
+
+            try:
+                self._cache_names = self.stat_cache.listdir(self.installer_dir)
+            except OSError:
+                # The system drive timing out is unusual, but it must not fail the scan
+                self._cache_names = None
+            # Nothing readable at all (not Windows, no rights): don't guess
+            self.available = bool(sources) or bool(self._cache_names)
+            self._built = True
+            self.logger.debug(
+                f"MSI index: {len(self._products)} registered products, "
+                f"{len(self._cache_names or ())} entries in {self.installer_dir}"
+            )
+
+    def _subkeys(self, root, path):
+        try:
+            with self.backend.open_key(root, path, KEY_READ | KEY_WOW64_64KEY) as key:
+                count = self.backend.query_info(key)[0]
+                return [self.backend.enum_key(key, i) for i in range(count)]
+        except OSError:
+            return []
+
+    def _read_user_data(self):
+        """
+        Reads InstallProperties\\LocalPackage (the cached .msi) for every product of every user SID.
+        """
+        found = 0
+        for sid in self._subkeys(HKEY_LOCAL_MACHINE, USER_DATA):
+            products_path = f"{USER_DATA}\\{sid}\\Products"
+            for packed in self._subkeys(HKEY_LOCAL_MACHINE, products_path):
+                found += 1
+                local_package = None
+                try:
+                    props_path = f"{products_path}\\{packed}\\InstallProperties"
+                    with self.backend.open_key(HKEY_LOCAL_MACHINE, props_path, KEY_READ | KEY_WOW64_64KEY) as key:
+                        local_package = self.backend.query_value(key, "LocalPackage")[0]
+                except OSError:
+                    pass
+                packed = packed.upper()
+                if local_package or packed not in self._products:
+                    self._products[packed] = local_package or None
+        return found
+
+    def check(self, product_code):
+        """
+        Returns (status, reason) for an MSI product code.
+        """
+        self._ensure_built()
+        if not self.available:
+            return "Unknown", f"Windows Installer data unavailable for {product_code}"
+
+        packed = pack_guid(product_code)
+        if packed in self._products:
+            local_package = self._products[packed]
+            if local_package and not self._package_exists(local_package):
+                return "Ghost", f"Cached installer package missing: {local_package}"
+            return "Valid", f"Windows Installer product registered: {product_code}"
+
+        # Products also keep a {ProductCode} folder (icons, patches) in the Installer cache
+        if self._cache_names and ntpath.normcase(product_code) in self._cache_names:
+            return "Valid", f"Windows Installer cache entry found: {product_code}"
+        return "Ghost", f"Windows Installer has no record of product {product_code}"
+
+    def _package_exists(self, path):
+        directory, name = ntpath.split(ntpath.normpath(path))
+        if self._cache_names is not None and ntpath.normcase(directory) == ntpath.normcase(ntpath.normpath(self.installer_dir)):
+            return ntpath.normcase(name) in self._cache_names
+        return self.stat_cache.exists(path)
@@ -0,0 +1,397 @@
+import os
+import re
+import codecs
+import logging
+
+from collections import namedtuple
+
+from backend.registry_backend import (
+    ROOTS_BY_NAME, ROOT_FULL_NAMES, KEY_READ, KEY_WRITE, KEY_WOW64_64KEY,
+    REG_SZ, REG_EXPAND_SZ, REG_BINARY, REG_DWORD, REG_MULTI_SZ, REG_QWORD,
+)
+
+logger = logging.getLogger(__name__)
+
+HEADER_V5 = "Windows Registry Editor Version 5.00"
+HEADER_V4 = "REGEDIT4"
+
+# Hex data lines are wrapped once they reach this many characters (same rule as regedit)
+MAX_HEX_CHARS = 77
+
+def detect_encoding(head):
+    """
+    Picks the text encoding of a .reg file from its first bytes.
+    regedit / reg export write UTF-16 LE with a BOM; REGEDIT4 files are ANSI.
+    """
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    return "cp1252"
+
+def iter_logical_lines(path):
+    """
+    Yields the lines of a .reg file with hex continuation lines (trailing backslash) joined.
+    """
+    with open(path, "rb") as raw:
+        encoding = detect_encoding(raw.read(4))
+    with open(path, "r", encoding=encoding, errors="replace", newline=None) as f:
+        pending = None
+        for line in f:
+            line = line.rstrip("\r\n")
+            if pending is not None:
+                line = pending + line.lstrip()
+                pending = None
+            if line.endswith("\\") and not line.startswith("["):
+                pending = line[:-1]
+                continue
+            yield line
+        if pending is not None:
+            yield pending
+
+def split_key_path(full_path):
+    """
+    "HKEY_LOCAL_MACHINE\\SOFTWARE\\X" -> (HKEY_LOCAL_MACHINE constant, "SOFTWARE\\X")
+    """
+    root_name, _, sub_path = full_path.partition("\\")
+    root = ROOTS_BY_NAME.get(root_name.upper())
+    if root is None:
+        raise ValueError(f"Unknown registry root: {root_name}")
+    return root, sub_path
+
+_QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"', re.S)
+_ESCAPE = re.compile(r"\\(.)", re.S)
+
+def _unescape(match):
+    return match.group(1)
+
+def _read_quoted(text, start):
+    """
+    Reads a "..." string starting at text[start] == '"'.
+    Returns (unescaped string, index after the closing quote).
+    """
+    match = _QUOTED.match(text, start)
+    if match is None:
+        raise ValueError(f"Unterminated string: {text}")
+    value = match.group(1)
+    if "\\" in value:
+        value = _ESCAPE.sub(_unescape, value)
+    return value, match.end()
+
+def decode_hex_value(value_type, raw, unicode=True):
+    """
+    Converts the bytes of a hex(...) value into what winreg would return for that type.
+    """
+    if value_type in (REG_SZ, REG_EXPAND_SZ):
+        text = raw.decode("utf-16-le" if unicode else "cp1252", errors="replace")
+        return text.split("\0", 1)[0]
+    if value_type == REG_MULTI_SZ:
+        text = raw.decode("utf-16-le" if unicode else "cp1252", errors="replace")
+        items = text.split("\0")
+        while items and items[-1] == "":
+            items.pop()
+        return items
+    if value_type == REG_DWORD and len(raw) == 4:
+        return int.from_bytes(raw, "little")
+    if value_type == REG_QWORD and len(raw) == 8:
+        return int.from_bytes(raw, "little")
+    return raw
+
+def parse_value_data(data, unicode=True):
+    """
+    Parses the right-hand side of a value line into (data, type).
+    """
+    if data.startswith('"'):
+        text, _ = _read_quoted(data, 0)
+        return text, REG_SZ
+    if data.startswith("dword:"):
+        return int(data[6:], 16), REG_DWORD
+    if data.startswith("hex"):
+        type_part, _, hex_part = data.partition(":")
+        if type_part == "hex":
+            value_type = REG_BINARY
+        elif type_part.startswith("hex(") and type_part.endswith(")"):
+            value_type = int(type_part[4:-1], 16)
+        else:
+            raise ValueError(f"Unknown value format: {data[:20]}")
+        hex_part = hex_part.replace(",", "").replace(" ", "")
+        raw = bytes.fromhex(hex_part)
+        if value_type == REG_BINARY:
+            return raw, REG_BINARY
+        return decode_hex_value(value_type, raw, unicode), value_type
+    raise ValueError(f"Unknown value format: {data[:20]}")
+
+# Typed operations a .reg file describes, in file order
+CreateKey = namedtuple("CreateKey", "root path")
+DeleteKey = namedtuple("DeleteKey", "root path")
+SetValue = namedtuple("SetValue", "root path name data type")
+DeleteValue = namedtuple("DeleteValue", "root path name")
+
+class RegFileError(ValueError):
+    """
+    Raised for malformed .reg content when parsing strictly.
+    """
+
+def iter_reg_operations(path, strict=False):
+    """
+    Streams a .reg file as typed operations:
+    [KEY] -> CreateKey, [-KEY] -> DeleteKey, "name"=data -> SetValue, "name"=- -> DeleteValue.
+    The default value has name "". Handles UTF-16 / UTF-8 / ANSI files and hex continuation lines.
+    Malformed entries are logged and skipped, or raise RegFileError when strict is set.
+    """
+    root = key_path = None
+    unicode = True
+    for entry_no, line in enumerate(iter_logical_lines(path), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith(";"):
+            continue
+        if stripped == HEADER_V5:
+            unicode = True
+            continue
+        if stripped == HEADER_V4:
+            unicode = False
+            continue
+
+        try:
+            if stripped.startswith("["):
+                section = stripped[1:stripped.rindex("]")]
+                if section.startswith("-"):
+                    # Values can't follow a deleted key
+                    root, key_path = split_key_path(section[1:])
+                    yield DeleteKey(root, key_path)
+                    root = key_path = None
+                    continue
+                root, key_path = split_key_path(section)
+                yield CreateKey(root, key_path)
+                continue
+
+            if key_path is None:
+                raise ValueError("Value outside of a key section")
+
+            if stripped.startswith("@="):
+                name, rest = "", stripped[2:]
+            elif stripped.startswith('"'):
+                name, end = _read_quoted(stripped, 0)
+                if stripped[end:end + 1] != "=":
+                    raise ValueError("Missing '=' after value name")
+                rest = stripped[end + 1:]
+            else:
+                raise ValueError("Unrecognised line")
+
+            if rest == "-":
+                yield DeleteValue(root, key_path, name)
+                continue
+            data, value_type = parse_value_data(rest, unicode)
+            yield SetValue(root, key_path, name, data, value_type)
+        except ValueError as e:
+            if strict:
+                raise RegFileError(f"{path}: entry {entry_no}: {e}") from e
+            logger.warning(f"{path}: entry {entry_no}: {e}")
+
+def top_level_keys(operations):
+    """
+    Returns the (root, path) of every created key that is not a subkey of another
+    one, in file order: the keys a backup was made of.
+    """
+    keys = []
+    for op in operations:
+        if not isinstance(op, CreateKey):
+            continue
+        if any(op.root == root and op.path.lower().startswith(path.lower() + "\\") for root, path in keys):
+            continue
+        keys.append((op.root, op.path))
+    return keys
+
+def validate_reg_file(path):
+    """
+    Parses a whole file strictly. Returns (number of keys, None) or (0, error message).
+    """
+    keys = 0
+    try:
+        for op in iter_reg_operations(path, strict=True):
+            if isinstance(op, CreateKey):
+                keys += 1
+    except (OSError, UnicodeError, RegFileError) as e:
+        return 0, str(e)
+    return keys, None
+
+# --- Applying ---
+
+def apply_operations(backend, operations, access=KEY_WRITE | KEY_WOW64_64KEY):
+    """
+    Applies operations through a RegistryBackend. Consecutive values for the
+    same key reuse one open handle, so a restore costs one open per key.
+    Returns the number of operations applied.
+    """
+    applied = 0
+    current = None  # (root, path, open key)
+    try:
+        for op in operations:
+            if isinstance(op, (SetValue, DeleteValue)):
+                if current is None or current[:2] != (op.root, op.path):
+                    if current is not None:
+                        current[2].Close()
+                    current = (op.root, op.path, backend.create_key(op.root, op.path, access))
+                if isinstance(op, SetValue):
+                    backend.set_key_value(current[2], op.name, op.data, op.type)
+                else:
+                    try:
+                        backend.delete_value(current[2], op.name)
+                    except FileNotFoundError:
+                        pass
+            elif isinstance(op, CreateKey):
+                if current is not None:
+                    current[2].Close()
+                current = (op.root, op.path, backend.create_key(op.root, op.path, access))
+            elif isinstance(op, DeleteKey):
+                if current is not None:
+                    current[2].Close()
+                    current = None
+                try:
+                    backend.delete_tree(op.root, op.path)
+                except FileNotFoundError:
+                    pass
+            applied += 1
+    finally:
+        if current is not None:
+            current[2].Close()
+    return applied
+
+def diff_operations(backend, operations, access=KEY_READ | KEY_WOW64_64KEY):
+    """
+    Dry run: compares operations against the current registry state.
+    Returns a list of (change, description) for operations that would change
+    something, where change is "add", "modify" or "delete".
+    """
+    changes = []
+    existing_keys = {}
+
+    def key_exists(root, path):
+        cache_key = (root, path.lower())
+        if cache_key not in existing_keys:
+            try:
+                with backend.open_key(root, path, access):
+                    existing_keys[cache_key] = True
+            except FileNotFoundError:
+                existing_keys[cache_key] = False
+        return existing_keys[cache_key]
+
+    def current_value(root, path, name):
+        if not key_exists(root, path):
+            return None
+        try:
+            with backend.open_key(root, path, access) as key:
+                return backend.query_value(key, name)
+        except FileNotFoundError:
+            return None
+
+    for op in operations:
+        full_path = f"{ROOT_FULL_NAMES[op.root]}\\{op.path}"
+        if isinstance(op, CreateKey):
+            if not key_exists(op.root, op.path):
+                changes.append(("add", f"[{full_path}]"))
+        elif isinstance(op, DeleteKey):
+            if key_exists(op.root, op.path):
+                changes.append(("delete", f"[{full_path}]"))
+        elif isinstance(op, SetValue):
+            current = current_value(op.root, op.path, op.name)
+            label = f"{full_path} : {op.name or '@'}"
+            if current is None:
+                changes.append(("add", label))
+            elif current != (op.data, op.type):
+                changes.append(("modify", label))
+        elif isinstance(op, DeleteValue):
+            if current_value(op.root, op.path, op.name) is not None:
+                changes.append(("delete", f"{full_path} : {op.name or '@'}"))
+    return changes
+
+# --- Writing ---
+
+_NOT_QUOTABLE = re.compile(r"[\0\r\n]")
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+def encode_value_data(data, value_type):
+    """
+    Converts winreg-style data back to the raw bytes stored in the registry.
+    """
+    if data is None:
+        return b""
+    if value_type in (REG_SZ, REG_EXPAND_SZ):
+        return (str(data) + "\0").encode("utf-16-le")
+    if value_type == REG_MULTI_SZ:
+        return "".join(item + "\0" for item in data).encode("utf-16-le") + b"\0\0"
+    if value_type == REG_DWORD:
+        return int(data).to_bytes(4, "little")
+    if value_type == REG_QWORD:
+        return int(data).to_bytes(8, "little")
+    if isinstance(data, str):
+        return data.encode("utf-16-le")
+    return bytes(data)
+
+def format_value(name, data, value_type):
+    """
+    Formats one value as it appears in a `reg export` file (without the trailing CRLF).
+    """
+    prefix = f'"{_escape(name)}"=' if name else "@="
+
+    # A quoted string has to stay on one line, and can't carry a NUL; those are written as hex(1)
+    if value_type == REG_SZ and data is not None and not _NOT_QUOTABLE.search(str(data)):
+        return f'{prefix}"{_escape(str(data))}"'
+    if value_type == REG_DWORD and data is not None:
+        return f"{prefix}dword:{int(data) & 0xFFFFFFFF:08x}"
+
+    type_text = "hex:" if value_type == REG_BINARY else f"hex({value_type:x}):"
+    raw = encode_value_data(data, value_type)
+
+    # Same wrapping as regedit: count the prefix, break after a comma once the
+    # line reaches MAX_HEX_CHARS, and indent continuation lines by two spaces
+    parts = [prefix, type_text]
+    line_len = len(prefix) + len(type_text)
+    last = len(raw) - 1
+    for i, byte in enumerate(raw):
+        parts.append(f"{byte:02x}")
+        if i == last:
+            break
+        parts.append(",")
+        line_len += 3
+        if line_len >= MAX_HEX_CHARS:
+            parts.append("\\\r\n  ")
+            line_len = 2
+    return "".join(parts)
+
+def iter_key_lines(backend, root, path, access=KEY_READ | KEY_WOW64_64KEY):
+    """
+    Yields the lines of one key and, recursively, its subkeys in `reg export` layout.
+    """
+    with backend.open_key(root, path, access) as key:
+        num_subkeys, num_values, _ = backend.query_info(key)
+        yield f"[{ROOT_FULL_NAMES[root]}\\{path}]"
+        for i in range(num_values):
+            name, data, value_type = backend.enum_value(key, i)
+            yield format_value(name, data, value_type)
+        yield ""
+        subkeys = [backend.enum_key(key, i) for i in range(num_subkeys)]
+
+    for subkey in subkeys:
+        yield from iter_key_lines(backend, root, f"{path}\\{subkey}", access)
+
+def write_reg_file(backend, keys, filepath):
+    """
+    Serializes keys (list of (root, path)) into a UTF-16 LE .reg file, byte-compatible
+    with what `reg export` writes. The file is written to a temp name and renamed,
+    so a failure never leaves a truncated backup behind.
+    """
+    tmp_path = filepath + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-16", newline="") as f:
+            f.write(HEADER_V5 + "\r\n\r\n")
+            for root, path in keys:
+                for line in iter_key_lines(backend, root, path):
+                    f.write(line + "\r\n")
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return filepath
@@ -0,0 +1,291 @@
+import itertools
+import threading
+
+try:
+    import winreg
+except ImportError:
+    # Only the in-memory and .reg file backends are usable off Windows
+    winreg = None
+
+# Same values as the winreg constants, so flags stored in app records
+# (e.g. wow64_flag) mean the same thing whichever backend produced them.
+HKEY_CLASSES_ROOT = 0x80000000
+HKEY_CURRENT_USER = 0x80000001
+HKEY_LOCAL_MACHINE = 0x80000002
+HKEY_USERS = 0x80000003
+
+KEY_READ = 0x20019
+KEY_WRITE = 0x20006
+KEY_WOW64_64KEY = 0x0100
+KEY_WOW64_32KEY = 0x0200
+
+REG_NONE = 0
+REG_SZ = 1
+REG_EXPAND_SZ = 2
+REG_BINARY = 3
+REG_DWORD = 4
+REG_MULTI_SZ = 7
+REG_QWORD = 11
+
+ROOT_NAMES = {
+    HKEY_LOCAL_MACHINE: "HKLM",
+    HKEY_CURRENT_USER: "HKCU",
+    HKEY_CLASSES_ROOT: "HKCR",
+    HKEY_USERS: "HKU",
+}
+# Long names as used in .reg files
+ROOT_FULL_NAMES = {
+    HKEY_LOCAL_MACHINE: "HKEY_LOCAL_MACHINE",
+    HKEY_CURRENT_USER: "HKEY_CURRENT_USER",
+    HKEY_CLASSES_ROOT: "HKEY_CLASSES_ROOT",
+    HKEY_USERS: "HKEY_USERS",
+}
+ROOTS_BY_NAME = {}
+for _root, _name in list(ROOT_NAMES.items()) + list(ROOT_FULL_NAMES.items()):
+    ROOTS_BY_NAME[_name] = _root
+
+class RegistryBackend:
+    """
+    The narrow set of registry operations RegistryManager relies on.
+    Keys returned by open_key are context managers; everything else takes such a key.
+    Missing keys/values raise FileNotFoundError, like winreg does.
+    """
+    def open_key(self, root, path, access=KEY_READ):
+        raise NotImplementedError
+
+    def enum_key(self, key, index):
+        """
+        Returns the name of the subkey at index.
+        """
+        raise NotImplementedError
+
+    def query_value(self, key, name):
+        """
+        Returns (data, type) for a named value.
+        """
+        raise NotImplementedError
+
+    def enum_value(self, key, index):
+        """
+        Returns (name, data, type) for the value at index.
+        """
+        raise NotImplementedError
+
+    def query_info(self, key):
+        """
+        Returns (num_subkeys, num_values, last_write) where last_write is a FILETIME-style int.
+        """
+        raise NotImplementedError
+
+    def delete_key(self, key, name):
+        """
+        Deletes the subkey name (which must have no subkeys) of an open key.
+        """
+        raise NotImplementedError
+
+    # Write operations, used when restoring backups
+
+    def create_key(self, root, path, access=KEY_WRITE):
+        """
+        Opens path for writing, creating it and any missing parents.
+        """
+        raise NotImplementedError
+
+    def set_key_value(self, key, name, data, value_type):
+        raise NotImplementedError
+
+    def delete_value(self, key, name):
+        raise NotImplementedError
+
+    def delete_tree(self, root, path, access=KEY_WOW64_64KEY):
+        """
+        Deletes path with all of its subkeys (what a [-KEY] line in a .reg file means).
+        """
+        with self.open_key(root, path, KEY_READ | access) as key:
+            subkeys = [self.enum_key(key, i) for i in range(self.query_info(key)[0])]
+        for subkey in subkeys:
+            self.delete_tree(root, f"{path}\\{subkey}", access)
+        parent_path, _, name = path.rpartition("\\")
+        with self.open_key(root, parent_path, KEY_WRITE | access) as parent:
+            self.delete_key(parent, name)
+
+class WinregBackend(RegistryBackend):
+    """
+    The live registry, through winreg.
+    """
+    def __init__(self):
+        if winreg is None:
+            raise OSError("The live registry backend is only available on Windows")
+
+    def open_key(self, root, path, access=KEY_READ):
+        return winreg.OpenKey(root, path, 0, access)
+
+    def enum_key(self, key, index):
+        return winreg.EnumKey(key, index)
+
+    def query_value(self, key, name):
+        return winreg.QueryValueEx(key, name)
+
+    def enum_value(self, key, index):
+        return winreg.EnumValue(key, index)
+
+    def query_info(self, key):
+        return winreg.QueryInfoKey(key)
+
+    def delete_key(self, key, name):
+        winreg.DeleteKey(key, name)
+
+    def create_key(self, root, path, access=KEY_WRITE):
+        return winreg.CreateKeyEx(root, path, 0, access)
+
+    def set_key_value(self, key, name, data, value_type):
+        winreg.SetValueEx(key, name, 0, value_type, data)
+
+    def delete_value(self, key, name):
+        winreg.DeleteValue(key, name)
+
+class _Node:
+    __slots__ = ("name", "children", "values", "last_write", "_order", "_value_order")
+
+    def __init__(self, name, last_write):
+        self.name = name
+        self.children = {}  # lowercased name -> _Node, in insertion order
+        self.values = {}    # lowercased name -> (name, data, type)
+        self.last_write = last_write
+        self._order = None  # cached list of child names for enum_key
+        self._value_order = None  # cached list of values for enum_value
+
+    def child_names(self):
+        if self._order is None:
+            self._order = [child.name for child in self.children.values()]
+        return self._order
+
+    def value_list(self):
+        if self._value_order is None:
+            self._value_order = list(self.values.values())
+        return self._value_order
+
+class _MemoryKey:
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def Close(self):
+        pass
+
+class MemoryBackend(RegistryBackend):
+    """
+    Dict-backed registry tree. Used for tests, benchmarks and replaying exported hives.
+    Key and value names are case-insensitive like the real registry.
+    WOW64 view flags are ignored: paths are taken literally (e.g. SOFTWARE\\WOW6432Node\\...).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Monotonic stand-in for FILETIME, bumped on every write
+        self._clock = itertools.count(1)
+        self._roots = {}
+
+    def _tick(self):
+        return next(self._clock)
+
+    def _find(self, root, path):
+        node = self._roots.get(root)
+        if node is None:
+            raise FileNotFoundError(f"Registry root not found: {root:#x}")
+        if path:
+            for part in path.split("\\"):
+                if not part:
+                    continue
+                node = node.children.get(part.lower())
+                if node is None:
+                    raise FileNotFoundError(f"Registry key not found: {path}")
+        return node
+
+    def create_key(self, root, path, access=KEY_WRITE):
+        """
+        Creates path (and any missing parents) and returns the node's open key.
+        """
+        with self._lock:
+            node = self._roots.get(root)
+            if node is None:
+                node = self._roots[root] = _Node(ROOT_NAMES.get(root, hex(root)), self._tick())
+            for part in path.split("\\"):
+                if not part:
+                    continue
+                child = node.children.get(part.lower())
+                if child is None:
+                    child = node.children[part.lower()] = _Node(part, self._tick())
+                    node.last_write = self._tick()
+                    node._order = None
+                node = child
+        return _MemoryKey(node)
+
+    def set_value(self, root, path, name, data, value_type=REG_SZ):
+        self.set_key_value(self.create_key(root, path), name, data, value_type)
+
+    def set_key_value(self, key, name, data, value_type=REG_SZ):
+        with self._lock:
+            key.node.values[name.lower()] = (name, data, value_type)
+            key.node.last_write = self._tick()
+            key.node._value_order = None
+
+    def open_key(self, root, path, access=KEY_READ):
+        return _MemoryKey(self._find(root, path))
+
+    def enum_key(self, key, index):
+        # Dicts keep insertion order, like a freshly imported hive
+        names = key.node.child_names()
+        if index >= len(names):
+            raise OSError(f"No more data: subkey index {index}")
+        return names[index]
+
+    def query_value(self, key, name):
+        entry = key.node.values.get(name.lower())
+        if entry is None:
+            raise FileNotFoundError(f"Registry value not found: {name}")
+        return entry[1], entry[2]
+
+    def enum_value(self, key, index):
+        values = key.node.value_list()
+        if index >= len(values):
+            raise OSError(f"No more data: value index {index}")
+        return values[index]
+
+    def query_info(self, key):
+        node = key.node
+        return len(node.children), len(node.values), node.last_write
+
+    def delete_key(self, key, name):
+        with self._lock:
+            child = key.node.children.get(name.lower())
+            if child is None:
+                raise FileNotFoundError(f"Registry key not found: {name}")
+            if child.children:
+                raise PermissionError(f"Registry key has subkeys: {name}")
+            del key.node.children[name.lower()]
+            key.node.last_write = self._tick()
+            key.node._order = None
+
+    def delete_value(self, key, name):
+        with self._lock:
+            if key.node.values.pop(name.lower(), None) is None:
+                raise FileNotFoundError(f"Registry value not found: {name}")
+            key.node.last_write = self._tick()
+            key.node._value_order = None
+
+class RegFileBackend(MemoryBackend):
+    """
+    In-memory registry loaded from one or more .reg exports (regedit / reg export format).
+    """
+    def __init__(self, *paths):
+        super().__init__()
+        from backend.reg_file import iter_reg_operations, apply_operations
+        for path in paths:
+            apply_operations(self, iter_reg_operations(path))
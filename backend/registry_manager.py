@@ -1,67 +1,296 @@
-import winreg
+import json
+import os
+import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app_record import AppRecord, AppStatus, REGISTRY_FIELDS, EXTRA_FIELDS
+from backend.app_identity import group_locations
+from backend.metrics import METRICS
+from backend.registry_backend import (
+    WinregBackend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER,
+    KEY_READ, KEY_WRITE, KEY_WOW64_64KEY, KEY_WOW64_32KEY,
+)
+
+# Threads enumerating the live registry's uninstall views; winreg calls release the GIL.
+# In-memory, .reg and hive backends never wait on anything, so they are read on one thread.
+DEFAULT_MAX_WORKERS = 4
+
+# Subkeys per enumeration task; larger views are split into ranges of this size
+RANGE_SIZE = 128
+
+def _reuse(record):
+    """
+    The record an incremental scan returns for an unchanged key: a copy, since the
+    previous one may still be on screen, keeping its health check unless that
+    came out Unreachable. Those are retried on every scan until the volume answers.
+    """
+    if record is None:
+        return None
+    return record.copy(status=record.get('Status') != AppStatus.UNREACHABLE)
 
 class RegistryManager:
-    def __init__(self):
+    def __init__(self, backend=None, snapshot_path=None, extra_fields=EXTRA_FIELDS, max_workers=None):
+        """
+        backend: RegistryBackend to read from (defaults to the live registry via winreg).
+                 MemoryBackend / RegFileBackend allow running off Windows.
+        snapshot_path: Optional JSON file the last-write snapshot is persisted to,
+                       so incremental rescans also work across restarts.
+        extra_fields: Additional value names to keep on each record (e.g. EstimatedSize).
+        max_workers: Threads reading the views during a scan (see _iter_ranges).
+                     1 reads everything on the calling thread. Defaults to DEFAULT_MAX_WORKERS
+                     for the live registry and 1 for every other backend.
+        """
         self.logger = logging.getLogger(__name__)
+        self.backend = backend or WinregBackend()
+        if max_workers is None:
+            max_workers = DEFAULT_MAX_WORKERS if isinstance(self.backend, WinregBackend) else 1
+        self.max_workers = max_workers
+        # Lowercased value name -> field name, for the single enumeration pass
+        self._wanted_fields = {name.lower(): name for name in REGISTRY_FIELDS + tuple(extra_fields)}
         # Define the registry paths to scan
         self.registry_paths = [
-            (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall", winreg.KEY_WOW64_64KEY),
-            (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall", winreg.KEY_WOW64_32KEY),
-            (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Uninstall", 0)
+            (HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall", KEY_WOW64_64KEY),
+            (HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall", KEY_WOW64_32KEY),
+            (HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Uninstall", 0)
         ]
 
-    def get_installed_apps(self):
+        # unique_id -> (last_write, app_info or None if the key is filtered out)
+        self.snapshot = {}
+        # read_app updates the snapshot from the UI thread while a scan may be reading it
+        self._snapshot_lock = threading.Lock()
+        # What the last scan found compared to the snapshot before it
+        self.last_changes = {'added': [], 'modified': [], 'removed': []}
+        self.snapshot_path = snapshot_path
+        if self.snapshot_path:
+            self._load_snapshot()
+
+    def get_installed_apps(self, incremental=True):
         """
         Scans all defined registry paths and returns a list of installed applications.
+        An app registered in several places (64-bit view, WOW6432Node, HKCU) is returned
+        once, with the other keys in its duplicates (see AppRecord.locations).
+        With incremental=True, subkeys whose last-write time matches the snapshot
+        are not re-read; a copy of their previous AppRecord is returned instead.
+        The copy keeps its Status, so only added and modified keys need a health
+        check, except when it was Unreachable: the volume may be back, so that
+        result is dropped and the entry checked again (see _reuse).
+        incremental=False re-reads every key and returns records without a Status.
         """
-        apps = []
-        seen_keys = set() # To avoid duplicates if any
+        return list(self.iter_installed_apps(incremental))
 
-        for hkey, subpath, extra_flags in self.registry_paths:
+    def iter_installed_apps(self, incremental=True):
+        """
+        Generator form of get_installed_apps: yields each app as soon as its subkey is read.
+        A later key with the same content as an app already yielded is attached to it instead.
+        The snapshot and last_changes are only updated once the generator is exhausted.
+        """
+        return group_locations(self._iter_entries(incremental))
+
+    def _iter_entries(self, incremental):
+        """
+        Yields the record of every shown uninstall key, one per registry location,
+        in registry_paths and subkey index order however many threads read them.
+        """
+        started = time.perf_counter()
+        count = 0
+        enumerated = 0
+        reused = 0
+        # A copy: read_app may change the snapshot while the scan loops over it
+        with self._snapshot_lock:
+            previous = dict(self.snapshot) if incremental else {}
+        snapshot = {}
+        changes = {'added': [], 'modified': [], 'removed': []}
+
+        for entries in self._iter_ranges(previous):
+            for unique_id, last_write, app_info, change in entries:
+                if unique_id in snapshot:
+                    # Read twice because the view changed while ranges were being read
+                    continue
+                enumerated += 1
+                if change is None:
+                    reused += 1
+                else:
+                    changes[change].append(unique_id)
+                snapshot[unique_id] = (last_write, app_info)
+                if app_info is not None:
+                    count += 1
+                    yield app_info
+
+        METRICS.incr("registry.keys_enumerated", enumerated)
+        METRICS.incr("registry.keys_reused", reused)
+        # Wall time of the whole generator, including whatever the consumer did between items
+        METRICS.record_span("registry.scan", started)
+
+        changes['removed'] = [uid for uid in previous if uid not in snapshot]
+        with self._snapshot_lock:
+            self.snapshot = snapshot
+        self.last_changes = changes
+        self.logger.info(
+            f"Registry scan: {count} apps, {len(changes['added'])} added, "
+            f"{len(changes['modified'])} modified, {len(changes['removed'])} removed"
+        )
+        if self.snapshot_path:
+            self._save_snapshot()
+
+    def _iter_ranges(self, previous):
+        """
+        Splits every view into index ranges of RANGE_SIZE subkeys (by its QueryInfoKey count)
+        and yields the entries of each range, in order. With more than one worker the ranges
+        are read on a thread pool, so slow views (e.g. a roaming HKCU hive) and large ones
+        don't hold each other up; a range is yielded as soon as it and all before it are done.
+        """
+        if self.max_workers <= 1:
+            for view in self.registry_paths:
+                for start in range(0, self._count_subkeys(view), RANGE_SIZE):
+                    yield self._read_range(view, start, start + RANGE_SIZE, previous)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="registry-enum")
+        try:
+            counts = list(pool.map(self._count_subkeys, self.registry_paths))
+            futures = [
+                pool.submit(self._read_range, view, start, start + RANGE_SIZE, previous)
+                for view, num_subkeys in zip(self.registry_paths, counts)
+                for start in range(0, num_subkeys, RANGE_SIZE)
+            ]
+            for future in futures:
+                yield future.result()
+        finally:
+            # Also reached when the consumer stops early; don't read what nobody will use
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _count_subkeys(self, view):
+        hkey, subpath, extra_flags = view
+        try:
+            with self.backend.open_key(hkey, subpath, KEY_READ | extra_flags) as key:
+                return self.backend.query_info(key)[0]
+        except OSError as e:
+            self.logger.error(f"Failed to open registry path {subpath}: {e}")
+            return 0
+
+    def _read_range(self, view, start, stop, previous):
+        """
+        Reads subkeys start..stop-1 of one view (fewer if it shrank meanwhile).
+        Returns a list of (unique_id, last_write, app_info or None, change), where change is
+        'added', 'modified' or None if the record was reused from previous.
+        Runs on the enumeration threads: nothing shared is modified here.
+        """
+        hkey, subpath, extra_flags = view
+        # Open the key with appropriate permissions (Read + optional WOW64 flag)
+        access_mask = KEY_READ | extra_flags
+        root_str = "HKLM" if hkey == HKEY_LOCAL_MACHINE else "HKCU"
+        entries = []
+        values_read = 0
+        with METRICS.span("registry.read_range"):
             try:
-                # Open the key with appropriate permissions (Read + optional WOW64 flag)
-                access_mask = winreg.KEY_READ | extra_flags
-                with winreg.OpenKey(hkey, subpath, 0, access_mask) as key:
-                    num_subkeys = winreg.QueryInfoKey(key)[0]
-                    
-                    for i in range(num_subkeys):
+                with self.backend.open_key(hkey, subpath, access_mask) as key:
+                    stop = min(stop, self.backend.query_info(key)[0])
+                    for i in range(start, stop):
                         try:
-                            subkey_name = winreg.EnumKey(key, i)
+                            subkey_name = self.backend.enum_key(key, i)
                             full_registry_path = f"{subpath}\\{subkey_name}"
-                            
+
                             # Construct a unique ID for deduplication/reference
                             # Using the tuple of (root_hkey, path) might be hard to serialize, 
                             # so we'll store string representation of root.
-                            root_str = "HKLM" if hkey == winreg.HKEY_LOCAL_MACHINE else "HKCU"
                             unique_id = f"{root_str}\\{full_registry_path}"
 
-                            if unique_id in seen_keys:
-                                continue
-                            
-                            with winreg.OpenKey(hkey, full_registry_path, 0, access_mask) as subkey:
-                                app_info = self._extract_app_info(subkey)
-                                app_info['registry_path'] = full_registry_path
-                                app_info['root_key'] = root_str
-                                app_info['key_name'] = subkey_name
-                                app_info['wow64_flag'] = extra_flags
-                                
-                                # Filter out items without a DisplayName (usually not user-facing apps)
-                                if app_info.get('DisplayName'):
-                                    if self._is_safe(app_info):
-                                        apps.append(app_info)
-                                        seen_keys.add(unique_id)
-                                    
-                        except WindowsError as e:
+                            with self.backend.open_key(hkey, full_registry_path, access_mask) as subkey:
+                                _, num_values, last_write = self.backend.query_info(subkey)
+                                cached = previous.get(unique_id)
+                                if cached is not None and cached[0] == last_write:
+                                    app_info = _reuse(cached[1])
+                                    change = None
+                                else:
+                                    change = 'modified' if cached is not None else 'added'
+                                    with METRICS.timer("registry.read_app"):
+                                        app_info = self._read_app(subkey, num_values, subpath, root_str, subkey_name, extra_flags)
+                                    values_read += num_values
+                            entries.append((unique_id, last_write, app_info, change))
+
+                        except OSError as e:
                             # Permission denied or key missing for specific subkey
                             self.logger.warning(f"Error accessing subkey index {i} in {subpath}: {e}")
                             continue
-                            
-            except WindowsError as e:
+
+            except OSError as e:
                 self.logger.error(f"Failed to open registry path {subpath}: {e}")
+        # Counted once per range, not in _extract_app_info, to keep the lock off the per-key path
+        METRICS.incr("registry.values_read", values_read)
+        return entries
+
+    def _read_app(self, subkey, num_values, parent_path, root_str, subkey_name, extra_flags):
+        """
+        Reads one uninstall subkey. Returns None for entries that should not be shown.
+        """
+        app_info = AppRecord(self._extract_app_info(subkey, num_values), parent_path, root_str, subkey_name, extra_flags)
+        
+        # Filter out items without a DisplayName (usually not user-facing apps)
+        if app_info.get('DisplayName') and self._is_safe(app_info):
+            return app_info
+        return None
+
+    def read_app(self, unique_id):
+        """
+        Re-reads a single uninstall entry (e.g. one just restored from a backup)
+        instead of rescanning every view.
+        Returns the fresh AppRecord, or None if the key is gone, filtered out, or
+        not directly under one of the scanned uninstall paths.
+        The snapshot is updated, so the next incremental scan reuses the record.
+        """
+        root_str, _, full_path = unique_id.partition("\\")
+        root_str = root_str.upper()
+        parent_path, _, subkey_name = full_path.rpartition("\\")
+        for hkey, subpath, extra_flags in self.registry_paths:
+            if ("HKLM" if hkey == HKEY_LOCAL_MACHINE else "HKCU") != root_str:
+                continue
+            if subpath.lower() != parent_path.lower() or not subkey_name:
                 continue
+            # Same spelling as a full scan would produce
+            unique_id = f"{root_str}\\{subpath}\\{subkey_name}"
+            try:
+                with self.backend.open_key(hkey, f"{subpath}\\{subkey_name}", KEY_READ | extra_flags) as subkey:
+                    _, num_values, last_write = self.backend.query_info(subkey)
+                    app_info = self._read_app(subkey, num_values, subpath, root_str, subkey_name, extra_flags)
+                METRICS.incr("registry.values_read", num_values)
+            except FileNotFoundError:
+                with self._snapshot_lock:
+                    self.snapshot.pop(unique_id, None)
+                return None
+            with self._snapshot_lock:
+                self.snapshot[unique_id] = (last_write, app_info)
+            return app_info
+        return None
 
-        return apps
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.snapshot = {
+                uid: (entry[0], AppRecord.from_dict(entry[1]) if entry[1] else None)
+                for uid, entry in data.get('keys', {}).items()
+            }
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Ignoring unreadable registry snapshot {self.snapshot_path}: {e}")
+
+    def _save_snapshot(self):
+        tmp_path = self.snapshot_path + ".tmp"
+        with self._snapshot_lock:
+            entries = list(self.snapshot.items())
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                keys = {
+                    uid: [last_write, app_info.to_dict(duplicates=False) if app_info else None]
+                    for uid, (last_write, app_info) in entries
+                }
+                json.dump({'keys': keys}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to save registry snapshot {self.snapshot_path}: {e}")
 
     def _is_safe(self, app_info):
         """
@@ -94,32 +323,35 @@ class RegistryManager:
             
         return True
 
-    def _extract_app_info(self, key):
+    def _extract_app_info(self, key, num_values=None):
         """
         Helper to extract common values from a registry key.
+        Walks the key's values once with enum_value instead of querying each field
+        (most uninstall keys lack half the fields, and every miss would raise).
         """
-        info = {}
-        fields = [
-            'DisplayName', 'DisplayVersion', 'Publisher', 
-            'InstallLocation', 'UninstallString', 'QuietUninstallString',
-            'SystemComponent', 'WindowsInstaller'
-        ]
-        
-        for field in fields:
+        if num_values is None:
+            num_values = self.backend.query_info(key)[1]
+
+        info = dict.fromkeys(REGISTRY_FIELDS)
+        wanted = self._wanted_fields
+        for i in range(num_values):
             try:
-                value, _ = winreg.QueryValueEx(key, field)
+                name, value, _ = self.backend.enum_value(key, i)
+            except OSError:
+                # Values removed while we were reading
+                break
+            field = wanted.get(name.lower())
+            if field is not None:
                 info[field] = value
-            except FileNotFoundError:
-                info[field] = None
                 
         return info
 
     def delete_registry_key(self, root_str, registry_path, wow64_flag):
         """
-        Deletes a registry key.
+        Deletes a registry key. Returns the unique_id of the deleted entry.
         WARNING: This is destructive. Backup should be handled before calling this.
         """
-        hkey = winreg.HKEY_LOCAL_MACHINE if root_str == "HKLM" else winreg.HKEY_CURRENT_USER
+        hkey = HKEY_LOCAL_MACHINE if root_str == "HKLM" else HKEY_CURRENT_USER
         
         # KEY_ALL_ACCESS might be needed to delete, or at least KEY_WRITE
         # Note: winreg.DeleteKey doesn't take flags for WOW64 views directly in older python versions?
@@ -127,14 +359,15 @@ class RegistryManager:
         # But we need to open the PARENT key first with the correct view.
         
         parent_path, key_name = registry_path.rsplit('\\', 1)
+        unique_id = f"{root_str}\\{registry_path}"
         
         try:
             # Open parent with write access and correct view
-            access_mask = winreg.KEY_WRITE | wow64_flag
-            with winreg.OpenKey(hkey, parent_path, 0, access_mask) as parent_key:
-                winreg.DeleteKey(parent_key, key_name)
+            access_mask = KEY_WRITE | wow64_flag
+            with self.backend.open_key(hkey, parent_path, access_mask) as parent_key:
+                self.backend.delete_key(parent_key, key_name)
                 self.logger.info(f"Successfully deleted key: {registry_path}")
-                return True
-        except WindowsError as e:
+                return unique_id
+        except OSError as e:
             self.logger.error(f"Failed to delete key {registry_path}: {e}")
             raise e
@@ -0,0 +1,57 @@
+import os
+import json
+import time
+import logging
+
+from backend.app_record import AppRecord
+
+# Bump whenever the record layout written by AppRecord.to_dict changes;
+# caches with another version are ignored and rebuilt by the next scan.
+SCHEMA_VERSION = 2
+
+class ScanCache:
+    """
+    The last complete scan result (records with their Status), persisted so the
+    next start can show it immediately while a fresh scan runs in the background.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+    def load(self):
+        """
+        Returns (apps, saved_at) or (None, None) if there is no usable cache.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable scan cache {self.path}: {e}")
+            return None, None
+
+        if not isinstance(data, dict) or data.get('version') != SCHEMA_VERSION:
+            self.logger.info(f"Ignoring scan cache {self.path} from another version")
+            return None, None
+        try:
+            apps = [AppRecord.from_dict(entry) for entry in data['apps']]
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.warning(f"Ignoring corrupt scan cache {self.path}: {e}")
+            return None, None
+        return apps, data.get('saved_at')
+
+    def save(self, apps):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {'version': SCHEMA_VERSION, 'saved_at': time.time(), 'apps': [app.to_dict() for app in apps]},
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Failed to save scan cache {self.path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -1,14 +1,168 @@
-import os
-import shlex
+import ntpath
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend.stat_cache import StatCache, VolumeUnreachable
+from backend.msi_index import MsiIndex, find_product_code
+from backend.metrics import METRICS
+
+# A disconnected share or removed disk can block a single stat for up to a minute
+DEFAULT_PATH_TIMEOUT = 5.0
 
 class AppScanner:
+    def __init__(self, stat_cache=None, max_workers=16, per_volume=4, registry_backend=None, msi_index=None,
+                 path_timeout=DEFAULT_PATH_TIMEOUT):
+        """
+        stat_cache: StatCache used for every existence check.
+                    Tests can build one on top of a fake filesystem.
+        max_workers: Size of the thread pool used by check_many.
+        per_volume: Maximum concurrent probes against a single drive/share,
+                    so one slow or spun-down disk can't hog every worker.
+        registry_backend: Registry the Windows Installer product data is read from.
+        msi_index: MsiIndex used for MsiExec uninstall strings; built from
+                   registry_backend and the stat cache when not given.
+                   Without either, MSI entries are reported as Unknown.
+        path_timeout: Deadline in seconds for each filesystem call of the default stat cache.
+                      Entries on a volume that runs over are reported as Unreachable.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.stat_cache = stat_cache or StatCache(timeout=path_timeout)
+        self.max_workers = max_workers
+        self.per_volume = per_volume
+        if msi_index is None and registry_backend is not None:
+            msi_index = MsiIndex(registry_backend, self.stat_cache)
+        self.msi_index = msi_index
+
+    def begin_scan(self):
+        """
+        Invalidates cached filesystem state. Call once at the start of every (re)scan.
+        """
+        self.stat_cache.invalidate()
+        if self.msi_index is not None:
+            self.msi_index.invalidate()
+
+    def check_many(self, apps):
+        """
+        Health-checks a batch of apps.
+        Every candidate path is collected up front, deduplicated and probed
+        on a bounded thread pool before the per-app logic runs.
+        Returns a list of (status, reason) tuples in the same order as apps.
+        """
+        paths = []
+        seen = set()
+        for app in apps:
+            for path in self._candidate_paths(app):
+                if path not in seen:
+                    seen.add(path)
+                    paths.append(path)
+
+        with METRICS.span("scan.probe_paths"):
+            self._probe_paths(paths)
+        METRICS.incr("scan.paths_probed", len(paths))
+        with METRICS.span("scan.check_batch"):
+            results = [self.check_app_health(app) for app in apps]
+        for status, _ in results:
+            METRICS.incr(f"scan.status.{status.lower()}")
+        self.logger.debug(
+            f"Checked {len(apps)} apps ({len(paths)} unique paths), scan total so far: "
+            f"{self.stat_cache.syscalls} filesystem calls for {self.stat_cache.lookups} lookups"
+        )
+        return results
+
+    def directories_for(self, apps):
+        """
+        Returns the normcased directories whose listings checking apps can consult:
+        the parents of every path check_app_health may look at, including each
+        prefix of an unquoted command line. Lets an offline check load just
+        those parts of a machine's file listing.
+        """
+        directories = set()
+        for app in apps:
+            paths = list(self._candidate_paths(app))
+            uninstall_str = (app.get('UninstallString') or "").strip()
+            if uninstall_str and not uninstall_str.startswith('"') and "msiexec" not in uninstall_str.lower():
+                parts = uninstall_str.split()
+                paths.extend(" ".join(parts[:i + 1]) for i in range(1, len(parts)))
+            for path in paths:
+                directories.add(ntpath.normcase(ntpath.dirname(ntpath.normpath(path))))
+        return directories
+
+    def _candidate_paths(self, app_info):
+        """
+        Returns the paths check_app_health is going to look at first.
+        Prefixes of unquoted command lines are still probed lazily.
+        """
+        install_loc = app_info.get('InstallLocation')
+        if install_loc:
+            yield install_loc.strip('"')
+
+        uninstall_str = app_info.get('UninstallString')
+        if uninstall_str:
+            clean_cmd = uninstall_str.strip()
+            if "msiexec" in clean_cmd.lower():
+                return
+            if clean_cmd.startswith('"'):
+                end_quote = clean_cmd.find('"', 1)
+                if end_quote != -1:
+                    yield clean_cmd[1:end_quote]
+                    return
+            parts = clean_cmd.split()
+            if parts:
+                yield parts[0]
+
+    def _probe_paths(self, paths):
+        """
+        Warms the stat cache for each path on a thread pool.
+        A semaphore per volume limits how many probes hit the same disk at once.
+        """
+        if not paths:
+            return
+
+        # Group by volume and interleave, so waiting workers are spread
+        # across disks instead of queueing up behind the slowest one
+        by_volume = {}
+        for path in paths:
+            by_volume.setdefault(self._volume_of(path), []).append(path)
+        volume_locks = {v: threading.BoundedSemaphore(self.per_volume) for v in by_volume}
+        ordered = []
+        queues = list(by_volume.values())
+        for i in range(max(len(q) for q in queues)):
+            ordered.extend(q[i] for q in queues if i < len(q))
+
+        def probe(path):
+            with volume_locks[self._volume_of(path)]:
+                try:
+                    return self.stat_cache.exists(path)
+                except VolumeUnreachable:
+                    # check_app_health gets the same answer straight from the tripped breaker
+                    return None
+
+        workers = min(self.max_workers, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(probe, ordered))
+
+    def _volume_of(self, path):
+        # Registry paths are always Windows paths, even when tested elsewhere
+        return ntpath.splitdrive(path)[0].lower()
+
+    def _path_exists(self, path):
+        return self.stat_cache.exists(path)
+
     def check_app_health(self, app_info):
         """
-        Determines if an app is Valid, Ghost, or Unknown.
+        Determines if an app is Valid, Ghost, Unknown or Unreachable.
         Returns:
-            status (str): 'Valid', 'Ghost', 'Unknown'
+            status (str): 'Valid', 'Ghost', 'Unknown', 'Unreachable'
             reason (str): Details about the check.
         """
+        try:
+            with METRICS.timer("scan.check_app"):
+                return self._check_paths(app_info)
+        except VolumeUnreachable as e:
+            # Can't tell whether the files are gone or the share/disk is just offline
+            return "Unreachable", f"{e}; entry was not checked"
+
+    def _check_paths(self, app_info):
         install_loc = app_info.get('InstallLocation')
         uninstall_str = app_info.get('UninstallString')
         
@@ -16,18 +170,22 @@ class AppScanner:
         if install_loc:
             # Clean up quotes just in case
             clean_loc = install_loc.strip('"')
-            if os.path.exists(clean_loc):
+            if self._path_exists(clean_loc):
                 return "Valid", f"Installation folder found: {clean_loc}"
             else:
                 # If InstallLocation is explicit but missing, it's likely a ghost
                 # But sometimes InstallLocation points to a specific file? Rare for the property name.
                 pass 
 
-        # Method 2: Check UninstallString
+        # Method 2: MsiExec uninstall strings name a product, not a file
+        if uninstall_str and "msiexec" in uninstall_str.lower():
+            return self._check_msi(app_info, uninstall_str)
+
+        # Method 3: Check UninstallString
         if uninstall_str:
             exe_path = self._extract_path_from_command(uninstall_str)
             if exe_path:
-                if os.path.exists(exe_path):
+                if self._path_exists(exe_path):
                     return "Valid", f"Uninstaller found: {exe_path}"
                 else:
                     return "Ghost", f"Uninstaller missing: {exe_path}"
@@ -49,11 +207,6 @@ class AppScanner:
         """
         if not cmd_str:
             return None
-            
-        # specific MsiExec handling
-        # e.g., MsiExec.exe /I{GUID}
-        if "msiexec" in cmd_str.lower():
-            return self._resolve_msi(cmd_str)
 
         try:
             # Use shlex to split by spaces respecting quotes
@@ -81,30 +234,39 @@ class AppScanner:
             
             # Optimistic: First part is the command
             candidate = parts[0]
-            if os.path.exists(candidate):
+            if self._path_exists(candidate):
                 return candidate
             
             # If first part doesn't exist, maybe it's "C:\Program Files\..." unquoted
             # Try joining parts until we find a match
             for i in range(1, len(parts)):
                 candidate = " ".join(parts[:i+1])
-                if os.path.exists(candidate):
+                if self._path_exists(candidate):
                     return candidate
                 # Also try with .exe appended?
-                if os.path.exists(candidate + ".exe"):
+                if self._path_exists(candidate + ".exe"):
                     return candidate + ".exe"
                     
             return parts[0] # Fallback
-            
+
+        except VolumeUnreachable:
+            raise
         except Exception:
             return None
 
-    def _resolve_msi(self, cmd_str):
-        # MsiExec uninstall strings don't point to a file, they point to a cached MSI or GUID.
-        # Windows Installer caches MSIs in C:\Windows\Installer
-        # Verifying this is harder without resolving the GUID.
-        # For now, we assume MSI apps are VALID to avoid false positives, 
-        # unless we can verify the source.
-        # OR we can assume Unknown.
-        return "C:\\Windows\\System32\\msiexec.exe" # This exists, so it will mark as Valid.
-        # TODO: Better MSI detection logic.
+    def _check_msi(self, app_info, cmd_str):
+        """
+        Checks an MsiExec entry (e.g. MsiExec.exe /X{GUID}) against the Windows Installer index.
+        MSI uninstall keys are usually named after the product code, so that is the fallback
+        when the command line doesn't carry one.
+        """
+        product_code = (
+            find_product_code(cmd_str)
+            or find_product_code(app_info.get('ProductCode'))
+            or find_product_code(app_info.get('key_name'))
+        )
+        if product_code is None:
+            return "Unknown", f"No product code in MSI uninstall string: {cmd_str}"
+        if self.msi_index is None:
+            return "Unknown", f"MSI product {product_code} not verified"
+        return self.msi_index.check(product_code)
@@ -0,0 +1,276 @@
+from array import array
+
+# Field queries understood by SearchIndex.search, e.g. "publisher:adobe status:ghost"
+QUERY_FIELDS = ('name', 'publisher', 'path', 'status', 'root')
+
+SORT_KEYS = ('name', 'publisher', 'size', 'status')
+
+# Ghosts first when sorting by status, since those are what the tool is for
+_STATUS_ORDER = {'ghost': 0, 'unreachable': 1, 'unknown': 2, 'valid': 3}
+
+# Fields matched as a prefix of the stored value rather than as a substring
+PREFIX_FIELDS = ('status',)
+
+def parse_query(text):
+    """
+    Splits a search string into field constraints.
+    Words of the form field:value go to that field; everything else is joined
+    back together and matched as one substring of the name, like the plain search always did.
+    Returns a dict of field -> list of lowercased values, all of which have to match.
+    """
+    text = text.strip().lower()
+    if ":" not in text:
+        return {'name': [text]} if text else {}
+
+    query = {}
+    free = []
+    for word in split_words(text):
+        field, sep, value = word.partition(":")
+        if sep and field in QUERY_FIELDS:
+            if value:
+                query.setdefault(field, []).append(value)
+        else:
+            free.append(word)
+    if free:
+        query.setdefault('name', []).append(" ".join(free))
+    return query
+
+def split_words(text):
+    """
+    Splits on whitespace, keeping "quoted parts" (or 'quoted parts') together.
+    Unlike shlex, backslashes are kept as they are, so Windows paths survive,
+    and an unbalanced quote (the user is still typing) runs to the end.
+    """
+    words = []
+    word = []
+    quote = None
+    started = False
+    for char in text:
+        if quote is not None:
+            if char == quote:
+                quote = None
+            else:
+                word.append(char)
+        elif char in "\"'":
+            quote = char
+            started = True
+        elif char.isspace():
+            if started:
+                words.append("".join(word))
+                word = []
+                started = False
+        else:
+            word.append(char)
+            started = True
+    if started:
+        words.append("".join(word))
+    return words
+
+def _refines(new, old):
+    """
+    True if every result of query new is guaranteed to be a result of query old,
+    i.e. each old constraint is implied by a new one on the same field: one that
+    contains it, or for prefix-matched fields one that starts with it.
+    """
+    for field, values in old.items():
+        new_values = new.get(field)
+        if new_values is None:
+            return False
+        if field in PREFIX_FIELDS:
+            implied = lambda value: any(new_value.startswith(value) for new_value in new_values)
+        else:
+            implied = lambda value: any(value in new_value for new_value in new_values)
+        if not all(implied(value) for value in values):
+            return False
+    return True
+
+def _size_of(app):
+    # EstimatedSize is a REG_DWORD by convention, but some installers write it as a REG_SZ
+    try:
+        return int(app.get('EstimatedSize') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+class SearchIndex:
+    """
+    Search structure built once per scan.
+    Keeps pre-lowercased name/publisher/path/status strings per app, a trigram
+    index over names, and precomputed sort ranks. When a query only extends the
+    previous one, the previous result set is narrowed instead of starting over.
+    """
+    def __init__(self, apps=()):
+        self.apps = []
+        self._names = []
+        self._publishers = []
+        self._paths = []
+        self._statuses = []
+        self._roots = []
+        self._positions = {}  # id(app) -> index
+        self._removed = set()
+        self._trigrams = {}   # trigram -> array of indexes, ascending
+        self._ranks = {}      # sort key -> list of ranks, built lazily
+        self._by_status = None  # status -> indexes, built lazily
+        self._last = None     # (query, result indexes)
+        self.add(apps)
+
+    def __len__(self):
+        return len(self.apps) - len(self._removed)
+
+    # --- maintenance ---
+
+    def add(self, apps):
+        for app in apps:
+            index = len(self.apps)
+            self.apps.append(app)
+            self._positions[id(app)] = index
+            self._names.append(None)
+            self._publishers.append(None)
+            self._paths.append(None)
+            self._statuses.append(None)
+            self._roots.append(None)
+            self._store(index, app)
+            name = self._names[index]
+            for gram in {name[i:i + 3] for i in range(len(name) - 2)}:
+                postings = self._trigrams.get(gram)
+                if postings is None:
+                    postings = self._trigrams[gram] = array('I')
+                postings.append(index)
+        self._invalidate()
+
+    def update(self, app):
+        """
+        Refreshes the searchable fields of an app already in the index
+        (e.g. after its Status changed). The name must not change.
+        """
+        index = self._positions.get(id(app))
+        if index is None:
+            self.add([app])
+            return
+        self._store(index, app)
+        self._invalidate()
+
+    def remove(self, app):
+        index = self._positions.pop(id(app), None)
+        if index is not None:
+            self._removed.add(index)
+            self._invalidate()
+
+    def _store(self, index, app):
+        self._names[index] = (app.get('DisplayName') or '').lower()
+        self._publishers[index] = (app.get('Publisher') or '').lower()
+        self._paths[index] = f"{app.get('InstallLocation') or ''}\n{app.get('UninstallString') or ''}".lower()
+        self._statuses[index] = (app.get('Status') or 'unknown').lower()
+        self._roots[index] = (app.get('root_key') or '').lower()
+
+    def _invalidate(self):
+        self._ranks = {}
+        self._by_status = None
+        self._last = None
+
+    # --- querying ---
+
+    def search(self, text, ghosts_only=False, sort=None, reverse=False):
+        """
+        Returns the apps matching text (see parse_query), in index order or sorted by sort.
+        """
+        query = parse_query(text)
+        if ghosts_only:
+            if not all('ghost'.startswith(status) for status in query.get('status', ())):
+                return []
+            query['status'] = ['ghost']
+
+        if self._last is not None and _refines(query, self._last[0]):
+            candidates = self._last[1]
+        else:
+            candidates = self._candidates(query)
+
+        matches = self._match(candidates, query)
+        self._last = (query, matches)
+
+        if sort is not None:
+            ranks = self._rank(sort)
+            matches = sorted(matches, key=ranks.__getitem__, reverse=reverse)
+        apps = self.apps
+        return [apps[i] for i in matches]
+
+    def _candidates(self, query):
+        """
+        Picks the smallest starting set: the rarest trigram of the name terms,
+        else the apps with the (first) requested status, else everything.
+        """
+        best = None
+        for name in query.get('name', ()):
+            for i in range(len(name) - 2):
+                postings = self._trigrams.get(name[i:i + 3])
+                if postings is None:
+                    return []
+                if best is None or len(postings) < len(best):
+                    best = postings
+        if best is not None:
+            return best
+
+        statuses = query.get('status')
+        if statuses:
+            status = statuses[0]
+            buckets = self._status_buckets()
+            candidates = []
+            for value, indexes in buckets.items():
+                if value.startswith(status):
+                    candidates.extend(indexes)
+            candidates.sort()
+            return candidates
+        return range(len(self.apps))
+
+    def _status_buckets(self):
+        if self._by_status is None:
+            buckets = {}
+            for index, status in enumerate(self._statuses):
+                buckets.setdefault(status, []).append(index)
+            self._by_status = buckets
+        return self._by_status
+
+    def _match(self, candidates, query):
+        # One tight pass per constraint; each pass only sees what survived the previous one
+        result = candidates
+        for field, values in query.items():
+            if field == 'status':
+                # Status values are whole words; allow prefixes like "status:gh"
+                column = self._statuses
+                for value in values:
+                    result = [i for i in result if column[i].startswith(value)]
+                continue
+            if field == 'name':
+                column = self._names
+            elif field == 'publisher':
+                column = self._publishers
+            elif field == 'path':
+                column = self._paths
+            else:
+                column = self._roots
+            for value in values:
+                result = [i for i in result if value in column[i]]
+
+        removed = self._removed
+        if removed:
+            return [i for i in result if i not in removed]
+        return result if isinstance(result, list) else list(result)
+
+    def _rank(self, sort):
+        ranks = self._ranks.get(sort)
+        if ranks is None:
+            if sort == 'name':
+                keys = self._names
+            elif sort == 'publisher':
+                keys = self._publishers
+            elif sort == 'size':
+                keys = [_size_of(app) for app in self.apps]
+            elif sort == 'status':
+                keys = [_STATUS_ORDER.get(status, 2) for status in self._statuses]
+            else:
+                raise ValueError(f"Unknown sort key: {sort}")
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            ranks = [0] * len(keys)
+            for rank, index in enumerate(order):
+                ranks[index] = rank
+            self._ranks[sort] = ranks
+        return ranks
@@ -0,0 +1,198 @@
+import os
+import ntpath
+import threading
+import logging
+
+from backend.metrics import METRICS
+
+_MISSING = object()
+
+class VolumeUnreachable(OSError):
+    """
+    A drive or share did not answer within the deadline (or already failed to earlier in the scan).
+    """
+    def __init__(self, volume, timeout):
+        super().__init__(f"{volume or 'Volume'} did not respond within {timeout:g}s")
+        self.volume = volume
+        self.timeout = timeout
+
+class StatCache:
+    """
+    Scan-scoped cache that answers "does this path exist?" from directory listings.
+    Each parent directory is listed once with os.scandir; later lookups for any
+    sibling, present or not, are served from memory.
+    Paths are handled with ntpath since registry values always hold Windows paths,
+    which also keeps the cache usable against a fake filesystem off Windows.
+    """
+    def __init__(self, scandir=None, exists=None, timeout=None):
+        """
+        scandir: Callable returning an iterable of entries with a .name (defaults to os.scandir).
+        exists: Direct existence check used when a parent can't be listed (defaults to os.path.exists).
+        Both can be replaced by a fake filesystem in tests.
+        timeout: Seconds a single listing or stat may take (None = wait forever).
+                 A call that runs over trips the circuit breaker of its volume: it and
+                 every later lookup on that volume raise VolumeUnreachable until invalidate().
+        """
+        self.logger = logging.getLogger(__name__)
+        self._scandir = scandir or os.scandir
+        self._exists = exists or os.path.exists
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drops everything cached. Called when a rescan starts.
+        """
+        with self._lock:
+            self._dirs = {}       # normcased dir -> frozenset of normcased names, or None if unlistable
+            self._dir_locks = {}
+            self._direct = {}     # normcased path -> bool, for paths answered by a direct stat
+            self._tripped = set() # volumes that timed out during this scan
+            self.syscalls = 0
+            self.lookups = 0
+
+    @property
+    def unreachable_volumes(self):
+        with self._lock:
+            return sorted(self._tripped)
+
+    def _volume(self, path):
+        return ntpath.splitdrive(path)[0].lower()
+
+    def _check_volume(self, volume):
+        if volume in self._tripped:
+            raise VolumeUnreachable(volume, self.timeout)
+
+    def _call(self, volume, func, *args):
+        """
+        Runs func(*args) with the deadline. The call happens on a daemon thread, so a
+        share that never answers only costs that thread, not the scan (or process exit).
+        """
+        if self.timeout is None:
+            return func(*args)
+        self._check_volume(volume)
+
+        result = {}
+        done = threading.Event()
+
+        def run():
+            try:
+                result['value'] = func(*args)
+            except BaseException as e:
+                result['error'] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=run, daemon=True).start()
+        if not done.wait(self.timeout):
+            METRICS.incr("fs.timeouts")
+            with self._lock:
+                first = volume not in self._tripped
+                self._tripped.add(volume)
+            if first:
+                self.logger.warning(f"{volume or 'Volume'} timed out after {self.timeout:g}s, skipping its other paths")
+            raise VolumeUnreachable(volume, self.timeout)
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+
+    def exists(self, path):
+        if not path:
+            return False
+        with self._lock:
+            self.lookups += 1
+
+        path = ntpath.normpath(path)
+        self._check_volume(self._volume(path))
+        parent, name = ntpath.split(path)
+        if not name or not parent or parent == path:
+            # Drive roots and bare names have no parent to list
+            return self._direct_exists(path)
+
+        entries = self._listing(parent)
+        if entries is None:
+            return self._direct_exists(path)
+        name = ntpath.normcase(name)
+        if name in entries:
+            return True
+        if _needs_direct_check(path):
+            # Listings only carry long names; Windows resolves the rest itself
+            return self._direct_exists(path)
+        return False
+
+    def listdir(self, directory):
+        """
+        Returns the normcased names in directory as a frozenset (empty if it doesn't exist),
+        or None if it can't be listed. Served from the same cache as exists().
+        """
+        with self._lock:
+            self.lookups += 1
+        return self._listing(ntpath.normpath(directory))
+
+    def _listing(self, directory):
+        key = ntpath.normcase(directory)
+        entries = self._dirs.get(key, _MISSING)
+        if entries is not _MISSING:
+            return entries
+
+        with self._lock:
+            dir_lock = self._dir_locks.setdefault(key, threading.Lock())
+        # Only one thread lists a given directory, the others wait for its result
+        with dir_lock:
+            entries = self._dirs.get(key, _MISSING)
+            if entries is _MISSING:
+                entries = self._list(directory)
+                self._dirs[key] = entries
+        return entries
+
+    def _read_dir(self, directory):
+        it = self._scandir(directory)
+        try:
+            return frozenset(ntpath.normcase(entry.name) for entry in it)
+        finally:
+            close = getattr(it, "close", None)
+            if close:
+                close()
+
+    def _list(self, directory):
+        with self._lock:
+            self.syscalls += 1
+        METRICS.incr("fs.listdir")
+        try:
+            # VolumeUnreachable propagates and nothing is cached for the directory
+            with METRICS.timer("fs.listdir"):
+                return self._call(self._volume(directory), self._read_dir, directory)
+        except VolumeUnreachable:
+            raise
+        except (FileNotFoundError, NotADirectoryError):
+            return frozenset()
+        except OSError as e:
+            # Access denied and similar: the directory may exist but we can't list it
+            self.logger.debug(f"Cannot list {directory}: {e}")
+            return None
+
+    def _direct_exists(self, path):
+        key = ntpath.normcase(path)
+        cached = self._direct.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.syscalls += 1
+        METRICS.incr("fs.stat")
+        try:
+            with METRICS.timer("fs.stat"):
+                result = bool(self._call(self._volume(path), self._exists, path))
+        except VolumeUnreachable:
+            raise
+        except OSError:
+            result = False
+        self._direct[key] = result
+        return result
+
+def _needs_direct_check(path):
+    """
+    True for paths a directory listing can't confirm: 8.3 short names anywhere in
+    them (PROGRA~1, UNINST~1.EXE) and names with a trailing dot or space, which Windows strips.
+    """
+    return "~" in path or path.endswith((".", " "))
@@ -0,0 +1,111 @@
+"""
+Registry enumeration with simulated call latency: the synthetic uninstall hives
+(see benchmarks.synthetic) behind a backend that makes every registry call wait,
+like a roaming HKCU hive or a remote registry would, scanned with an increasing
+number of enumeration threads (RegistryManager max_workers).
+
+The latency is accounted per thread and slept off in quanta of a few milliseconds,
+with any oversleep credited back, so each thread waits calls x latency in total;
+timer granularity doesn't inflate the single-thread run (and with it the speedup).
+
+    python -m benchmarks.bench_enum [--entries 2000] [--latency-ms 0.2] [--workers 1,2,4,8,16]
+"""
+import sys
+import time
+import argparse
+import threading
+
+from benchmarks.synthetic import build_environment
+from backend.registry_backend import RegistryBackend, KEY_READ
+from backend.registry_manager import RegistryManager
+
+# Owed latency is slept off once it reaches this much; far above sleep() granularity
+SLEEP_QUANTUM = 0.005
+
+class LatencyBackend(RegistryBackend):
+    """
+    Read-only wrapper that charges latency seconds for each call it forwards.
+    Charges add up per thread and are slept off in SLEEP_QUANTUM steps; the time
+    actually slept is subtracted, so oversleeping is paid back by later calls.
+    The sleep releases the GIL, as the winreg calls do.
+    """
+    def __init__(self, backend, latency):
+        self.backend = backend
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self._owed = {}  # thread id -> seconds not slept off yet
+
+    def _wait(self):
+        thread = threading.get_ident()
+        with self._lock:
+            self.calls += 1
+            owed = self._owed.get(thread, 0.0) + self.latency
+            self._owed[thread] = owed
+        if owed < SLEEP_QUANTUM:
+            return
+        start = time.perf_counter()
+        time.sleep(owed)
+        slept = time.perf_counter() - start
+        with self._lock:
+            self._owed[thread] -= slept
+
+    def open_key(self, root, path, access=KEY_READ):
+        self._wait()
+        return self.backend.open_key(root, path, access)
+
+    def enum_key(self, key, index):
+        self._wait()
+        return self.backend.enum_key(key, index)
+
+    def query_value(self, key, name):
+        self._wait()
+        return self.backend.query_value(key, name)
+
+    def enum_value(self, key, index):
+        self._wait()
+        return self.backend.enum_value(key, index)
+
+    def query_info(self, key):
+        self._wait()
+        return self.backend.query_info(key)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_enum", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=2000, help="Uninstall entries over all views.")
+    parser.add_argument("--latency-ms", type=float, default=0.2, help="Simulated latency per registry call.")
+    parser.add_argument("--workers", default="1,2,4,8,16", help="Comma-separated thread counts (default: %(default)s).")
+    args = parser.parse_args(argv)
+
+    backend, _ = build_environment(args.entries)
+    slow = LatencyBackend(backend, args.latency_ms / 1000)
+    print(f"{args.entries} entries, {args.latency_ms} ms per registry call")
+
+    baseline = None
+    expected = None
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        reg_mgr = RegistryManager(backend=slow, max_workers=workers)
+        slow.reset()
+        start = time.perf_counter()
+        apps = reg_mgr.get_installed_apps(incremental=False)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+
+        # Every worker count has to produce the same records in the same order
+        records = [app.to_dict() for app in apps]
+        if expected is None:
+            expected = records
+        elif records != expected:
+            print(f"  {workers:>3} workers: result differs from the first run")
+            return 1
+        print(f"  {workers:>3} workers {elapsed:8.2f} s {len(apps) / elapsed:9.0f} apps/s "
+              f"{slow.calls:>8} calls ({slow.calls * slow.latency:5.2f} s of latency)  "
+              f"speedup {baseline / elapsed:5.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Fleet scan throughput: generates synthetic per-host dumps (.reg export plus a
+files.txt listing, see benchmarks.synthetic) and runs the fleet scan over them
+with an increasing number of worker processes.
+
+    python -m benchmarks.bench_fleet [--hosts 64] [--entries 300] [--keep DIR]
+"""
+import io
+import os
+import time
+import argparse
+import shutil
+import tempfile
+
+import fleet
+from benchmarks.synthetic import build_environment, UNINSTALL_64, UNINSTALL_32, UNINSTALL_USER
+from backend.msi_index import MACHINE_PRODUCTS
+from backend.reg_file import write_reg_file
+from backend.registry_backend import HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER
+
+def write_host(directory, host, entries, seed):
+    backend, fs = build_environment(entries, seed=seed)
+    host_dir = os.path.join(directory, host)
+    os.makedirs(host_dir)
+    keys = []
+    for root, path in ((HKEY_LOCAL_MACHINE, UNINSTALL_64), (HKEY_LOCAL_MACHINE, UNINSTALL_32),
+                       (HKEY_CURRENT_USER, UNINSTALL_USER), (HKEY_LOCAL_MACHINE, MACHINE_PRODUCTS)):
+        try:
+            backend.open_key(root, path)
+        except FileNotFoundError:
+            continue
+        keys.append((root, path))
+    write_reg_file(backend, keys, os.path.join(host_dir, "uninstall.reg"))
+    with open(os.path.join(host_dir, fleet.LISTING_NAME), "w", encoding="utf-8") as f:
+        for parent, names in fs.dirs.items():
+            for name in names.values():
+                f.write(f"{parent}\\{name}\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_fleet")
+    parser.add_argument("--hosts", type=int, default=64)
+    parser.add_argument("--entries", type=int, default=300, help="Uninstall entries per host.")
+    parser.add_argument("--keep", metavar="DIR", help="Generate into (or reuse) DIR instead of a temp directory.")
+    args = parser.parse_args(argv)
+
+    directory = args.keep or tempfile.mkdtemp(prefix="fleet_bench_")
+    os.makedirs(directory, exist_ok=True)
+    hosts = args.hosts
+    try:
+        if not os.listdir(directory):
+            start = time.perf_counter()
+            for i in range(hosts):
+                write_host(directory, f"host{i:05d}", args.entries, seed=i)
+            print(f"Generated {hosts} hosts x {args.entries} entries in {time.perf_counter() - start:.1f} s ({directory})")
+        else:
+            hosts = len(os.listdir(directory))
+
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            code = fleet.run(["--fleet", directory, "--workers", str(workers)], out=io.StringIO())
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  {workers:>3} workers {elapsed:8.2f} s {hosts / elapsed:8.1f} hosts/s "
+                  f"speedup {baseline / elapsed:4.2f}x (exit {code})")
+    finally:
+        if args.keep is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Memory benchmark: per-app dicts (the old record shape) vs slotted AppRecord.
+
+    python -m benchmarks.bench_records [count]
+"""
+import sys
+import tracemalloc
+
+from backend.app_record import AppRecord
+
+PARENT = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+
+def _values(i):
+    return {
+        'DisplayName': f"Synthetic App {i}",
+        'DisplayVersion': f"1.{i % 10}.{i % 7}",
+        'Publisher': f"Vendor {i % 50}",
+        'InstallLocation': f"C:\\Program Files\\Vendor {i % 50}\\App {i}",
+        'UninstallString': f'"C:\\Program Files\\Vendor {i % 50}\\App {i}\\uninstall.exe"',
+        'QuietUninstallString': None,
+        'SystemComponent': None,
+        'WindowsInstaller': None,
+    }
+
+def build_dicts(count):
+    apps = []
+    for i in range(count):
+        info = _values(i)
+        key_name = f"{{{i:08X}-0000-0000-0000-000000000000}}"
+        info['registry_path'] = f"{PARENT}\\{key_name}"
+        info['root_key'] = "HKLM"
+        info['key_name'] = key_name
+        info['wow64_flag'] = 0x100
+        info['Status'] = "Ghost" if i % 3 == 0 else "Valid"
+        info['Reason'] = "Files referenced in registry are missing"
+        apps.append(info)
+    return apps
+
+def build_records(count):
+    apps = []
+    for i in range(count):
+        key_name = f"{{{i:08X}-0000-0000-0000-000000000000}}"
+        record = AppRecord(_values(i), PARENT, "HKLM", key_name, 0x100)
+        record['Status'] = "Ghost" if i % 3 == 0 else "Valid"
+        record['Reason'] = "Files referenced in registry are missing"
+        apps.append(record)
+    return apps
+
+def measure(builder, count):
+    tracemalloc.start()
+    apps = builder(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del apps
+    return current
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 100000
+    dict_bytes = measure(build_dicts, count)
+    record_bytes = measure(build_records, count)
+    print(f"{count} records")
+    print(f"  dict:      {dict_bytes / 1e6:8.1f} MB ({dict_bytes / count:.0f} B/app)")
+    print(f"  AppRecord: {record_bytes / 1e6:8.1f} MB ({record_bytes / count:.0f} B/app)")
+    print(f"  reduction: {100 * (1 - record_bytes / dict_bytes):.0f}%")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,268 @@
+"""
+End-to-end scan benchmark over synthetic uninstall hives (see benchmarks.synthetic):
+registry enumeration, incremental rescan, health check, search index build,
+filtering and list rendering, each timed (median of --repeat) and measured for
+peak traced memory, then compared against stored baselines.
+
+    python -m benchmarks.bench_scan [--sizes 1000,10000] [--repeat 5]
+    python -m benchmarks.bench_scan --sizes 1000,10000,100000,500000 --no-baseline
+    python -m benchmarks.bench_scan --update-baseline
+
+Runs anywhere: the registry is a MemoryBackend and the filesystem a FakeFileSystem.
+The render stage needs customtkinter and a display (e.g. under xvfb-run) and is
+skipped otherwise. Exits with 1 if any stage got slower or bigger than its
+baseline by more than the tolerance and by more than an absolute floor, so
+scheduler noise on millisecond-scale stages doesn't fail the run.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+
+from benchmarks.synthetic import build_environment, INSTALLER_DIR
+from backend.registry_manager import RegistryManager
+from backend.scanner import AppScanner
+from backend.search_index import SearchIndex
+from backend.stat_cache import StatCache
+from backend.msi_index import MsiIndex
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SIZES = (1000, 10000)
+
+# Differences smaller than these never count as regressions, whatever the ratio
+TIME_FLOOR_MS = 5
+MEMORY_FLOOR_KB = 64
+
+# Check batches the way the headless scan and the UI feed the scanner
+BATCH_SIZE = 256
+
+# Typing "adobe" one key at a time, then a few field queries and sorts
+QUERIES = (
+    ("a", False, None), ("ad", False, None), ("ado", False, None), ("adob", False, None), ("adobe", False, None),
+    ("", True, None),
+    ("publisher:microsoft", False, "name"),
+    ("status:ghost path:program", False, "size"),
+    ("tools 1", False, "status"),
+    ("", False, "publisher"),
+)
+
+VISIBLE_ROWS = 30
+
+class Stage:
+    """
+    One benchmarked step. setup() builds fresh inputs (not measured), run(inputs) is measured.
+    """
+    def __init__(self, name, setup, run):
+        self.name = name
+        self.setup = setup
+        self.run = run
+
+def make_scanner(backend, fs):
+    stat_cache = StatCache(scandir=fs.scandir, exists=fs.exists)
+    msi_index = MsiIndex(backend, stat_cache, installer_dir=INSTALLER_DIR)
+    return AppScanner(stat_cache=stat_cache, registry_backend=backend, msi_index=msi_index)
+
+def check_all(scanner, apps):
+    scanner.begin_scan()
+    for start in range(0, len(apps), BATCH_SIZE):
+        batch = apps[start:start + BATCH_SIZE]
+        for app, (status, reason) in zip(batch, scanner.check_many(batch)):
+            app['Status'] = status
+            app['Reason'] = reason
+    return apps
+
+def run_queries(index):
+    total = 0
+    for text, ghosts_only, sort in QUERIES:
+        total += len(index.search(text, ghosts_only=ghosts_only, sort=sort))
+    return total
+
+def build_stages(backend, fs, apps):
+    """
+    apps: Checked records from a warm-up scan, used as input by the later stages.
+    """
+    def setup_rescan():
+        manager = RegistryManager(backend=backend)
+        manager.get_installed_apps(incremental=False)
+        return manager
+
+    stages = [
+        Stage("enumerate", lambda: RegistryManager(backend=backend),
+              lambda manager: manager.get_installed_apps(incremental=False)),
+        Stage("rescan", setup_rescan, lambda manager: manager.get_installed_apps(incremental=True)),
+        Stage("health_check", lambda: (make_scanner(backend, fs), apps),
+              lambda inputs: check_all(*inputs)),
+        Stage("index_build", lambda: apps, SearchIndex),
+        Stage("filter", lambda: SearchIndex(apps), run_queries),
+    ]
+    render = make_render_stage(apps)
+    if render is not None:
+        stages.append(render)
+    else:
+        print("  render: skipped (needs customtkinter and a display)")
+    return stages
+
+def make_render_stage(apps):
+    """
+    Real VirtualList in a withdrawn window: set_items plus a scroll sweep.
+    Returns None when customtkinter or a display isn't available.
+    """
+    if os.name != "nt" and not os.environ.get("DISPLAY"):
+        return None
+    try:
+        import customtkinter as ctk
+        from ui.virtual_list import VirtualList
+        root = ctk.CTk()
+    except Exception:
+        return None
+    root.withdraw()
+    row_height = 36
+    view = VirtualList(root, on_select=lambda app: None, on_action=lambda app: None, row_height=row_height)
+    view.pack(fill="both", expand=True)
+    view._on_configure(type("Event", (), {'height': VISIBLE_ROWS * row_height})())
+
+    def render(items):
+        view.set_items(items, keep_offset=False)
+        step = max(1, len(items) // 100)
+        for index in range(0, len(items), step):
+            view.scroll_to(index)
+        root.update_idletasks()
+
+    return Stage("render", lambda: list(apps), render)
+
+def measure(stage, repeat, memory):
+    timings = []
+    for _ in range(repeat):
+        inputs = stage.setup()
+        start = time.perf_counter()
+        stage.run(inputs)
+        timings.append(time.perf_counter() - start)
+    # The median shrugs off a run that got descheduled, in either direction
+    result = {'seconds': round(statistics.median(timings), 5)}
+
+    if memory:
+        # Separate pass: tracing slows allocation-heavy code down several times
+        inputs = stage.setup()
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            output = stage.run(inputs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del output
+        result['peak_kb'] = round((peak - baseline) / 1024)
+    return result
+
+def run_size(count, repeat, memory):
+    start = time.perf_counter()
+    backend, fs = build_environment(count)
+    generated = time.perf_counter() - start
+
+    apps = check_all(make_scanner(backend, fs), RegistryManager(backend=backend).get_installed_apps(incremental=False))
+    statuses = {}
+    for app in apps:
+        statuses[app['Status']] = statuses.get(app['Status'], 0) + 1
+    print(f"{count} entries (generated in {generated:.1f} s): "
+          + ", ".join(f"{n} {status}" for status, n in sorted(statuses.items())))
+
+    results = {}
+    for stage in build_stages(backend, fs, apps):
+        results[stage.name] = measure(stage, repeat, memory)
+    return results
+
+def compare(size, results, baseline, time_tolerance, memory_tolerance, time_floor=TIME_FLOOR_MS / 1000,
+            memory_floor=MEMORY_FLOOR_KB):
+    """
+    Prints one line per stage. Returns the list of regressions (as strings).
+    A stage regresses when it is over the tolerance and also over the baseline by more than the floor.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = (baseline or {}).get(name, {})
+        line = f"  {name:<14} {result['seconds'] * 1000:10.1f} ms"
+        if 'peak_kb' in result:
+            line += f" {result['peak_kb']:10} KiB"
+        notes = []
+        for field, tolerance, floor, unit in (('seconds', time_tolerance, time_floor, "time"),
+                                              ('peak_kb', memory_tolerance, memory_floor, "memory")):
+            if field not in result or not base.get(field):
+                continue
+            ratio = result[field] / base[field]
+            notes.append(f"{unit} {ratio:.2f}x")
+            if ratio > 1 + tolerance and result[field] - base[field] > floor:
+                regressions.append(f"{size}/{name}: {unit} {ratio:.2f}x baseline (tolerance {tolerance:.0%})")
+        if notes:
+            line += "   (" + ", ".join(notes) + ")"
+        print(line)
+    return regressions
+
+def load_baselines(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_baselines(path, baselines):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_scan", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated entry counts (default: %(default)s).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage; the median counts.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file (default: benchmarks/baselines.json).")
+    parser.add_argument("--no-baseline", action="store_true", help="Only print results, don't compare.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed slowdown, as a fraction (default: 0.5).")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Allowed memory growth (default: 0.2).")
+    parser.add_argument("--time-floor-ms", type=float, default=TIME_FLOOR_MS,
+                        help="Slowdowns smaller than this are never regressions (default: %(default)s).")
+    parser.add_argument("--memory-floor-kb", type=float, default=MEMORY_FLOOR_KB,
+                        help="Memory growth smaller than this is never a regression (default: %(default)s).")
+    parser.add_argument("--output", help="Also write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    baselines = {} if args.no_baseline else load_baselines(args.baseline)
+    print(f"Python {platform.python_version()} on {platform.system()} {platform.machine()}")
+
+    all_results = {}
+    regressions = []
+    for size in sizes:
+        results = run_size(size, max(1, args.repeat), not args.no_memory)
+        all_results[str(size)] = results
+        regressions += compare(size, results, baselines.get('sizes', {}).get(str(size)),
+                               args.time_tolerance, args.memory_tolerance,
+                               args.time_floor_ms / 1000, args.memory_floor_kb)
+
+    if args.output:
+        save_baselines(args.output, {'sizes': all_results})
+    if args.update_baseline:
+        stored = load_baselines(args.baseline)
+        stored.setdefault('sizes', {}).update(all_results)
+        stored['python'] = platform.python_version()
+        save_baselines(args.baseline, stored)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
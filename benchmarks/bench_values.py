@@ -0,0 +1,65 @@
+"""
+Microbenchmark: reading an uninstall key's fields with one QueryValueEx per field
+(the old approach, where every missing field raises FileNotFoundError) vs a single
+enum_value pass, against the in-memory registry backend.
+Both readers run as the scan calls them: the key is opened and its QueryInfoKey
+(needed for the last-write time anyway) is read first, and the single pass uses
+the value count from it.
+
+    python -m benchmarks.bench_values [keys]
+"""
+import sys
+import time
+
+from backend.app_record import REGISTRY_FIELDS
+from backend.registry_backend import MemoryBackend, HKEY_LOCAL_MACHINE, REG_DWORD
+from backend.registry_manager import RegistryManager
+
+UNINSTALL = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+
+def build_backend(count):
+    backend = MemoryBackend()
+    for i in range(count):
+        path = f"{UNINSTALL}\\App{i}"
+        # Typical key: about half of the wanted fields, plus values we don't read
+        backend.set_value(HKEY_LOCAL_MACHINE, path, 'DisplayName', f"App {i}")
+        backend.set_value(HKEY_LOCAL_MACHINE, path, 'DisplayVersion', "1.0")
+        backend.set_value(HKEY_LOCAL_MACHINE, path, 'UninstallString', f'"C:\\Apps\\App{i}\\uninst.exe"')
+        backend.set_value(HKEY_LOCAL_MACHINE, path, 'EstimatedSize', 1024 + i, REG_DWORD)
+        backend.set_value(HKEY_LOCAL_MACHINE, path, 'DisplayIcon', f"C:\\Apps\\App{i}\\app.ico")
+        backend.set_value(HKEY_LOCAL_MACHINE, path, 'NoModify', 1, REG_DWORD)
+    return backend
+
+def per_field(backend, key, num_values):
+    info = {}
+    for field in REGISTRY_FIELDS:
+        try:
+            value, _ = backend.query_value(key, field)
+            info[field] = value
+        except FileNotFoundError:
+            info[field] = None
+    return info
+
+def run(label, backend, keys, reader):
+    start = time.perf_counter()
+    for path in keys:
+        with backend.open_key(HKEY_LOCAL_MACHINE, path) as key:
+            _, num_values, _ = backend.query_info(key)
+            reader(key, num_values)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<12} {elapsed * 1000:8.1f} ms ({elapsed / len(keys) * 1e6:.2f} us/key)")
+    return elapsed
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 20000
+    backend = build_backend(count)
+    manager = RegistryManager(backend=backend)
+    keys = [f"{UNINSTALL}\\App{i}" for i in range(count)]
+
+    print(f"{count} keys")
+    old = run("per-field", backend, keys, lambda key, num_values: per_field(backend, key, num_values))
+    new = run("single-pass", backend, keys, manager._extract_app_info)
+    print(f"  speedup:     {old / new:.1f}x")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,141 @@
+"""
+Synthetic uninstall hives over a fake filesystem, for benchmarks.
+
+build_environment(count) returns a MemoryBackend holding `count` uninstall entries
+spread over the HKLM 64/32-bit and HKCU views, plus a FakeFileSystem that holds
+the files those entries point at, except the ones deliberately left missing.
+The mix is fixed per seed so runs (and baselines) are comparable.
+"""
+import random
+
+from backend.registry_backend import (
+    MemoryBackend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER, REG_SZ, REG_DWORD,
+)
+from backend.msi_index import pack_guid, MACHINE_PRODUCTS
+from backend.file_listing import FileListing
+
+UNINSTALL_64 = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+UNINSTALL_32 = r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
+UNINSTALL_USER = r"Software\Microsoft\Windows\CurrentVersion\Uninstall"
+INSTALLER_DIR = "C:\\Windows\\Installer"
+
+# (share of entries, kind); see _entry for what each kind looks like
+MIX = (
+    (0.35, "quoted"),        # "C:\...\uninstall.exe" + InstallLocation, present
+    (0.15, "unquoted"),      # C:\Program Files (x86)\...\unins000.exe /SILENT, present
+    (0.10, "msi"),           # MsiExec.exe /X{GUID}, product registered
+    (0.08, "msi_orphan"),    # MsiExec.exe /X{GUID}, unknown to Windows Installer
+    (0.20, "missing"),       # InstallLocation and uninstaller gone
+    (0.07, "other_drive"),   # D:\Games\..., present or gone
+    (0.05, "no_paths"),      # Neither value set
+)
+
+PUBLISHERS = (
+    "Adobe Inc.", "Microsoft Corporation", "Google LLC", "Mozilla", "Oracle Corporation",
+    "JetBrains s.r.o.", "Valve", "NVIDIA Corporation", "Intel Corporation", "The Document Foundation",
+    "Python Software Foundation", "7-Zip", "VideoLAN", "Zoom Video Communications", "Dell Inc.",
+)
+WORDS = (
+    "Studio", "Player", "Tools", "Runtime", "Driver", "Update", "Helper", "Suite",
+    "Editor", "Viewer", "Agent", "Service", "SDK", "Redistributable", "Toolkit",
+)
+
+class FakeFileSystem(FileListing):
+    """
+    FileListing that also counts filesystem calls, built by add_file/add_dir.
+    """
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def scandir(self, path):
+        self.calls += 1
+        return super().scandir(path)
+
+    def exists(self, path):
+        self.calls += 1
+        return super().exists(path)
+
+def _pick_kind(rng):
+    roll = rng.random()
+    for share, kind in MIX:
+        if roll < share:
+            return kind
+        roll -= share
+    return MIX[-1][1]
+
+def _guid(rng):
+    h = f"{rng.getrandbits(128):032X}"
+    return f"{{{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}}}"
+
+def _entry(i, rng, fs, backend):
+    """
+    Returns (key name, values) for entry i, adding whatever files should exist to fs.
+    """
+    publisher = PUBLISHERS[rng.randrange(len(PUBLISHERS))]
+    name = f"{publisher.split()[0]} {WORDS[rng.randrange(len(WORDS))]} {i}"
+    folder = f"{publisher.split()[0]}\\{name}"
+    values = {
+        'DisplayName': name,
+        'DisplayVersion': f"{rng.randrange(1, 30)}.{rng.randrange(10)}.{rng.randrange(1000)}",
+        'Publisher': publisher,
+        'EstimatedSize': rng.randrange(100, 4000000),
+        'InstallDate': f"20{rng.randrange(15, 27)}{rng.randrange(1, 13):02d}{rng.randrange(1, 29):02d}",
+    }
+    key_name = name
+    kind = _pick_kind(rng)
+
+    if kind == "quoted":
+        location = f"C:\\Program Files\\{folder}"
+        values['InstallLocation'] = location
+        values['UninstallString'] = f'"{location}\\uninstall.exe"'
+        fs.add_file(f"{location}\\uninstall.exe")
+    elif kind == "unquoted":
+        location = f"C:\\Program Files (x86)\\{folder}"
+        values['UninstallString'] = f"{location}\\unins000.exe /SILENT"
+        fs.add_file(f"{location}\\unins000.exe")
+    elif kind in ("msi", "msi_orphan"):
+        guid = _guid(rng)
+        key_name = guid
+        values['UninstallString'] = f"MsiExec.exe /X{guid}"
+        values['WindowsInstaller'] = 1
+        if kind == "msi":
+            backend.set_value(HKEY_LOCAL_MACHINE, f"{MACHINE_PRODUCTS}\\{pack_guid(guid)}", "ProductName", name)
+            fs.add_dir(f"{INSTALLER_DIR}\\{guid}")
+    elif kind == "missing":
+        location = f"C:\\Program Files\\{folder}"
+        values['InstallLocation'] = location
+        values['UninstallString'] = f'"{location}\\uninstall.exe" /remove'
+        # The vendor folder often survives the app
+        fs.add_dir(f"C:\\Program Files\\{publisher.split()[0]}")
+    elif kind == "other_drive":
+        location = f"D:\\Games\\{name}"
+        values['InstallLocation'] = location
+        values['UninstallString'] = f'"{location}\\uninst.exe"'
+        if rng.random() < 0.5:
+            fs.add_file(f"{location}\\uninst.exe")
+    return key_name, values
+
+def build_environment(count, seed=1):
+    """
+    Returns (backend, fs). About 70% of the entries go to the 64-bit view,
+    20% to WOW6432Node and 10% to HKCU, like a typical workstation.
+    """
+    rng = random.Random(seed)
+    backend = MemoryBackend()
+    fs = FakeFileSystem()
+    fs.add_dir(INSTALLER_DIR)
+    for i in range(count):
+        key_name, values = _entry(i, rng, fs, backend)
+        roll = rng.random()
+        if roll < 0.7:
+            root, parent = HKEY_LOCAL_MACHINE, UNINSTALL_64
+        elif roll < 0.9:
+            root, parent = HKEY_LOCAL_MACHINE, UNINSTALL_32
+        else:
+            root, parent = HKEY_CURRENT_USER, UNINSTALL_USER
+        key = backend.create_key(root, f"{parent}\\{key_name}")
+        for value_name, data in values.items():
+            value_type = REG_DWORD if isinstance(data, int) else REG_SZ
+            backend.set_key_value(key, value_name, data, value_type)
+    return backend, fs
@@ -0,0 +1,298 @@
+"""
+Fleet scan: checks the uninstall entries of many machines from collected dumps,
+one worker process per host at a time, and aggregates the results.
+
+    python main.py --fleet DUMP_DIR [--workers N] [--report report.json] [--top 20]
+
+DUMP_DIR holds one entry per host:
+    HOST.reg             a `reg export` of the host's uninstall keys
+    HOST/                .reg exports and/or hive files (SOFTWARE, NTUSER.DAT) of the host
+    HOST.files.txt       optional listing of the host's files (`dir /s /b C:\\ D:\\`),
+    HOST/files.txt       so paths can be checked offline
+Entries on drives the listing doesn't cover (all of them, without a listing) are
+reported Unreachable; MsiExec entries are still checked against the Installer keys.
+
+One NDJSON line is printed per host as it finishes, then a fleet summary line.
+Exit codes: 0 = no ghosts, 1 = no host could be scanned, 2 = ghosts found.
+"""
+import os
+import sys
+import json
+import heapq
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from headless import EXIT_OK, EXIT_ERROR, EXIT_GHOSTS, emit, offline_scanner
+
+LISTING_SUFFIX = ".files.txt"
+LISTING_NAME = "files.txt"
+HIVE_SIGNATURE = b"regf"
+
+# Checked apps per check_many call, as in the headless scan
+BATCH_SIZE = 256
+
+# Hosts queued per worker; keeps the parent's memory flat however many dumps there are
+QUEUED_PER_WORKER = 2
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py --fleet",
+        description="Scan a directory of per-host registry dumps and aggregate the ghost entries.",
+    )
+    parser.add_argument("--fleet", metavar="DUMP_DIR", required=True, help="Directory with one dump per host.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: one per CPU).")
+    parser.add_argument("--report", metavar="PATH", help="Write the full aggregated report as JSON.")
+    parser.add_argument("--top", type=int, default=20, help="Apps and publishers listed in the summary (default: 20).")
+    parser.add_argument("--verbose", action="store_true", help="Log progress to stderr.")
+    return parser
+
+def is_hive(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(4) == HIVE_SIGNATURE
+    except OSError:
+        return False
+
+def discover_hosts(dump_dir):
+    """
+    Yields (host, dump files, listing path or None), sorted by host name.
+    """
+    for name in sorted(os.listdir(dump_dir)):
+        path = os.path.join(dump_dir, name)
+        if os.path.isdir(path):
+            sources = sorted(
+                os.path.join(path, f) for f in os.listdir(path)
+                if f.lower().endswith(".reg") or is_hive(os.path.join(path, f))
+            )
+            listing = os.path.join(path, LISTING_NAME)
+            if sources:
+                yield name, sources, listing if os.path.isfile(listing) else None
+        elif name.lower().endswith(".reg"):
+            host = name[:-len(".reg")]
+            listing = os.path.join(dump_dir, host + LISTING_SUFFIX)
+            yield host, [path], listing if os.path.isfile(listing) else None
+
+def _wanted_prefixes(reg_mgr):
+    """
+    (root, lowercased path) of every subtree a scan reads: the uninstall views and the Installer keys.
+    """
+    from backend.msi_index import MACHINE_PRODUCTS, USER_PRODUCTS, USER_DATA
+    from backend.registry_backend import HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER
+    prefixes = [(root, path.lower()) for root, path, _ in reg_mgr.registry_paths]
+    prefixes += [
+        (HKEY_LOCAL_MACHINE, MACHINE_PRODUCTS.lower()),
+        (HKEY_CURRENT_USER, USER_PRODUCTS.lower()),
+        (HKEY_LOCAL_MACHINE, USER_DATA.lower()),
+    ]
+    return prefixes
+
+def load_reg_exports(backend, paths, prefixes):
+    """
+    Streams .reg files into backend, keeping only keys under prefixes,
+    so a full-registry export costs no more memory than an uninstall-only one.
+    """
+    from backend.reg_file import iter_reg_operations, apply_operations
+
+    def wanted(op):
+        path = op.path.lower()
+        return any(op.root == root and (path == prefix or path.startswith(prefix + "\\")) for root, prefix in prefixes)
+
+    for path in paths:
+        apply_operations(backend, (op for op in iter_reg_operations(path) if wanted(op)))
+
+def _has_key(backend, root, path):
+    try:
+        with backend.open_key(root, path):
+            return True
+    except OSError:
+        return False
+
+def scan_host(host, sources, listing_path):
+    """
+    Worker: scans one host's dumps. Returns a compact, picklable result dict.
+    """
+    from backend.registry_manager import RegistryManager
+    from backend.registry_backend import MemoryBackend
+
+    hive_backend = None
+    try:
+        # A host's hive files, when present, are its complete registry; .reg files next to them are ignored
+        hives = [path for path in sources if is_hive(path)]
+        if hives:
+            from backend.hive_reader import HiveBackend
+            hive_backend = HiveBackend(*hives)
+            # One thread per host: the dumps are in memory, and the hosts already run in parallel
+            reg_mgr = RegistryManager(backend=hive_backend, max_workers=1)
+        else:
+            reg_mgr = RegistryManager(backend=MemoryBackend(), max_workers=1)
+            load_reg_exports(reg_mgr.backend, sources, _wanted_prefixes(reg_mgr))
+        if not any(_has_key(reg_mgr.backend, root, path) for root, path, _ in reg_mgr.registry_paths):
+            return {'host': host, 'error': "No uninstall keys in the dump"}
+        apps = reg_mgr.get_installed_apps(incremental=False)
+
+        scanner = offline_scanner(reg_mgr.backend, listing_path, apps, max_workers=1)
+        scanner.begin_scan()
+        statuses = []
+        for start in range(0, len(apps), BATCH_SIZE):
+            batch = apps[start:start + BATCH_SIZE]
+            statuses.extend(status for status, _ in scanner.check_many(batch))
+    except (OSError, ValueError) as e:
+        return {'host': host, 'error': str(e)}
+    finally:
+        if hive_backend is not None:
+            hive_backend.close()
+
+    return {
+        'host': host,
+        'listing': listing_path is not None,
+        # (name, publisher, status) only: what the aggregation needs
+        'apps': [
+            (app.get('DisplayName'), app.get('Publisher'), status)
+            for app, status in zip(apps, statuses)
+        ],
+    }
+
+class FleetReport:
+    """
+    Running aggregation of host results.
+    """
+    def __init__(self):
+        self.hosts = []
+        self.apps = {}        # (name, publisher) -> [entries, ghost entries] over all hosts
+        self.publishers = {}  # publisher -> ghost entries
+        self.totals = {}      # status -> entries
+
+    def add(self, result):
+        """
+        Folds one host result in and returns its summary line.
+        """
+        if 'error' in result:
+            summary = {'type': 'host', 'host': result['host'], 'error': result['error']}
+            self.hosts.append(summary)
+            return summary
+
+        counts = {}
+        for name, publisher, status in result['apps']:
+            counts[status] = counts.get(status, 0) + 1
+            entry = self.apps.get((name, publisher))
+            if entry is None:
+                entry = self.apps[(name, publisher)] = [0, 0]
+            entry[0] += 1
+            if status == "Ghost":
+                entry[1] += 1
+                publisher = publisher or "(no publisher)"
+                self.publishers[publisher] = self.publishers.get(publisher, 0) + 1
+        for status, n in counts.items():
+            self.totals[status] = self.totals.get(status, 0) + n
+
+        summary = {
+            'type': 'host',
+            'host': result['host'],
+            'total': len(result['apps']),
+            'ghosts': counts.get("Ghost", 0),
+            'unreachable': counts.get("Unreachable", 0),
+            'statuses': dict(sorted(counts.items())),
+            'listing': result['listing'],
+        }
+        self.hosts.append(summary)
+        return summary
+
+    def top_apps(self, n=None):
+        rows = (
+            {'name': name, 'publisher': publisher, 'ghosts': ghosts, 'entries': entries}
+            for (name, publisher), (entries, ghosts) in self.apps.items() if ghosts
+        )
+        key = lambda row: (row['ghosts'], row['entries'])
+        return heapq.nlargest(n, rows, key=key) if n is not None else sorted(rows, key=key, reverse=True)
+
+    def top_publishers(self, n=None):
+        rows = ({'publisher': publisher, 'ghosts': count} for publisher, count in self.publishers.items())
+        key = lambda row: row['ghosts']
+        return heapq.nlargest(n, rows, key=key) if n is not None else sorted(rows, key=key, reverse=True)
+
+    def summary(self, top):
+        scanned = [h for h in self.hosts if 'error' not in h]
+        return {
+            'type': 'fleet_summary',
+            'hosts': len(scanned),
+            'failed_hosts': len(self.hosts) - len(scanned),
+            'hosts_with_ghosts': sum(1 for h in scanned if h['ghosts']),
+            'entries': sum(self.totals.values()),
+            'statuses': dict(sorted(self.totals.items())),
+            'top_apps': self.top_apps(top),
+            'top_publishers': self.top_publishers(top),
+        }
+
+    def to_dict(self, top):
+        data = self.summary(top)
+        data['type'] = 'fleet_report'
+        data['top_apps'] = self.top_apps()
+        data['top_publishers'] = self.top_publishers()
+        data['host_results'] = sorted(self.hosts, key=lambda h: h['host'])
+        return data
+
+def run(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    out = out or sys.stdout
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr,
+    )
+    logger = logging.getLogger(__name__)
+
+    if not os.path.isdir(args.fleet):
+        logger.error(f"Not a directory: {args.fleet}")
+        return EXIT_ERROR
+
+    workers = args.workers or os.cpu_count() or 1
+    report = FleetReport()
+    hosts = discover_hosts(args.fleet)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}  # future -> host name
+            exhausted = False
+            while pending or not exhausted:
+                # Keep a bounded number of hosts queued instead of submitting the whole directory
+                while not exhausted and len(pending) < workers * QUEUED_PER_WORKER:
+                    host = next(hosts, None)
+                    if host is None:
+                        exhausted = True
+                    else:
+                        pending[pool.submit(scan_host, *host)] = host[0]
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # A malformed dump (or a crashed worker) fails its host, not the whole run
+                        logger.warning(f"Scanning {host} failed: {e!r}")
+                        result = {'host': host, 'error': f"{type(e).__name__}: {e}"}
+                    emit(report.add(result), out)
+                out.flush()
+    except BrokenPipeError:
+        return EXIT_OK
+
+    summary = report.summary(args.top)
+    emit(summary, out)
+    out.flush()
+    if args.report:
+        tmp_path = args.report + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(args.top), f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, args.report)
+        logger.info(f"Report written to {args.report}")
+
+    if not summary['hosts']:
+        logger.error("No host could be scanned")
+        return EXIT_ERROR
+    return EXIT_GHOSTS if summary['hosts_with_ghosts'] else EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,257 @@
+"""
+Headless scan: no window, no UI imports. One JSON object per app is written to
+stdout as soon as it has been checked, followed by a summary line.
+
+    python main.py --headless [--ghosts-only] [--purge --yes]
+
+Exit codes: 0 = no ghosts (or all of them purged), 1 = error, 2 = ghosts found.
+"""
+import sys
+import json
+import logging
+import argparse
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_GHOSTS = 2
+
+# Checked apps are emitted in batches: small at first so output starts at once,
+# then larger so the scanner's thread pool stays busy
+FIRST_BATCH = 8
+MAX_BATCH = 256
+
+# Where another machine's Windows Installer cache is assumed to be
+OFFLINE_INSTALLER_DIR = "C:\\Windows\\Installer"
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py --headless",
+        description="Scan uninstall entries for invalid paths and print the results as NDJSON.",
+    )
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--ghosts-only", action="store_true", help="Only print entries whose paths are gone.")
+    parser.add_argument("--purge", action="store_true", help="Back up and delete every ghost entry found.")
+    parser.add_argument("--yes", action="store_true", help="Confirm --purge (required, there is no prompt).")
+    parser.add_argument("--backup-dir", default="backups", help="Where --purge writes its backup (default: backups).")
+    parser.add_argument("--backup-storage", choices=("reg", "blob"), default="reg",
+                        help="Backup format: plain .reg files or compressed, deduplicated blobs.")
+    parser.add_argument("--path-timeout", type=float, default=None, metavar="SECONDS",
+                        help="Deadline per filesystem check; entries on volumes that run over are 'Unreachable'.")
+    parser.add_argument("--registry-workers", type=int, default=None, metavar="N",
+                        help="Threads enumerating the uninstall keys (default: 4 for the live registry, 1 for files).")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--reg-file", action="append", metavar="PATH",
+                        help="Scan a .reg export instead of the live registry (repeatable).")
+    source.add_argument("--hive", action="append", metavar="PATH",
+                        help="Scan an offline SOFTWARE or NTUSER.DAT hive file, read-only (repeatable).")
+    parser.add_argument("--files", metavar="PATH",
+                        help="Listing of the offline machine's files (`dir /s /b C:\\ D:\\`) to check --reg-file/--hive "
+                             "entries against. Without it their paths are reported 'Unreachable'.")
+    parser.add_argument("--verbose", action="store_true", help="Log progress to stderr.")
+    return parser
+
+def offline_scanner(backend, listing_path=None, apps=None, max_workers=16):
+    """
+    AppScanner for another machine's registry (.reg exports or hive files): paths are
+    checked against that machine's file listing, never against the local disk.
+    Entries on drives the listing doesn't cover (all of them, without a listing) are
+    Unreachable; MsiExec entries are still checked against the dump's Installer keys.
+    apps: When given, only the listing entries needed to check them are kept (see AppScanner.directories_for).
+    """
+    from backend.scanner import AppScanner
+    from backend.stat_cache import StatCache
+    from backend.msi_index import MsiIndex
+    from backend.file_listing import FileListing
+
+    listing = FileListing()
+    stat_cache = StatCache(scandir=listing.scandir, exists=listing.exists)
+    scanner = AppScanner(
+        stat_cache=stat_cache, max_workers=max_workers,
+        msi_index=MsiIndex(backend, stat_cache, installer_dir=OFFLINE_INSTALLER_DIR),
+    )
+    if listing_path:
+        directories = None
+        if apps is not None:
+            directories = scanner.directories_for(apps) | {OFFLINE_INSTALLER_DIR.lower()}
+        listing.read(listing_path, directories)
+    return scanner
+
+def app_to_json(app):
+    return {
+        'type': 'app',
+        'unique_id': app.unique_id,
+        'root': app.root_key,
+        'registry_path': app.registry_path,
+        'name': app.get('DisplayName'),
+        'publisher': app.get('Publisher'),
+        'version': app.get('DisplayVersion'),
+        'status': app.get('Status'),
+        'reason': app.get('Reason'),
+        'locations': [{'root': location.root_key, 'path': location.registry_path} for location in app.locations],
+    }
+
+def emit(obj, out):
+    out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+def scan(reg_mgr, scanner, ghosts_only, out):
+    """
+    Streams checked apps to out. Returns (apps scanned, ghost records, unreachable count).
+    """
+    ghosts = []
+    total = 0
+    unreachable = 0
+
+    def flush(batch):
+        # Entries reused from the registry snapshot may already carry their result
+        pending = [app for app in batch if 'Status' not in app]
+        for app, (status, reason) in zip(pending, scanner.check_many(pending)):
+            app['Status'] = status
+            app['Reason'] = reason
+        nonlocal unreachable
+        for app in batch:
+            if app.get('Status') == "Unreachable":
+                unreachable += 1
+            is_ghost = app.get('Status') == "Ghost"
+            if is_ghost:
+                ghosts.append(app)
+            if is_ghost or not ghosts_only:
+                emit(app_to_json(app), out)
+        # Downstream consumers see each batch right away, not when the buffer fills
+        out.flush()
+
+    scanner.begin_scan()
+    batch_size = FIRST_BATCH
+    batch = []
+    for app in reg_mgr.iter_installed_apps():
+        total += 1
+        batch.append(app)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+            batch_size = min(batch_size * 2, MAX_BATCH)
+    if batch:
+        flush(batch)
+    return total, ghosts, unreachable
+
+def purge(reg_mgr, backup_mgr, ghosts, out):
+    """
+    Backs up all ghosts into one file, then deletes them, each from every place it is
+    registered (see AppRecord.locations). On the first failed deletion the whole batch
+    is restored from that backup, like the UI does.
+    Returns (purged apps, backup file, error or None).
+    """
+    logger = logging.getLogger(__name__)
+    keys = [(a['root_key'], a['registry_path']) for app in ghosts for a in app.locations]
+    try:
+        backup_file = backup_mgr.backup_registry_keys(keys, f"Batch purge {len(ghosts)} apps")
+    except Exception as e:
+        return [], None, f"Backup failed: {e}"
+
+    for app in ghosts:
+        try:
+            for location in app.locations:
+                reg_mgr.delete_registry_key(location['root_key'], location['registry_path'], location['wow64_flag'])
+        except Exception as e:
+            error = f"Deleting '{app.get('DisplayName')}' failed: {e}"
+            try:
+                backup_mgr.restore_backup(backup_file)
+                error += "; all entries of this batch were restored from the backup"
+            except Exception as restore_error:
+                error += f"; rollback failed: {restore_error} (backup file: {backup_file})"
+            logger.error(error)
+            return [], backup_file, error
+
+    for app in ghosts:
+        for location in app.locations:
+            emit({'type': 'purged', 'unique_id': location.unique_id, 'backup': backup_file}, out)
+    out.flush()
+    return ghosts, backup_file, None
+
+def run(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    out = out or sys.stdout
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr,
+    )
+    logger = logging.getLogger(__name__)
+
+    if args.purge and not args.yes:
+        logger.error("--purge deletes registry keys; pass --yes to confirm")
+        return EXIT_ERROR
+    if args.purge and args.hive:
+        logger.error("--purge can't be used with --hive: hive files are opened read-only")
+        return EXIT_ERROR
+    if args.purge and args.reg_file:
+        logger.error("--purge can't be used with --reg-file: the export is only loaded into memory, nothing would be deleted")
+        return EXIT_ERROR
+    offline = bool(args.reg_file or args.hive)
+    if args.files and not offline:
+        logger.error("--files lists another machine's files; use it with --reg-file or --hive")
+        return EXIT_ERROR
+
+    # Backend modules only; nothing here pulls in customtkinter or Pillow
+    from backend.registry_manager import RegistryManager
+    from backend.scanner import AppScanner
+
+    try:
+        backend = None
+        if args.reg_file:
+            from backend.registry_backend import RegFileBackend
+            backend = RegFileBackend(*args.reg_file)
+        elif args.hive:
+            from backend.hive_reader import HiveBackend
+            backend = HiveBackend(*args.hive)
+        registry_options = {}
+        if args.registry_workers is not None:
+            registry_options['max_workers'] = max(1, args.registry_workers)
+        reg_mgr = RegistryManager(backend=backend, **registry_options)
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot open the registry: {e}")
+        return EXIT_ERROR
+
+    if offline:
+        # The dump's paths belong to its machine; the local disk says nothing about them
+        try:
+            scanner = offline_scanner(reg_mgr.backend, args.files)
+        except OSError as e:
+            logger.error(f"Cannot read the file listing: {e}")
+            return EXIT_ERROR
+    else:
+        scanner_options = {}
+        if args.path_timeout is not None:
+            scanner_options['path_timeout'] = args.path_timeout
+        scanner = AppScanner(registry_backend=reg_mgr.backend, **scanner_options)
+    try:
+        total, ghosts, unreachable = scan(reg_mgr, scanner, args.ghosts_only, out)
+    except BrokenPipeError:
+        # The consumer (e.g. head) stopped reading; not our error
+        return EXIT_OK
+
+    summary = {'type': 'summary', 'total': total, 'ghosts': len(ghosts), 'unreachable': unreachable, 'purged': 0}
+    exit_code = EXIT_GHOSTS if ghosts else EXIT_OK
+
+    if args.purge and ghosts:
+        from backend.backup_manager import BackupManager
+        try:
+            backup_mgr = BackupManager(args.backup_dir, backend=reg_mgr.backend, storage=args.backup_storage)
+        except OSError as e:
+            logger.error(f"Cannot use backup directory {args.backup_dir}: {e}")
+            return EXIT_ERROR
+        purged, backup_file, error = purge(reg_mgr, backup_mgr, ghosts, out)
+        summary['purged'] = len(purged)
+        summary['backup'] = backup_file
+        if error:
+            summary['error'] = error
+            exit_code = EXIT_ERROR
+        else:
+            exit_code = EXIT_OK
+
+    emit(summary, out)
+    out.flush()
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -1,9 +1,13 @@
+import time
+# Taken before anything else is imported, for the time-to-first-row measurement
+STARTED_AT = time.perf_counter()
+
 import sys
 import ctypes
 import logging
+import argparse
 import subprocess
 import os
-from ui.app_window import AppWindow
 
 def is_admin():
     try:
@@ -35,7 +39,47 @@ def run_as_admin():
         print(f"Failed to launch admin process: {e}")
         return False
 
+def parse_profile_options(argv):
+    """
+    Takes the profiling options out of argv; the rest is left for the headless parser.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--profile", metavar="TRACE.json",
+                        help="Write counters, phase timings and a Chrome trace to this file on exit.")
+    parser.add_argument("--cprofile", metavar="STATS.prof",
+                        help="Also run the main thread under cProfile and dump pstats here.")
+    return parser.parse_known_args(argv)
+
 def main():
+    options, argv = parse_profile_options(sys.argv[1:])
+
+    profiler = None
+    if options.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        code = run(argv)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(options.cprofile)
+        if options.profile:
+            from backend.metrics import METRICS
+            METRICS.write_trace(options.profile)
+            print(f"Profile written to {options.profile}", file=sys.stderr)
+    sys.exit(code)
+
+def run(argv):
+    if "--headless" in argv:
+        # Scheduled tasks / pipelines: no window, no prompts, no UI imports
+        import headless
+        return headless.run(argv)
+    if "--fleet" in argv:
+        # Batch analysis of dumps collected from other machines
+        import fleet
+        return fleet.run(argv)
+
     # Configure logging
     logging.basicConfig(
         level=logging.INFO,
@@ -65,14 +109,18 @@ def main():
         if response == 6: # IDYES
             logger.info("User requested elevation.")
             if run_as_admin():
-                sys.exit() # Exit this instance, assuming the new one started
+                return 0 # Exit this instance, assuming the new one started
             else:
                 logger.error("Elevation failed. Continuing in limited mode.")
                 ctypes.windll.user32.MessageBoxW(None, "Failed to restart as Admin. Opening in Limited Mode.", "Error", 0)
 
+    # Imported here so the headless mode never loads customtkinter / Pillow
+    from ui.app_window import AppWindow
+
     logger.info(f"Starting AppWindow (Admin: {admin_status})...")
-    app = AppWindow(is_admin=admin_status)
+    app = AppWindow(is_admin=admin_status, started_at=STARTED_AT)
     app.mainloop()
+    return 0
 
 if __name__ == "__main__":
     main()
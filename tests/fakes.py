@@ -0,0 +1,57 @@
+"""
+Fake filesystem and registry helpers shared by the tests.
+"""
+import ntpath
+
+from backend.app_record import AppRecord
+from backend.file_listing import FileListing
+from backend.registry_backend import KEY_WOW64_64KEY
+
+UNINSTALL_64 = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+
+class FakeTree(FileListing):
+    """
+    FileListing built from a list of files that counts listings and direct checks.
+    denied: Directories whose listing fails with PermissionError, like ACL-protected folders.
+    aliases: Extra paths (e.g. 8.3 short names) that only a direct check resolves.
+    """
+    def __init__(self, files=(), dirs=(), denied=(), aliases=()):
+        super().__init__()
+        for path in files:
+            self.add_file(path)
+        for path in dirs:
+            self.add_dir(path)
+        self.denied = {ntpath.normcase(path) for path in denied}
+        self.aliases = {ntpath.normcase(path) for path in aliases}
+        self.listed = []
+        self.checked = []
+
+    def scandir(self, path):
+        self.listed.append(path)
+        if ntpath.normcase(path) in self.denied:
+            raise PermissionError(path)
+        return super().scandir(path)
+
+    def exists(self, path):
+        self.checked.append(path)
+        return ntpath.normcase(path) in self.aliases or super().exists(path)
+
+def dump_tree(backend, root, path):
+    """
+    Returns {key path: {value name: (data, type)}} for path and its subkeys.
+    """
+    with backend.open_key(root, path) as key:
+        num_subkeys, num_values, _ = backend.query_info(key)
+        values = {}
+        for i in range(num_values):
+            name, data, value_type = backend.enum_value(key, i)
+            values[name] = (data, value_type)
+        subkeys = [backend.enum_key(key, i) for i in range(num_subkeys)]
+    tree = {path: values}
+    for subkey in subkeys:
+        tree.update(dump_tree(backend, root, f"{path}\\{subkey}"))
+    return tree
+
+def make_app(key_name, parent_path=UNINSTALL_64, **values):
+    values.setdefault('DisplayName', key_name)
+    return AppRecord(values, parent_path, "HKLM", key_name, KEY_WOW64_64KEY)
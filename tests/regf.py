@@ -0,0 +1,139 @@
+"""
+Writes small regf hive files for the hive reader tests, and loads the same
+content into a MemoryBackend to compare against.
+"""
+import struct
+
+from backend.registry_backend import REG_SZ
+from backend.reg_file import encode_value_data
+from backend.hive_reader import HBIN_START, NO_CELL, BIG_DATA_SEGMENT, DATA_IN_OFFSET, KEY_COMP_NAME, VALUE_COMP_NAME
+
+_NK = struct.Struct("<2sHQIIIIIIII7IHH")
+_VK = struct.Struct("<2sHIIIH2x")
+
+class Key:
+    """
+    A key to write: values are (name, data, type) tuples in order.
+    list_kind: How the subkey list is stored: "lf", "lh", "li", or "ri" (an index of two lh lists).
+    """
+    def __init__(self, name, values=(), subkeys=(), list_kind="lh"):
+        self.name = name
+        self.values = list(values)
+        self.subkeys = list(subkeys)
+        self.list_kind = list_kind
+
+    def to_memory(self, backend, root, path):
+        """
+        Creates this key's subkeys and values (not the key itself) under path.
+        """
+        key = backend.create_key(root, path)
+        for name, data, value_type in self.values:
+            backend.set_key_value(key, name, data, value_type)
+        for subkey in self.subkeys:
+            subkey.to_memory(backend, root, f"{path}\\{subkey.name}" if path else subkey.name)
+
+def _encode_name(name):
+    """
+    Returns (bytes, compressed): Latin-1 when possible, like Windows does, else UTF-16 LE.
+    """
+    try:
+        return name.encode("latin-1"), True
+    except UnicodeEncodeError:
+        return name.encode("utf-16-le"), False
+
+def _lh_hash(name):
+    value = 0
+    for char in name.upper():
+        value = (value * 37 + ord(char)) & 0xFFFFFFFF
+    return value
+
+class _Writer:
+    def __init__(self):
+        self.bin = bytearray(32)  # hbin header, filled in by finish()
+        self.clock = 0x01D9000000000000
+
+    def alloc(self, data):
+        offset = len(self.bin)
+        size = (4 + len(data) + 7) & ~7
+        self.bin += struct.pack("<i", -size) + data + bytes(size - 4 - len(data))
+        return offset
+
+    def subkey_list(self, kind, children):
+        if kind == "ri":
+            half = len(children) // 2
+            lists = [self.subkey_list("lh", part) for part in (children[:half], children[half:])]
+            return self.alloc(b"ri" + struct.pack(f"<H{len(lists)}I", len(lists), *lists))
+        if kind == "li":
+            return self.alloc(b"li" + struct.pack(f"<H{len(children)}I", len(children), *(o for o, _ in children)))
+        pairs = []
+        for offset, name in children:
+            if kind == "lh":
+                hint = _lh_hash(name)
+            else:
+                hint = struct.unpack("<I", name.encode("latin-1", "replace")[:4].ljust(4, b"\0"))[0]
+            pairs += [offset, hint]
+        return self.alloc(kind.encode() + struct.pack(f"<H{len(pairs)}I", len(children), *pairs))
+
+    def value(self, name, data, value_type):
+        raw = encode_value_data(data, value_type)
+        if len(raw) <= 4:
+            data_size = len(raw) | DATA_IN_OFFSET
+            data_offset = struct.unpack("<I", raw.ljust(4, b"\0"))[0]
+        elif len(raw) > BIG_DATA_SEGMENT:
+            segments = [self.alloc(raw[i:i + BIG_DATA_SEGMENT]) for i in range(0, len(raw), BIG_DATA_SEGMENT)]
+            segment_list = self.alloc(struct.pack(f"<{len(segments)}I", *segments))
+            data_size = len(raw)
+            data_offset = self.alloc(b"db" + struct.pack("<HI", len(segments), segment_list))
+        else:
+            data_size = len(raw)
+            data_offset = self.alloc(raw)
+        name_bytes, compressed = _encode_name(name)
+        flags = VALUE_COMP_NAME if compressed else 0
+        return self.alloc(_VK.pack(b"vk", len(name_bytes), data_size, data_offset, value_type, flags) + name_bytes)
+
+    def key(self, key):
+        children = [(self.key(subkey), subkey.name) for subkey in key.subkeys]
+        list_offset = self.subkey_list(key.list_kind, children) if children else NO_CELL
+        values = [self.value(*value) for value in key.values]
+        value_list = self.alloc(struct.pack(f"<{len(values)}I", *values)) if values else NO_CELL
+        name_bytes, compressed = _encode_name(key.name)
+        self.clock += 1
+        nk = _NK.pack(
+            b"nk", KEY_COMP_NAME if compressed else 0, self.clock, 0, 0,
+            len(children), 0, list_offset, NO_CELL, len(values), value_list,
+            NO_CELL, NO_CELL, 0, 0, 0, 0, 0, len(name_bytes), 0,
+        )
+        return self.alloc(nk + name_bytes)
+
+    def finish(self, root_offset):
+        self.bin += bytes(-len(self.bin) % 4096)
+        self.bin[:12] = b"hbin" + struct.pack("<II", 0, len(self.bin))
+        base = bytearray(HBIN_START)
+        base[:12] = b"regf" + struct.pack("<II", 1, 1)
+        base[0x14:0x2C] = struct.pack("<IIIIII", 1, 5, 0, 1, root_offset, len(self.bin))
+        return bytes(base) + bytes(self.bin)
+
+def write_hive(path, root):
+    """
+    Writes root (a Key, e.g. "ROOT" holding Microsoft, WOW6432Node...) as a hive file.
+    """
+    writer = _Writer()
+    data = writer.finish(writer.key(root))
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def uninstall_entry(name, **values):
+    """
+    An uninstall subkey with REG_SZ values (DisplayName defaults to name).
+    """
+    values.setdefault('DisplayName', name)
+    return Key(name, [(value_name, data, REG_SZ) for value_name, data in values.items()])
+
+def uninstall_path(entries, list_kind):
+    """
+    Microsoft\\Windows\\CurrentVersion\\Uninstall holding entries, as found under SOFTWARE.
+    """
+    return Key("Microsoft", subkeys=[Key("Windows", subkeys=[Key("CurrentVersion", subkeys=[
+        Key("Uninstall", subkeys=entries, list_kind=list_kind),
+    ])])])
@@ -0,0 +1,57 @@
+from backend.app_identity import identity_of, group_locations
+from backend.app_record import AppRecord
+from backend.registry_backend import KEY_WOW64_32KEY
+from tests.fakes import UNINSTALL_64, make_app
+
+UNINSTALL_32 = r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
+UNINSTALL_USER = r"Software\Microsoft\Windows\CurrentVersion\Uninstall"
+
+VALUES = {'DisplayName': "Tool", 'DisplayVersion': "1.0", 'InstallLocation': r"C:\Tool",
+          'UninstallString': r"C:\Tool\uninstall.exe"}
+
+def user_app(key_name, **values):
+    return AppRecord(values, UNINSTALL_USER, "HKCU", key_name, 0)
+
+def test_identity_ignores_location_and_path_case():
+    native = make_app("Tool", **VALUES)
+    wow = make_app("TOOL", UNINSTALL_32, **dict(VALUES, InstallLocation=r"c:\tool"))
+    wow.wow64_flag = KEY_WOW64_32KEY
+
+    assert identity_of(native) == identity_of(wow) == identity_of(user_app("tool", **VALUES))
+
+def test_identity_tells_versions_and_paths_apart():
+    base = identity_of(make_app("Tool", **VALUES))
+
+    assert identity_of(make_app("Tool", **dict(VALUES, DisplayVersion="2.0"))) != base
+    assert identity_of(make_app("Tool", **dict(VALUES, InstallLocation=r"D:\Tool"))) != base
+    # The display name is compared as written
+    assert identity_of(make_app("Tool", **dict(VALUES, DisplayName="TOOL"))) != base
+
+def test_same_app_in_every_view_is_one_record():
+    native = make_app("Tool", **VALUES)
+    wow = make_app("Tool", UNINSTALL_32, **VALUES)
+    user = user_app("Tool", **VALUES)
+
+    grouped = list(group_locations([native, wow, user]))
+
+    assert grouped == [native]
+    assert [app.unique_id for app in native.locations] == [
+        f"HKLM\\{UNINSTALL_64}\\Tool", f"HKLM\\{UNINSTALL_32}\\Tool", f"HKCU\\{UNINSTALL_USER}\\Tool",
+    ]
+
+def test_different_versions_or_paths_stay_separate():
+    native = make_app("Tool", **VALUES)
+    newer = make_app("Tool", UNINSTALL_32, **dict(VALUES, DisplayVersion="2.0"))
+    moved = user_app("Tool", **dict(VALUES, InstallLocation=r"D:\Tool"))
+
+    grouped = list(group_locations([native, newer, moved]))
+
+    assert grouped == [native, newer, moved]
+    assert all(app.locations == [app] for app in grouped)
+
+def test_matches_join_listed_records():
+    listed = make_app("Tool", **VALUES)
+    wow = make_app("Tool", UNINSTALL_32, **VALUES)
+
+    assert list(group_locations([wow], listed=[listed])) == []
+    assert listed.locations == [listed, wow]
@@ -0,0 +1,76 @@
+import os
+import json
+
+from backend.backup_catalog import BackupCatalog
+from backend.backup_manager import BackupManager
+from backend.registry_backend import MemoryBackend, HKEY_LOCAL_MACHINE
+from backend.reg_file import write_reg_file
+from tests.fakes import UNINSTALL_64
+
+def make_backend():
+    backend = MemoryBackend()
+    for name in ("Old App", "New App"):
+        backend.set_value(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\{name}", "DisplayName", name)
+    return backend
+
+def write_old_backup(backend, backup_dir):
+    """
+    A backup made before the catalog existed: a .reg file and nothing else.
+    """
+    path = os.path.join(backup_dir, "Old App_20240101_120000.reg")
+    write_reg_file(backend, [(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\Old App")], path)
+    return path
+
+def test_backup_before_first_import_keeps_older_backups(tmp_path):
+    backup_dir = str(tmp_path)
+    backend = make_backend()
+    write_old_backup(backend, backup_dir)
+
+    # e.g. a purge (UI or headless) before the history window was ever opened
+    backup_mgr = BackupManager(backup_dir, backend=backend)
+    new_path = backup_mgr.backup_registry_key("HKLM", f"{UNINSTALL_64}\\New App", "New App")
+    catalog = backup_mgr.catalog
+
+    assert catalog.needs_import()
+    assert catalog.import_existing() == 1
+    assert not catalog.needs_import()
+
+    entries, total = catalog.query()
+    assert total == 2
+    # Newest catalog entry first: the import came after the purge's backup
+    assert [entry['file'] for entry in entries] == ["Old App_20240101_120000.reg", os.path.basename(new_path)]
+    old = catalog.find("Old App_20240101_120000.reg")
+    assert old['app_name'] == "Old App"
+    assert old['keys'] == [f"HKLM\\{UNINSTALL_64}\\Old App"]
+    assert old['timestamp'] == "2024-01-01T12:00:00"
+
+    # Remembered across restarts
+    reopened = BackupCatalog(backup_dir)
+    assert not reopened.needs_import()
+    assert len(reopened) == 2
+
+def test_import_runs_again_for_catalogs_without_the_marker(tmp_path):
+    backup_dir = str(tmp_path)
+    backend = make_backend()
+    old_path = write_old_backup(backend, backup_dir)
+    catalog = BackupCatalog(backup_dir)
+    catalog.add(old_path, "Old App", [("HKLM", f"{UNINSTALL_64}\\Old App")])
+
+    # Written by a version that took the file's existence as "imported"
+    assert BackupCatalog(backup_dir).needs_import()
+    assert catalog.import_existing() == 0
+    assert len(catalog) == 1
+    assert catalog.import_existing() == 0
+
+    with open(catalog.path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record.get('meta') for record in records] == [None, "imported", "imported"]
+
+def test_query_matches_every_word(tmp_path):
+    catalog = BackupCatalog(str(tmp_path))
+    catalog.add_blob("Alpha Tool_20240101_120000.reg", "Alpha Tool", [("HKLM", r"SOFTWARE\Alpha")], "aa", 10, 5)
+    catalog.add_blob("Beta Tool_20240102_120000.reg", "Beta Tool", [("HKCU", r"Software\Beta")], "bb", 10, 5)
+
+    assert [entry['app_name'] for entry in catalog.query("tool")[0]] == ["Beta Tool", "Alpha Tool"]
+    assert [entry['app_name'] for entry in catalog.query("tool hkcu")[0]] == ["Beta Tool"]
+    assert catalog.query("tool", offset=1, limit=1) == ([catalog.find("Alpha Tool_20240101_120000.reg")], 2)
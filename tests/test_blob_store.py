@@ -0,0 +1,93 @@
+import os
+import gzip
+
+import pytest
+
+from backend.backup_catalog import BackupCatalog
+from backend.blob_store import BlobStore, main
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden", "uninstall_key.reg")
+
+# reg.exe writes multi-line REG_SZ data as is: bare "\n" and trailing spaces are value content
+MULTILINE = (
+    "Windows Registry Editor Version 5.00\r\n"
+    "\r\n"
+    "[HKEY_LOCAL_MACHINE\\SOFTWARE\\Vendor]\r\n"
+    '"Comments"="first line  \nsecond line \t"\r\n'
+    "\r\n"
+)
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_export_is_byte_identical(tmp_path):
+    store = BlobStore(os.path.join(tmp_path, "blobs"))
+    out = os.path.join(tmp_path, "out.reg")
+
+    digest, size, stored_size = store.put_file(GOLDEN)
+    store.export(digest, out)
+
+    assert read_bytes(out) == read_bytes(GOLDEN)
+    assert size == len(read_bytes(GOLDEN)[2:].decode("utf-16-le").encode("utf-8"))
+    assert 0 < stored_size < size
+
+def test_value_content_is_kept(tmp_path):
+    store = BlobStore(os.path.join(tmp_path, "blobs"))
+    out = os.path.join(tmp_path, "out.reg")
+
+    digest, _, _ = store.put_text(MULTILINE)
+    store.export(digest, out)
+
+    assert store.read_text(digest) == MULTILINE
+    assert read_bytes(out).decode("utf-16") == MULTILINE
+
+def test_identical_exports_are_stored_once(tmp_path):
+    root = os.path.join(tmp_path, "blobs")
+    store = BlobStore(root)
+
+    first = store.put_text(MULTILINE)
+    second = store.put_text(MULTILINE)
+    other = store.put_text(MULTILINE.replace("Vendor", "Other"))
+
+    assert second == (first[0], first[1], 0)
+    assert other[0] != first[0]
+    assert first[0] in store and other[0] in store
+    assert sorted(name for _, _, files in os.walk(root) for name in files) == sorted(
+        [first[0] + ".reg.gz", other[0] + ".reg.gz"]
+    )
+    assert os.path.dirname(store.path_for(first[0])) == os.path.join(root, first[0][:2])
+
+def test_corrupt_blob_is_detected(tmp_path):
+    store = BlobStore(os.path.join(tmp_path, "blobs"))
+    digest, _, _ = store.put_text(MULTILINE)
+    with gzip.open(store.path_for(digest), "wb") as f:
+        f.write(b"tampered")
+
+    with pytest.raises(ValueError):
+        store.read_text(digest)
+    with pytest.raises(FileNotFoundError):
+        store.read_text("0" * 64)
+
+def test_blobs_from_older_versions_export_with_crlf(tmp_path):
+    store = BlobStore(os.path.join(tmp_path, "blobs"))
+    out = os.path.join(tmp_path, "out.reg")
+    digest, _, _ = store.put_text("Windows Registry Editor Version 5.00\n\n[HKEY_CURRENT_USER\\Software\\Vendor]\n")
+
+    store.export(digest, out)
+
+    assert read_bytes(out).decode("utf-16") == (
+        "Windows Registry Editor Version 5.00\r\n\r\n[HKEY_CURRENT_USER\\Software\\Vendor]\r\n"
+    )
+
+def test_export_command_finds_blobs_by_backup_name(tmp_path, capsys):
+    backup_dir = str(tmp_path)
+    store = BlobStore(os.path.join(backup_dir, "blobs"))
+    digest, size, stored_size = store.put_file(GOLDEN)
+    BackupCatalog(backup_dir).add_blob("Example_20240101_120000.reg", "Example", [], digest, size, stored_size)
+    out = os.path.join(tmp_path, "out.reg")
+
+    assert main(["export", backup_dir, "Example_20240101_120000.reg", out]) == 0
+    assert read_bytes(out) == read_bytes(GOLDEN)
+    assert main(["export", backup_dir, "Missing.reg", out]) == 1
+    assert "No stored backup named Missing.reg" in capsys.readouterr().err
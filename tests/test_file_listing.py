@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from backend.file_listing import FileListing, VolumeNotListed
+from backend.scanner import AppScanner
+from backend.stat_cache import StatCache
+from tests.fakes import make_app
+
+# `dir /s /b C:\` output, with the header and summary lines other `dir` modes add
+LISTING = (
+    " Volume in drive C is Windows\r\n"
+    " Directory of C:\\\r\n"
+    "\r\n"
+    "C:\\Program Files\r\n"
+    "C:\\Program Files\\Vendor\r\n"
+    "C:\\Program Files\\Vendor\\App\r\n"
+    "C:\\Program Files\\Vendor\\App\\app.exe\r\n"
+    "C:\\Program Files\\Vendor\\App\\Uninstall.exe\r\n"
+    "C:\\Windows\r\n"
+    "C:\\Windows\\notepad.exe\r\n"
+    "               2 File(s)         12,345 bytes\r\n"
+)
+
+def write_listing(tmp_path, text=LISTING, encoding="utf-16"):
+    path = os.path.join(tmp_path, "files.txt")
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(text)
+    return path
+
+@pytest.mark.parametrize("encoding", ["utf-16", "utf-8-sig", "cp1252"])
+def test_reads_listing(tmp_path, encoding):
+    listing = FileListing()
+    listing.read(write_listing(tmp_path, encoding=encoding))
+
+    assert listing.volumes == {"c:"}
+    assert listing.exists(r"C:\Program Files\Vendor\App")
+    assert listing.exists(r"c:\program files\vendor\app\UNINSTALL.EXE")
+    assert not listing.exists(r"C:\Program Files\Vendor\App\missing.exe")
+    assert sorted(entry.name for entry in listing.scandir(r"C:\Program Files\Vendor\App")) == [
+        "Uninstall.exe", "app.exe",
+    ]
+    with pytest.raises(FileNotFoundError):
+        listing.scandir(r"C:\Program Files\Other")
+
+def test_unlisted_volumes_are_unreachable(tmp_path):
+    listing = FileListing()
+    listing.read(write_listing(tmp_path))
+
+    with pytest.raises(VolumeNotListed):
+        listing.exists(r"D:\Games\game.exe")
+    with pytest.raises(VolumeNotListed):
+        listing.scandir("D:\\Games")
+
+def test_directories_filter_keeps_only_what_is_needed(tmp_path):
+    listing = FileListing()
+    listing.read(write_listing(tmp_path), directories={r"c:\program files\vendor\app"})
+
+    assert list(listing.dirs) == [r"c:\program files\vendor\app"]
+    assert listing.exists(r"C:\Program Files\Vendor\App\app.exe")
+    # Dropped entries still leave their drive covered
+    assert not listing.exists(r"C:\Windows\notepad.exe")
+
+def test_checks_apps_offline(tmp_path):
+    apps = [
+        make_app("App", UninstallString=r"C:\Program Files\Vendor\App\Uninstall.exe /S"),
+        make_app("Gone", InstallLocation=r"C:\Program Files\Vendor\Gone",
+                 UninstallString=r'"C:\Program Files\Vendor\Gone\unins000.exe"'),
+        make_app("Game", InstallLocation=r"D:\Games\Game"),
+    ]
+    listing = FileListing()
+    listing.read(write_listing(tmp_path), directories=AppScanner().directories_for(apps))
+    scanner = AppScanner(stat_cache=StatCache(scandir=listing.scandir, exists=listing.exists))
+
+    assert [status for status, _ in scanner.check_many(apps)] == ["Valid", "Ghost", "Unreachable"]
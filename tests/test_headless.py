@@ -0,0 +1,86 @@
+import io
+import os
+import json
+
+from headless import run, EXIT_OK, EXIT_ERROR, EXIT_GHOSTS
+from backend.registry_backend import MemoryBackend, HKEY_LOCAL_MACHINE
+from backend.reg_file import write_reg_file
+from tests.fakes import UNINSTALL_64
+from tests.regf import Key, write_hive, uninstall_entry, uninstall_path
+
+# None of these exist on the machine running the tests
+ENTRIES = (
+    ("Present", r"C:\Apps\Present"),
+    ("Hive", r"C:\Apps\Hive"),
+    ("Game", r"D:\Games\Game"),
+)
+
+def write_listing(tmp_path):
+    path = os.path.join(tmp_path, "files.txt")
+    with open(path, "w", encoding="utf-16", newline="") as f:
+        f.write("C:\\Apps\r\nC:\\Apps\\Present\r\nC:\\Apps\\Present\\present.exe\r\n")
+    return path
+
+def write_dump(tmp_path):
+    backend = MemoryBackend()
+    for name, location in ENTRIES:
+        backend.set_value(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\{name}", "DisplayName", name)
+        backend.set_value(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\{name}", "InstallLocation", location)
+    path = os.path.join(tmp_path, "host.reg")
+    write_reg_file(backend, [(HKEY_LOCAL_MACHINE, UNINSTALL_64)], path)
+    return path
+
+def run_json(argv):
+    out = io.StringIO()
+    exit_code = run(argv, out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    return exit_code, {line['name']: line['status'] for line in lines if line['type'] == "app"}, lines[-1]
+
+def test_offline_dump_without_listing_is_unreachable(tmp_path):
+    exit_code, statuses, summary = run_json(["--headless", "--reg-file", write_dump(tmp_path)])
+
+    assert exit_code == EXIT_OK
+    assert statuses == {"Present": "Unreachable", "Hive": "Unreachable", "Game": "Unreachable"}
+    assert summary['ghosts'] == 0 and summary['unreachable'] == 3
+
+def test_offline_dump_is_checked_against_its_listing(tmp_path):
+    argv = ["--headless", "--reg-file", write_dump(tmp_path), "--files", write_listing(tmp_path)]
+
+    exit_code, statuses, summary = run_json(argv)
+
+    assert exit_code == EXIT_GHOSTS
+    assert statuses == {"Present": "Valid", "Hive": "Ghost", "Game": "Unreachable"}
+    assert summary['ghosts'] == 1
+
+def test_hive_is_checked_against_its_listing(tmp_path):
+    hive = write_hive(os.path.join(tmp_path, "SOFTWARE"), Key("ROOT", subkeys=[
+        uninstall_path([uninstall_entry(name, InstallLocation=location) for name, location in ENTRIES], "lh"),
+    ]))
+
+    assert run_json(["--headless", "--hive", hive])[1] == {
+        "Present": "Unreachable", "Hive": "Unreachable", "Game": "Unreachable",
+    }
+    assert run_json(["--headless", "--hive", hive, "--files", write_listing(tmp_path)])[1] == {
+        "Present": "Valid", "Hive": "Ghost", "Game": "Unreachable",
+    }
+
+def test_files_needs_an_offline_source(tmp_path):
+    assert run(["--headless", "--files", write_listing(tmp_path)], io.StringIO()) == EXIT_ERROR
+
+def test_duplicate_registrations_list_every_location(tmp_path):
+    uninstall_32 = r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall"
+    backend = MemoryBackend()
+    for path in (UNINSTALL_64, uninstall_32):
+        backend.set_value(HKEY_LOCAL_MACHINE, f"{path}\\Tool", "DisplayName", "Tool")
+    dump = os.path.join(tmp_path, "host.reg")
+    write_reg_file(backend, [(HKEY_LOCAL_MACHINE, UNINSTALL_64), (HKEY_LOCAL_MACHINE, uninstall_32)], dump)
+
+    out = io.StringIO()
+    run(["--headless", "--reg-file", dump], out)
+    apps = [json.loads(line) for line in out.getvalue().splitlines()][:-1]
+
+    assert len(apps) == 1
+    assert apps[0]['locations'] == [
+        {'root': "HKLM", 'path': f"{UNINSTALL_64}\\Tool"},
+        {'root': "HKLM", 'path': f"{uninstall_32}\\Tool"},
+    ]
@@ -0,0 +1,132 @@
+import os
+
+import pytest
+
+from backend.hive_reader import HiveBackend, HiveError
+from backend.registry_backend import (
+    MemoryBackend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER, REG_SZ, REG_EXPAND_SZ, REG_BINARY, REG_DWORD,
+    REG_MULTI_SZ, REG_QWORD,
+)
+from backend.registry_manager import RegistryManager
+from tests.fakes import dump_tree
+from tests.regf import Key, write_hive, uninstall_entry, uninstall_path
+
+def software_hive():
+    """
+    SOFTWARE hive content: the 64-bit uninstall view behind an ri list, the 32-bit
+    one behind an lf list, a value-less key, a big-data value and a UTF-16 key name.
+    """
+    entries_64 = [
+        Key("Alpha", [
+            ('DisplayName', "Alpha", REG_SZ),
+            ('DisplayVersion', "1.0", REG_SZ),
+            ('InstallLocation', r"C:\Apps\Alpha", REG_SZ),
+            ('UninstallString', r"%ProgramFiles%\Alpha\uninstall.exe", REG_EXPAND_SZ),
+            ('EstimatedSize', 2048, REG_DWORD),
+            ('InstallDate', "20240101", REG_SZ),
+        ]),
+        Key("Beta", [
+            ('DisplayName', "Beta", REG_SZ),
+            ('Languages', ["en-US", "de-DE"], REG_MULTI_SZ),
+            ('InstallTime', 0x01D9C0FFEE123456, REG_QWORD),
+            # Spread over a "db" segment list
+            ('Icon', bytes(range(256)) * 100, REG_BINARY),
+            ('Comments', "x" * 9000, REG_SZ),
+        ]),
+        Key("Empty"),
+        Key("Hidden", [('DisplayName', "Hidden", REG_SZ), ('SystemComponent', 1, REG_DWORD)]),
+        uninstall_entry("Приложение", InstallLocation=r"C:\Apps\Приложение"),
+    ]
+    entries_32 = [uninstall_entry(f"Legacy{i}", InstallLocation=rf"C:\Legacy\{i}") for i in range(5)]
+    return Key("ROOT", subkeys=[
+        uninstall_path(entries_64, "ri"),
+        Key("WOW6432Node", subkeys=[uninstall_path(entries_32, "lf")], list_kind="li"),
+    ])
+
+def ntuser_hive():
+    return Key("ROOT", subkeys=[
+        Key("Software", subkeys=[uninstall_path([uninstall_entry("UserApp")], "lh")]),
+    ])
+
+@pytest.fixture
+def hives(tmp_path):
+    software = software_hive()
+    ntuser = ntuser_hive()
+    paths = (
+        write_hive(os.path.join(tmp_path, "SOFTWARE"), software),
+        write_hive(os.path.join(tmp_path, "NTUSER.DAT"), ntuser),
+    )
+    memory = MemoryBackend()
+    software.to_memory(memory, HKEY_LOCAL_MACHINE, "SOFTWARE")
+    ntuser.to_memory(memory, HKEY_CURRENT_USER, "")
+    backend = HiveBackend(*paths)
+    yield backend, memory
+    backend.close()
+
+def test_keys_and_values_match(hives):
+    backend, memory = hives
+
+    assert dump_tree(backend, HKEY_LOCAL_MACHINE, "SOFTWARE") == dump_tree(memory, HKEY_LOCAL_MACHINE, "SOFTWARE")
+    assert dump_tree(backend, HKEY_CURRENT_USER, "Software") == dump_tree(memory, HKEY_CURRENT_USER, "Software")
+
+def test_value_less_and_big_data_keys(hives):
+    backend, _ = hives
+    uninstall = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"
+
+    with backend.open_key(HKEY_LOCAL_MACHINE, f"{uninstall}\\empty") as key:
+        assert backend.query_info(key)[:2] == (0, 0)
+        with pytest.raises(OSError):
+            backend.enum_value(key, 0)
+    with backend.open_key(HKEY_LOCAL_MACHINE, f"{uninstall}\\Beta") as key:
+        assert backend.query_value(key, "icon") == (bytes(range(256)) * 100, REG_BINARY)
+        assert backend.query_value(key, "Comments") == ("x" * 9000, REG_SZ)
+        with pytest.raises(FileNotFoundError):
+            backend.query_value(key, "Missing")
+
+def test_installed_apps_match_memory_backend(hives):
+    backend, memory = hives
+
+    apps = RegistryManager(backend=backend).get_installed_apps()
+    expected = RegistryManager(backend=memory).get_installed_apps()
+
+    assert [app.to_dict() for app in apps] == [app.to_dict() for app in expected]
+    assert [app['DisplayName'] for app in apps] == [
+        "Alpha", "Beta", "Приложение", "Legacy0", "Legacy1", "Legacy2", "Legacy3", "Legacy4", "UserApp",
+    ]
+    assert apps[0]['EstimatedSize'] == 2048
+
+def test_hive_is_read_only(hives):
+    backend, _ = hives
+
+    with pytest.raises(PermissionError):
+        backend.create_key(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor")
+    with pytest.raises(PermissionError):
+        backend.delete_tree(HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft")
+
+def test_rejects_files_that_are_not_hives(tmp_path):
+    path = os.path.join(tmp_path, "SOFTWARE")
+    with open(path, "wb") as f:
+        f.write(b"not a hive" * 100)
+
+    with pytest.raises(HiveError):
+        HiveBackend(path)
+
+def test_truncated_subkey_list_is_a_hive_error(tmp_path):
+    path = write_hive(os.path.join(tmp_path, "SOFTWARE"), software_hive())
+    with open(path, "r+b") as f:
+        data = f.read()
+        # Claim far more subkeys in the ri list than the file holds
+        index = data.index(b"ri\x02\x00")
+        f.seek(index + 2)
+        f.write(b"\xff\xff")
+
+    backend = HiveBackend(path)
+    try:
+        with backend.open_key(HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall") as key:
+            with pytest.raises(HiveError):
+                backend.enum_key(key, 0)
+        # The scan logs the view and carries on with the others
+        apps = RegistryManager(backend=backend).get_installed_apps()
+        assert [app['DisplayName'] for app in apps] == [f"Legacy{i}" for i in range(5)]
+    finally:
+        backend.close()
@@ -0,0 +1,95 @@
+import pytest
+
+from backend.registry_backend import MemoryBackend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER
+from backend.msi_index import MsiIndex, pack_guid, find_product_code, MACHINE_PRODUCTS, USER_PRODUCTS, USER_DATA
+from backend.scanner import AppScanner
+from backend.stat_cache import StatCache
+from tests.fakes import FakeTree, make_app
+
+INSTALLER_DIR = "C:\\Windows\\Installer"
+OFFICE = "{90150000-0011-0000-0000-0000000FF1CE}"
+OTHER = "{12345678-ABCD-EF01-2345-6789ABCDEF01}"
+SID = "S-1-5-18"
+
+def make_index(backend, tree):
+    return MsiIndex(backend, StatCache(scandir=tree.scandir, exists=tree.exists), INSTALLER_DIR)
+
+def register(backend, product_code, local_package=None, root=HKEY_LOCAL_MACHINE):
+    packed = pack_guid(product_code)
+    path = MACHINE_PRODUCTS if root == HKEY_LOCAL_MACHINE else USER_PRODUCTS
+    backend.set_value(root, f"{path}\\{packed}", "ProductName", "Product")
+    if local_package:
+        props = f"{USER_DATA}\\{SID}\\Products\\{packed}\\InstallProperties"
+        backend.set_value(HKEY_LOCAL_MACHINE, props, "LocalPackage", local_package)
+
+def test_pack_guid():
+    assert pack_guid(OTHER) == "87654321DCBA10FE32547698BADCFE10"
+    assert pack_guid(OFFICE) == "00005109110000000000000000F01FEC"
+    assert pack_guid(OFFICE.lower()) == pack_guid(OFFICE)
+    with pytest.raises(ValueError):
+        pack_guid("90150000-0011-0000-0000-0000000FF1CE")
+
+def test_find_product_code():
+    assert find_product_code(f"MsiExec.exe /X{OFFICE.lower()} /qn") == OFFICE
+    assert find_product_code("unins000.exe /SILENT") is None
+
+def test_registered_products_are_valid():
+    backend = MemoryBackend()
+    register(backend, OFFICE)
+    register(backend, OTHER, root=HKEY_CURRENT_USER)
+    index = make_index(backend, FakeTree(dirs=[INSTALLER_DIR]))
+
+    assert index.check(OFFICE)[0] == "Valid"
+    assert index.check(OTHER)[0] == "Valid"
+
+def test_missing_local_package_is_a_ghost():
+    backend = MemoryBackend()
+    register(backend, OFFICE, local_package=f"{INSTALLER_DIR}\\1a2b3c.msi")
+    register(backend, OTHER, local_package=f"{INSTALLER_DIR}\\4d5e6f.msi")
+    tree = FakeTree(files=[f"{INSTALLER_DIR}\\1a2b3c.msi"])
+    index = make_index(backend, tree)
+
+    assert index.check(OFFICE)[0] == "Valid"
+    assert index.check(OTHER) == ("Ghost", f"Cached installer package missing: {INSTALLER_DIR}\\4d5e6f.msi")
+    # Both answered from the one listing of the Installer directory
+    assert tree.listed == [INSTALLER_DIR]
+    assert tree.checked == []
+
+def test_unregistered_products():
+    backend = MemoryBackend()
+    register(backend, OFFICE)
+    index = make_index(backend, FakeTree(dirs=[f"{INSTALLER_DIR}\\{OTHER}"]))
+
+    # Only a folder in the Installer cache is left of this one
+    assert index.check(OTHER)[0] == "Valid"
+    assert index.check("{00000000-0000-0000-0000-000000000001}")[0] == "Ghost"
+
+def test_unavailable_installer_data_is_unknown():
+    index = make_index(MemoryBackend(), FakeTree(dirs=["C:\\Windows"]))
+
+    assert index.check(OFFICE)[0] == "Unknown"
+    assert not index.available
+
+def test_index_is_built_once_per_scan():
+    backend = MemoryBackend()
+    register(backend, OFFICE)
+    index = make_index(backend, FakeTree(dirs=[INSTALLER_DIR]))
+    assert index.check(OTHER)[0] == "Ghost"
+
+    register(backend, OTHER)
+    assert index.check(OTHER)[0] == "Ghost"
+    index.invalidate()
+    assert index.check(OTHER)[0] == "Valid"
+
+def test_scanner_resolves_msiexec_entries():
+    backend = MemoryBackend()
+    register(backend, OFFICE)
+    tree = FakeTree(dirs=[INSTALLER_DIR])
+    stat_cache = StatCache(scandir=tree.scandir, exists=tree.exists)
+    scanner = AppScanner(stat_cache=stat_cache, msi_index=MsiIndex(backend, stat_cache, INSTALLER_DIR))
+    apps = [
+        make_app(OFFICE, UninstallString=f"MsiExec.exe /X{OFFICE}"),
+        make_app("Orphan", UninstallString=f"MsiExec.exe /I{OTHER}"),
+    ]
+
+    assert [status for status, _ in scanner.check_many(apps)] == ["Valid", "Ghost"]
@@ -0,0 +1,235 @@
+import os
+import codecs
+
+import pytest
+
+from backend.registry_backend import (
+    MemoryBackend, RegFileBackend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER,
+    REG_SZ, REG_EXPAND_SZ, REG_BINARY, REG_DWORD, REG_MULTI_SZ, REG_QWORD,
+)
+from backend.reg_file import (
+    format_value, write_reg_file, iter_reg_operations, apply_operations, diff_operations,
+    validate_reg_file, top_level_keys, CreateKey, DeleteKey, SetValue, DeleteValue,
+)
+from tests.fakes import dump_tree
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+EXAMPLE_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall\Example"
+
+def make_example_backend():
+    """
+    One uninstall key with a value of every type regedit exports, and a subkey.
+    """
+    backend = MemoryBackend()
+    values = (
+        ("", "Example App", REG_SZ),
+        ("DisplayName", 'Example "Pro" 2.0', REG_SZ),
+        ("InstallLocation", "C:\\Program Files\\Example\\", REG_SZ),
+        ("NoModify", 1, REG_DWORD),
+        ("UninstallString", "%ProgramFiles%\\Example\\uninstall.exe", REG_EXPAND_SZ),
+        ("Languages", ["en-US", "de-DE"], REG_MULTI_SZ),
+        ("InstallTime", 0x01D9C0FFEE123456, REG_QWORD),
+        ("Test", bytes(range(64)), REG_BINARY),
+        ("Empty", b"", REG_BINARY),
+    )
+    for name, data, value_type in values:
+        backend.set_value(HKEY_LOCAL_MACHINE, EXAMPLE_KEY, name, data, value_type)
+    backend.set_value(HKEY_LOCAL_MACHINE, f"{EXAMPLE_KEY}\\Components", "Core", 1, REG_DWORD)
+    return backend
+
+# Hand-written in regedit's layout: comments, escapes, continuation lines and delete markers
+HANDWRITTEN = (
+    "Windows Registry Editor Version 5.00\r\n"
+    "\r\n"
+    "; Exported before the cleanup\r\n"
+    "[HKEY_LOCAL_MACHINE\\SOFTWARE\\Vendor\\App]\r\n"
+    '@="Default"\r\n'
+    '"Quoted"="say \\"hi\\" to C:\\\\Temp"\r\n'
+    '"Path"=hex(2):25,00,41,00,\\\r\n'
+    "  25,00,00,00\r\n"
+    '"Count"=dword:0000002a\r\n'
+    '"Old"=-\r\n'
+    "\r\n"
+    "[-HKEY_LOCAL_MACHINE\\SOFTWARE\\Vendor\\Stale]\r\n"
+    "\r\n"
+    "[HKEY_CURRENT_USER\\Software\\Vendor]\r\n"
+    '"Bin"=hex:de,ad,\\\r\n'
+    "  be,ef\r\n"
+    "\r\n"
+)
+
+def write_text(tmp_path, text, encoding="utf-16"):
+    path = os.path.join(tmp_path, "input.reg")
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(text)
+    return path
+
+def read_golden(name):
+    with open(os.path.join(GOLDEN_DIR, name), "rb") as f:
+        return f.read()
+
+def test_export_matches_golden_file(tmp_path):
+    path = os.path.join(tmp_path, "backup.reg")
+
+    write_reg_file(make_example_backend(), [(HKEY_LOCAL_MACHINE, EXAMPLE_KEY)], path)
+
+    with open(path, "rb") as f:
+        assert f.read() == read_golden("uninstall_key.reg")
+    assert os.listdir(tmp_path) == ["backup.reg"]
+
+def test_golden_file_is_utf16_le_with_crlf():
+    data = read_golden("uninstall_key.reg")
+
+    assert data.startswith(codecs.BOM_UTF16_LE)
+    text = data[2:].decode("utf-16-le")
+    assert text.startswith("Windows Registry Editor Version 5.00\r\n\r\n")
+    assert text.endswith("\r\n\r\n")
+    assert "\n" not in text.replace("\r\n", "")
+
+@pytest.mark.parametrize("name", ["T", "Test", "TestValue", "UninstallString"])
+def test_hex_lines_wrap_like_regedit(name):
+    lines = format_value(name, bytes(range(200)), REG_BINARY).split("\r\n")
+
+    for line in lines[:-1]:
+        # Broken after the comma that takes the line to 77 characters or more
+        assert line.endswith(",\\")
+        assert len(line) - 1 in (77, 78, 79)
+    for line in lines[1:]:
+        assert line.startswith("  ") and not line.startswith("   ")
+        assert len(line) <= 80
+    hex_text = "".join(line.rstrip("\\").strip() for line in lines)
+    assert hex_text.partition("=hex:")[2] == ",".join(f"{i:02x}" for i in range(200))
+
+def test_long_value_names_break_after_the_first_byte():
+    line = format_value("A" * 80, b"\x01\x02", REG_BINARY).split("\r\n")[0]
+
+    assert line == f'"{"A" * 80}"=hex:01,\\'
+
+def test_hex_wrapping_of_a_regedit_sample():
+    # As exported by regedit for a REG_BINARY value holding bytes 00..3f
+    assert format_value("Test", bytes(range(64)), REG_BINARY) == (
+        '"Test"=hex:00,01,02,03,04,05,06,07,08,09,0a,0b,0c,0d,0e,0f,10,11,12,13,14,15,\\\r\n'
+        '  16,17,18,19,1a,1b,1c,1d,1e,1f,20,21,22,23,24,25,26,27,28,29,2a,2b,2c,2d,2e,\\\r\n'
+        '  2f,30,31,32,33,34,35,36,37,38,39,3a,3b,3c,3d,3e,3f'
+    )
+
+def test_format_value_types():
+    assert format_value("", "App", REG_SZ) == '@="App"'
+    assert format_value("Path", "C:\\A \"B\"", REG_SZ) == '"Path"="C:\\\\A \\"B\\""'
+    assert format_value("Size", 0xFFFFFFFF, REG_DWORD) == '"Size"=dword:ffffffff'
+    assert format_value("Big", 1, REG_QWORD) == '"Big"=hex(b):01,00,00,00,00,00,00,00'
+    assert format_value("Dir", "%A%", REG_EXPAND_SZ) == '"Dir"=hex(2):25,00,41,00,25,00,00,00'
+    assert format_value("List", ["a", "b"], REG_MULTI_SZ) == '"List"=hex(7):61,00,00,00,62,00,00,00,00,00'
+    assert format_value("Empty", b"", REG_BINARY) == '"Empty"=hex:'
+
+def test_failed_export_leaves_nothing_behind(tmp_path):
+    path = os.path.join(tmp_path, "backup.reg")
+
+    with pytest.raises(FileNotFoundError):
+        write_reg_file(make_example_backend(), [(HKEY_LOCAL_MACHINE, f"{EXAMPLE_KEY}\\Missing")], path)
+
+    assert os.listdir(tmp_path) == []
+
+def test_golden_file_round_trips(tmp_path):
+    source = make_example_backend()
+    golden = os.path.join(GOLDEN_DIR, "uninstall_key.reg")
+
+    restored = RegFileBackend(golden)
+    path = os.path.join(tmp_path, "again.reg")
+    write_reg_file(restored, [(HKEY_LOCAL_MACHINE, EXAMPLE_KEY)], path)
+
+    assert dump_tree(restored, HKEY_LOCAL_MACHINE, EXAMPLE_KEY) == dump_tree(source, HKEY_LOCAL_MACHINE, EXAMPLE_KEY)
+    with open(path, "rb") as f:
+        assert f.read() == read_golden("uninstall_key.reg")
+    assert top_level_keys(iter_reg_operations(golden)) == [(HKEY_LOCAL_MACHINE, EXAMPLE_KEY)]
+
+def test_strings_with_line_breaks_round_trip(tmp_path):
+    backend = MemoryBackend()
+    key = r"SOFTWARE\Vendor\App"
+    backend.set_value(HKEY_LOCAL_MACHINE, key, "Comments", "First line\r\nSecond line\n", REG_SZ)
+    backend.set_value(HKEY_LOCAL_MACHINE, key, "Note", "Ends with a NUL\0", REG_SZ)
+    path = os.path.join(tmp_path, "backup.reg")
+
+    write_reg_file(backend, [(HKEY_LOCAL_MACHINE, key)], path)
+
+    assert format_value("Comments", "a\nb", REG_SZ) == '"Comments"=hex(1):61,00,0a,00,62,00,00,00'
+    assert validate_reg_file(path) == (1, None)
+    assert dump_tree(RegFileBackend(path), HKEY_LOCAL_MACHINE, key) == {
+        key: {"Comments": ("First line\r\nSecond line\n", REG_SZ), "Note": ("Ends with a NUL", REG_SZ)},
+    }
+
+def test_parses_handwritten_export(tmp_path):
+    path = write_text(tmp_path, HANDWRITTEN)
+
+    assert list(iter_reg_operations(path, strict=True)) == [
+        CreateKey(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App"),
+        SetValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App", "", "Default", REG_SZ),
+        SetValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App", "Quoted", 'say "hi" to C:\\Temp', REG_SZ),
+        SetValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App", "Path", "%A%", REG_EXPAND_SZ),
+        SetValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App", "Count", 42, REG_DWORD),
+        DeleteValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App", "Old"),
+        DeleteKey(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\Stale"),
+        CreateKey(HKEY_CURRENT_USER, r"Software\Vendor"),
+        SetValue(HKEY_CURRENT_USER, r"Software\Vendor", "Bin", b"\xde\xad\xbe\xef", REG_BINARY),
+    ]
+    assert validate_reg_file(path) == (2, None)
+
+def test_applies_handwritten_export(tmp_path):
+    path = write_text(tmp_path, HANDWRITTEN)
+    backend = MemoryBackend()
+    backend.set_value(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App", "Old", "gone soon")
+    backend.set_value(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\App", "Count", 1, REG_DWORD)
+    backend.set_value(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor\Stale\Sub", "x", "y")
+
+    assert diff_operations(backend, iter_reg_operations(path)) == [
+        ("add", r"HKEY_LOCAL_MACHINE\SOFTWARE\Vendor\App : @"),
+        ("add", r"HKEY_LOCAL_MACHINE\SOFTWARE\Vendor\App : Quoted"),
+        ("add", r"HKEY_LOCAL_MACHINE\SOFTWARE\Vendor\App : Path"),
+        ("modify", r"HKEY_LOCAL_MACHINE\SOFTWARE\Vendor\App : Count"),
+        ("delete", r"HKEY_LOCAL_MACHINE\SOFTWARE\Vendor\App : Old"),
+        ("delete", r"[HKEY_LOCAL_MACHINE\SOFTWARE\Vendor\Stale]"),
+        ("add", r"[HKEY_CURRENT_USER\Software\Vendor]"),
+        ("add", r"HKEY_CURRENT_USER\Software\Vendor : Bin"),
+    ]
+    assert apply_operations(backend, iter_reg_operations(path)) == 9
+
+    assert dump_tree(backend, HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor") == {
+        r"SOFTWARE\Vendor": {},
+        r"SOFTWARE\Vendor\App": {
+            "Count": (42, REG_DWORD),
+            "": ("Default", REG_SZ),
+            "Quoted": ('say "hi" to C:\\Temp', REG_SZ),
+            "Path": ("%A%", REG_EXPAND_SZ),
+        },
+    }
+    assert dump_tree(backend, HKEY_CURRENT_USER, r"Software\Vendor") == {
+        r"Software\Vendor": {"Bin": (b"\xde\xad\xbe\xef", REG_BINARY)},
+    }
+    assert diff_operations(backend, iter_reg_operations(path)) == []
+
+def test_regedit4_files_are_ansi(tmp_path):
+    path = write_text(tmp_path, (
+        "REGEDIT4\r\n\r\n"
+        "[HKEY_LOCAL_MACHINE\\SOFTWARE\\Vendor]\r\n"
+        '"Name"="Caf\u00e9"\r\n'
+        '"Dir"=hex(2):25,41,25,00\r\n'
+    ), encoding="cp1252")
+
+    assert list(iter_reg_operations(path))[1:] == [
+        SetValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor", "Name", "Caf\u00e9", REG_SZ),
+        SetValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor", "Dir", "%A%", REG_EXPAND_SZ),
+    ]
+
+def test_malformed_lines_are_skipped_unless_strict(tmp_path):
+    path = write_text(tmp_path, (
+        "Windows Registry Editor Version 5.00\r\n\r\n"
+        "[HKEY_LOCAL_MACHINE\\SOFTWARE\\Vendor]\r\n"
+        '"Broken"=dword:zz\r\n'
+        '"Fine"="yes"\r\n'
+    ))
+
+    assert list(iter_reg_operations(path))[1:] == [
+        SetValue(HKEY_LOCAL_MACHINE, r"SOFTWARE\Vendor", "Fine", "yes", REG_SZ),
+    ]
+    keys, error = validate_reg_file(path)
+    assert keys == 0 and "entry 4" in error
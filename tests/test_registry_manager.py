@@ -0,0 +1,244 @@
+import os
+import threading
+import time
+
+import backend.registry_manager as registry_manager
+from backend.registry_backend import MemoryBackend, HKEY_LOCAL_MACHINE, HKEY_CURRENT_USER, REG_DWORD
+from backend.registry_manager import RegistryManager, RANGE_SIZE
+from backend.scanner import AppScanner
+from backend.stat_cache import StatCache
+from tests.fakes import FakeTree, UNINSTALL_64
+
+UNINSTALL_USER = r"Software\Microsoft\Windows\CurrentVersion\Uninstall"
+
+def add_entry(backend, key_name, root=HKEY_LOCAL_MACHINE, path=UNINSTALL_64, **values):
+    values.setdefault('DisplayName', key_name)
+    for name, data in values.items():
+        backend.set_value(root, f"{path}\\{key_name}", name, data)
+
+def make_backend():
+    backend = MemoryBackend()
+    add_entry(backend, "Alpha", DisplayVersion="1.0")
+    add_entry(backend, "Beta", DisplayVersion="2.0")
+    add_entry(backend, "Gamma", root=HKEY_CURRENT_USER, path=UNINSTALL_USER)
+    return backend
+
+def names(apps):
+    return [app['DisplayName'] for app in apps]
+
+def test_first_scan_reports_everything_added():
+    reg_mgr = RegistryManager(backend=make_backend())
+
+    apps = reg_mgr.get_installed_apps()
+
+    assert names(apps) == ["Alpha", "Beta", "Gamma"]
+    assert reg_mgr.last_changes == {
+        'added': [
+            f"HKLM\\{UNINSTALL_64}\\Alpha",
+            f"HKLM\\{UNINSTALL_64}\\Beta",
+            f"HKCU\\{UNINSTALL_USER}\\Gamma",
+        ],
+        'modified': [],
+        'removed': [],
+    }
+
+def test_rescan_reports_added_changed_and_removed_keys():
+    backend = make_backend()
+    reg_mgr = RegistryManager(backend=backend)
+    reg_mgr.get_installed_apps()
+
+    backend.set_value(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\Beta", "DisplayVersion", "2.1")
+    add_entry(backend, "Delta")
+    with backend.open_key(HKEY_CURRENT_USER, UNINSTALL_USER) as key:
+        backend.delete_key(key, "Gamma")
+
+    apps = reg_mgr.get_installed_apps()
+
+    assert names(apps) == ["Alpha", "Beta", "Delta"]
+    assert apps[1]['DisplayVersion'] == "2.1"
+    assert reg_mgr.last_changes == {
+        'added': [f"HKLM\\{UNINSTALL_64}\\Delta"],
+        'modified': [f"HKLM\\{UNINSTALL_64}\\Beta"],
+        'removed': [f"HKCU\\{UNINSTALL_USER}\\Gamma"],
+    }
+
+def test_unchanged_keys_are_not_read_again():
+    backend = make_backend()
+    reg_mgr = RegistryManager(backend=backend)
+    first = reg_mgr.get_installed_apps()
+
+    read = []
+    original = reg_mgr._read_app
+
+    def read_app(subkey, num_values, parent_path, root_str, subkey_name, extra_flags):
+        read.append(subkey_name)
+        return original(subkey, num_values, parent_path, root_str, subkey_name, extra_flags)
+
+    reg_mgr._read_app = read_app
+    second = reg_mgr.get_installed_apps()
+
+    assert read == []
+    assert [app.to_dict() for app in second] == [app.to_dict() for app in first]
+    assert reg_mgr.last_changes == {'added': [], 'modified': [], 'removed': []}
+
+    reg_mgr.get_installed_apps(incremental=False)
+    assert read == ["Alpha", "Beta", "Gamma"]
+
+def test_hidden_keys_stay_hidden_when_reused():
+    backend = make_backend()
+    add_entry(backend, "Driver")
+    backend.set_value(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\Driver", "SystemComponent", 1, REG_DWORD)
+    reg_mgr = RegistryManager(backend=backend)
+
+    assert "Driver" not in names(reg_mgr.get_installed_apps())
+    assert "Driver" not in names(reg_mgr.get_installed_apps())
+    assert reg_mgr.last_changes['added'] == []
+
+def test_snapshot_survives_a_restart(tmp_path):
+    backend = make_backend()
+    snapshot_path = os.path.join(tmp_path, "snapshot.json")
+    RegistryManager(backend=backend, snapshot_path=snapshot_path).get_installed_apps()
+
+    add_entry(backend, "Delta")
+    reg_mgr = RegistryManager(backend=backend, snapshot_path=snapshot_path)
+    apps = reg_mgr.get_installed_apps()
+
+    assert names(apps) == ["Alpha", "Beta", "Delta", "Gamma"]
+    assert reg_mgr.last_changes == {
+        'added': [f"HKLM\\{UNINSTALL_64}\\Delta"], 'modified': [], 'removed': [],
+    }
+
+class RecordingScanner(AppScanner):
+    """
+    Scanner over a fake tree that remembers which apps it was asked to check.
+    """
+    def __init__(self, tree):
+        super().__init__(stat_cache=StatCache(scandir=tree.scandir, exists=tree.exists))
+        self.checked = []
+
+    def check_many(self, apps):
+        self.checked.extend(app['DisplayName'] for app in apps)
+        return super().check_many(apps)
+
+def check_all(reg_mgr, scanner, incremental=True):
+    scanner.checked = []
+    scanner.begin_scan()
+    apps = reg_mgr.get_installed_apps(incremental)
+    pending = [app for app in apps if 'Status' not in app]
+    for app, (status, reason) in zip(pending, scanner.check_many(pending)):
+        app['Status'] = status
+        app['Reason'] = reason
+    return {app['DisplayName']: app['Status'] for app in apps}
+
+def test_rescan_only_checks_changed_keys():
+    backend = make_backend()
+    backend.set_value(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\Alpha", "InstallLocation", r"C:\Apps\Alpha")
+    tree = FakeTree(files=[r"C:\Apps\Alpha\alpha.exe"])
+    reg_mgr = RegistryManager(backend=backend)
+    scanner = RecordingScanner(tree)
+
+    assert check_all(reg_mgr, scanner) == {"Alpha": "Valid", "Beta": "Unknown", "Gamma": "Unknown"}
+    assert scanner.checked == ["Alpha", "Beta", "Gamma"]
+
+    backend.set_value(HKEY_LOCAL_MACHINE, f"{UNINSTALL_64}\\Beta", "InstallLocation", r"C:\Apps\Beta")
+    add_entry(backend, "Delta", InstallLocation=r"C:\Apps\Alpha")
+    assert check_all(reg_mgr, scanner) == {"Alpha": "Valid", "Beta": "Ghost", "Delta": "Valid", "Gamma": "Unknown"}
+    assert scanner.checked == ["Beta", "Delta"]
+
+    # Nothing changed: nothing to check
+    assert check_all(reg_mgr, scanner)["Beta"] == "Ghost"
+    assert scanner.checked == []
+
+    # A full scan checks everything again
+    check_all(reg_mgr, scanner, incremental=False)
+    assert scanner.checked == ["Alpha", "Beta", "Delta", "Gamma"]
+
+def test_reused_records_are_copies():
+    reg_mgr = RegistryManager(backend=make_backend())
+    first = reg_mgr.get_installed_apps()
+    first[0]['Status'] = "Valid"
+    first[0]['Reason'] = "Installation folder found"
+
+    second = reg_mgr.get_installed_apps()
+
+    assert second[0] is not first[0]
+    assert (second[0]['Status'], second[0]['Reason']) == ("Valid", "Installation folder found")
+    assert 'Status' not in second[1]
+
+def test_unreachable_results_are_checked_again():
+    reg_mgr = RegistryManager(backend=make_backend())
+    first = reg_mgr.get_installed_apps()
+    first[0]['Status'] = "Unreachable"
+    first[1]['Status'] = "Ghost"
+
+    second = reg_mgr.get_installed_apps()
+
+    assert 'Status' not in second[0]
+    assert second[1]['Status'] == "Ghost"
+
+def make_large_backend():
+    # Several ranges in the 64-bit view, plus a short HKCU view after it
+    backend = MemoryBackend()
+    for i in range(RANGE_SIZE * 2 + 44):
+        add_entry(backend, f"App {i:03}")
+    for i in range(5):
+        add_entry(backend, f"User {i}", root=HKEY_CURRENT_USER, path=UNINSTALL_USER)
+    return backend
+
+def read_ranges(reg_mgr):
+    return [
+        [(unique_id, app_info is not None, change) for unique_id, _, app_info, change in entries]
+        for entries in reg_mgr._iter_ranges({})
+    ]
+
+def test_threaded_ranges_match_sequential_order():
+    backend = make_large_backend()
+
+    sequential = read_ranges(RegistryManager(backend=backend, max_workers=1))
+    threaded = read_ranges(RegistryManager(backend=backend, max_workers=4))
+
+    assert threaded == sequential
+    assert [len(entries) for entries in sequential] == [RANGE_SIZE, RANGE_SIZE, 44, 5]
+    apps = RegistryManager(backend=backend, max_workers=4).get_installed_apps()
+    assert names(apps)[:2] == ["App 000", "App 001"] and names(apps)[-1] == "User 4"
+
+def test_single_worker_reads_without_a_pool(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("thread pool used with max_workers <= 1")
+    monkeypatch.setattr(registry_manager, "ThreadPoolExecutor", no_pool)
+    backend = make_large_backend()
+
+    for max_workers in (1, 0):
+        reg_mgr = RegistryManager(backend=backend, max_workers=max_workers)
+        assert len(reg_mgr.get_installed_apps()) == RANGE_SIZE * 2 + 49
+
+class GatedBackend(MemoryBackend):
+    """
+    Memory backend whose reads past the first range wait until gate is set.
+    """
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def enum_key(self, key, index):
+        if index >= RANGE_SIZE:
+            assert self.gate.wait(5)
+        return super().enum_key(key, index)
+
+def test_closing_the_scan_early_does_not_wait_for_pending_ranges():
+    backend = GatedBackend()
+    for i in range(RANGE_SIZE * 4):
+        add_entry(backend, f"App {i:03}")
+    reg_mgr = RegistryManager(backend=backend, max_workers=2)
+    scan = reg_mgr.iter_installed_apps(incremental=False)
+
+    assert next(scan)['DisplayName'] == "App 000"
+    # Returns while later ranges are still blocked on the gate
+    started = time.perf_counter()
+    scan.close()
+    assert time.perf_counter() - started < 1
+    backend.gate.set()
+
+    # An abandoned scan leaves the previous results alone
+    assert reg_mgr.snapshot == {}
+    assert reg_mgr.last_changes == {'added': [], 'modified': [], 'removed': []}
@@ -0,0 +1,105 @@
+import io
+import json
+import threading
+
+from backend.registry_backend import MemoryBackend, HKEY_LOCAL_MACHINE
+from backend.registry_manager import RegistryManager
+from backend.scanner import AppScanner
+from backend.stat_cache import StatCache
+from headless import scan
+from tests.fakes import FakeTree, make_app, UNINSTALL_64
+
+def make_scanner(tree):
+    return AppScanner(stat_cache=StatCache(scandir=tree.scandir, exists=tree.exists))
+
+def test_check_many_returns_results_in_order():
+    tree = FakeTree(
+        files=[r"C:\Program Files\Good\good.exe", r"C:\Program Files\Tool\uninstall.exe"],
+    )
+    apps = [
+        make_app("Good", InstallLocation=r"C:\Program Files\Good"),
+        make_app("Gone", InstallLocation=r"C:\Program Files\Gone",
+                 UninstallString=r'"C:\Program Files\Gone\unins000.exe" /SILENT'),
+        make_app("Tool", UninstallString=r"C:\Program Files\Tool\uninstall.exe /quiet"),
+        make_app("Nothing"),
+    ]
+
+    results = make_scanner(tree).check_many(apps)
+
+    assert [status for status, _ in results] == ["Valid", "Ghost", "Valid", "Unknown"]
+    assert results[1][1] == r"Uninstaller missing: C:\Program Files\Gone\unins000.exe"
+
+def test_check_many_matches_check_app_health():
+    tree = FakeTree(files=[r"C:\Apps\A\a.exe", r"C:\Apps\B\uninstall.exe"])
+    apps = [
+        make_app("A", InstallLocation=r"C:\Apps\A"),
+        make_app("B", InstallLocation=r"C:\Apps\Missing", UninstallString=r'"C:\Apps\B\uninstall.exe"'),
+        make_app("C", InstallLocation='"C:\\Apps\\C"'),
+    ]
+
+    batch = make_scanner(tree).check_many(apps)
+    single = [make_scanner(tree).check_app_health(app) for app in apps]
+
+    assert batch == single
+
+def test_check_many_lists_each_directory_once():
+    tree = FakeTree(files=[rf"C:\Apps\App{i}\app.exe" for i in range(0, 40, 2)])
+    apps = [make_app(f"App{i}", InstallLocation=rf"C:\Apps\App{i}") for i in range(40)]
+    # The same path twice in one batch
+    apps.append(make_app("Again", InstallLocation=r"c:\apps\app0"))
+
+    results = make_scanner(tree).check_many(apps)
+
+    assert [status for status, _ in results[:4]] == ["Valid", "Ghost", "Valid", "Ghost"]
+    assert results[-1][0] == "Valid"
+    assert tree.listed == [r"C:\Apps"]
+    assert tree.checked == []
+
+def test_check_many_reuses_listings_until_begin_scan():
+    tree = FakeTree(files=[r"C:\Apps\A\a.exe"])
+    scanner = make_scanner(tree)
+    apps = [make_app("A", InstallLocation=r"C:\Apps\A")]
+
+    scanner.check_many(apps)
+    scanner.check_many(apps)
+    assert len(tree.listed) == 1
+
+    scanner.begin_scan()
+    scanner.check_many(apps)
+    assert len(tree.listed) == 2
+
+def test_msiexec_entries_without_index_are_unknown():
+    tree = FakeTree(files=[r"C:\Windows\System32\msiexec.exe"])
+    app = make_app("{12345678-ABCD-EF01-2345-6789ABCDEF01}",
+                   UninstallString="MsiExec.exe /X{12345678-ABCD-EF01-2345-6789ABCDEF01}")
+
+    [(status, _)] = make_scanner(tree).check_many([app])
+
+    assert status == "Unknown"
+
+def test_rescan_checks_reused_records_again():
+    """
+    An entry on a share that timed out is checked again by the next scan,
+    even though its registry key didn't change and the record is reused.
+    """
+    backend = MemoryBackend()
+    key = f"{UNINSTALL_64}\\Shared"
+    backend.set_value(HKEY_LOCAL_MACHINE, key, "DisplayName", "Shared Tool")
+    backend.set_value(HKEY_LOCAL_MACHINE, key, "InstallLocation", r"\\server\tools\Shared")
+    tree = FakeTree(files=[r"\\server\tools\Shared\tool.exe"])
+    online = threading.Event()
+
+    def scandir(path):
+        online.wait()
+        return tree.scandir(path)
+
+    reg_mgr = RegistryManager(backend=backend)
+    scanner = AppScanner(stat_cache=StatCache(scandir=scandir, exists=tree.exists, timeout=0.05))
+
+    assert scan(reg_mgr, scanner, False, io.StringIO())[2] == 1
+
+    online.set()
+    out = io.StringIO()
+    assert scan(reg_mgr, scanner, False, out) == (1, [], 0)
+    assert reg_mgr.last_changes == {'added': [], 'modified': [], 'removed': []}
+    assert json.loads(out.getvalue())['status'] == "Valid"
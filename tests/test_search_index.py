@@ -0,0 +1,63 @@
+from backend.search_index import SearchIndex, parse_query, split_words
+
+def app(name, publisher="", status="Valid", size=None, location=""):
+    record = {'DisplayName': name, 'Publisher': publisher, 'Status': status,
+              'InstallLocation': location, 'root_key': "HKLM"}
+    if size is not None:
+        record['EstimatedSize'] = size
+    return record
+
+def names(apps):
+    return [a['DisplayName'] for a in apps]
+
+def test_split_words_keeps_quotes_and_backslashes():
+    assert split_words('path:"c:\\program files\\app" foo') == ['path:c:\\program files\\app', 'foo']
+    assert split_words("'half typed") == ['half typed']
+    assert split_words('  a   b ') == ['a', 'b']
+
+def test_parse_query_fields_and_free_text():
+    assert parse_query("") == {}
+    assert parse_query("  Visual Studio ") == {'name': ['visual studio']}
+    assert parse_query("publisher:adobe reader status:gh") == {
+        'publisher': ['adobe'], 'status': ['gh'], 'name': ['reader']}
+    # Unknown fields are plain text; empty values are dropped
+    assert parse_query("foo:bar status:") == {'name': ['foo:bar']}
+
+def test_refined_query_is_narrowed_and_invalidated_on_update():
+    apps = [app("Adobe Reader"), app("Adobe Acrobat"), app("Notepad++")]
+    index = SearchIndex(apps)
+    assert names(index.search("adobe")) == ["Adobe Reader", "Adobe Acrobat"]
+    assert names(index.search("adobe r")) == ["Adobe Reader"]
+
+    apps[1]['Status'] = "Ghost"
+    index.update(apps[1])
+    # The cached "adobe" result must not hide the status change
+    assert names(index.search("adobe status:ghost")) == ["Adobe Acrobat"]
+
+def test_removed_apps_drop_out_of_cached_results():
+    apps = [app("Adobe Reader"), app("Adobe Acrobat")]
+    index = SearchIndex(apps)
+    assert len(index.search("adobe")) == 2
+    index.remove(apps[0])
+    assert names(index.search("adobe a")) == ["Adobe Acrobat"]
+    assert len(index) == 1
+
+def test_missing_trigram_short_circuits():
+    index = SearchIndex([app("Adobe Reader")])
+    assert index._candidates({'name': ['zzz']}) == []
+    # The rarest trigram of the term is the starting set
+    index = SearchIndex([app("Adobe Reader"), app("Adobe Acrobat"), app("Reader Lite")])
+    assert list(index._candidates({'name': ['adobe rea']})) == [0]
+
+def test_status_prefix_queries():
+    apps = [app("A", status="Valid"), app("B", status="Ghost"), app("C", status="Unreachable")]
+    index = SearchIndex(apps)
+    assert names(index.search("status:gh")) == ["B"]
+    assert names(index.search("status:u")) == ["C"]
+    assert names(index.search("", ghosts_only=True)) == ["B"]
+    assert index.search("status:valid", ghosts_only=True) == []
+
+def test_size_sort_tolerates_string_sizes():
+    apps = [app("A", size=300), app("B", size="20"), app("C"), app("D", size="n/a")]
+    index = SearchIndex(apps)
+    assert names(index.search("", sort='size')) == ["C", "D", "B", "A"]
@@ -0,0 +1,76 @@
+from backend.stat_cache import StatCache
+from tests.fakes import FakeTree
+
+def make_cache(tree):
+    return StatCache(scandir=tree.scandir, exists=tree.exists)
+
+def test_siblings_are_answered_from_one_listing():
+    tree = FakeTree(files=[r"C:\Apps\One\one.exe", r"C:\Apps\Two\two.exe"])
+    cache = make_cache(tree)
+
+    assert cache.exists(r"C:\Apps\One")
+    assert cache.exists(r"C:\Apps\Two")
+    assert not cache.exists(r"C:\Apps\Three")
+    assert tree.listed == [r"C:\Apps"]
+    assert tree.checked == []
+    assert cache.syscalls == 1
+    assert cache.lookups == 3
+
+def test_lookups_are_case_insensitive():
+    tree = FakeTree(files=[r"C:\Program Files\Vendor\Uninstall.exe"])
+    cache = make_cache(tree)
+
+    assert cache.exists(r"c:\PROGRAM FILES\vendor\uninstall.EXE")
+    assert cache.exists(r"C:\Program Files\Vendor\.\Uninstall.exe")
+    assert len(tree.listed) == 1
+
+def test_missing_parent_is_not_stat_directly():
+    tree = FakeTree(files=[r"C:\Apps\One\one.exe"])
+    cache = make_cache(tree)
+
+    assert not cache.exists(r"C:\Gone\Vendor\app.exe")
+    assert cache.listdir(r"C:\Gone\Vendor") == frozenset()
+    assert tree.checked == []
+
+def test_unlistable_directory_falls_back_to_direct_check():
+    tree = FakeTree(files=[r"C:\Secure\Vendor\app.exe"], denied=[r"C:\Secure\Vendor"])
+    cache = make_cache(tree)
+
+    assert cache.exists(r"C:\Secure\Vendor\app.exe")
+    assert not cache.exists(r"C:\Secure\Vendor\other.exe")
+    assert cache.listdir(r"C:\Secure\Vendor") is None
+    assert tree.checked == [r"C:\Secure\Vendor\app.exe", r"C:\Secure\Vendor\other.exe"]
+    # The failed listing is remembered like any other
+    assert tree.listed == [r"C:\Secure\Vendor"]
+
+def test_short_names_and_trailing_dots_are_checked_directly():
+    tree = FakeTree(
+        files=[r"C:\Program Files\Vendor\uninstall.exe"],
+        aliases=[r"C:\PROGRA~1\Vendor\UNINST~1.EXE", r"C:\Program Files\Vendor\uninstall.exe."],
+    )
+    cache = make_cache(tree)
+
+    assert cache.exists(r"C:\PROGRA~1\Vendor\UNINST~1.EXE")
+    assert cache.exists(r"C:\Program Files\Vendor\uninstall.exe.")
+    assert not cache.exists(r"C:\PROGRA~1\Vendor\MISSIN~1.EXE")
+    # A long name missing from the listing never costs a stat
+    assert not cache.exists(r"C:\Program Files\Vendor\missing.exe")
+    assert tree.checked == [
+        r"C:\PROGRA~1\Vendor\UNINST~1.EXE",
+        r"C:\Program Files\Vendor\uninstall.exe.",
+        r"C:\PROGRA~1\Vendor\MISSIN~1.EXE",
+    ]
+
+def test_invalidate_lists_again():
+    tree = FakeTree(files=[r"C:\Apps\One\one.exe"])
+    cache = make_cache(tree)
+
+    assert not cache.exists(r"C:\Apps\Two")
+    tree.add_dir(r"C:\Apps\Two")
+    # Still the listing from before the folder was created
+    assert not cache.exists(r"C:\Apps\Two")
+
+    cache.invalidate()
+    assert cache.exists(r"C:\Apps\Two")
+    assert len(tree.listed) == 2
+    assert cache.syscalls == 1
@@ -1,8 +1,15 @@
 import customtkinter as ctk
 from backend.registry_manager import RegistryManager
+from backend.app_identity import group_locations
 from backend.scanner import AppScanner
-from backend.backup_manager import BackupManager
+from backend.search_index import SearchIndex
+from backend.scan_cache import ScanCache
+from backend.metrics import METRICS
+from ui.virtual_list import VirtualList
 import threading
+import queue
+import logging
+import time
 from tkinter import messagebox
 import os
 import sys
@@ -11,6 +18,28 @@ import subprocess
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
+# How often streamed scan results are pulled into the list (coalesces updates)
+SCAN_DRAIN_MS = 50
+
+# Sort menu label -> SearchIndex sort key
+SORT_OPTIONS = {
+    "Scan order": None,
+    "Name": "name",
+    "Publisher": "publisher",
+    "Size": "size",
+    "Status": "status",
+}
+
+# Backups listed per page in the history window
+HISTORY_PAGE_SIZE = 50
+
+# Last scan result, shown at startup while the registry is rescanned
+SCAN_CACHE_FILE = "scan_cache.json"
+
+LIST_TITLE = "Installed Applications"
+
+DIAGNOSTICS_REFRESH_MS = 1000
+
 class AppWindow(ctk.CTk):
 # ... existing code ...
     def show_history_window(self):
@@ -39,21 +68,32 @@ class AppWindow(ctk.CTk):
         except Exception as e:
             messagebox.showerror("Error", f"Failed to restart: {e}")
 
-    def __init__(self, is_admin=False):
+    def __init__(self, is_admin=False, started_at=None):
+        """
+        started_at: time.perf_counter() value from process start, used to report time-to-first-row.
+        """
         super().__init__()
 
         self.is_admin = is_admin
+        self.started_at = started_at
+        self.first_row_shown = False
         mode_str = "Administrator" if self.is_admin else "Limited Mode"
         self.title(f"Uninstall Cleaner - {mode_str}")
         self.geometry("1100x700")
 
         # Managers
         self.reg_mgr = RegistryManager()
-        self.scanner = AppScanner()
-        self.backup_mgr = BackupManager()
+        self.scanner = AppScanner(registry_backend=self.reg_mgr.backend)
+        self._backup_mgr = None # Created on first use, see backup_mgr
+        self.scan_cache = ScanCache(SCAN_CACHE_FILE)
         self.all_apps = []
+        self.search_index = SearchIndex()
+        self.scan_queue = None
+        self.scan_revalidating = False
+        self.pending_scan = []
+        self.purged_during_scan = set() # The revalidation scan may have read them before they were deleted
+        self.restored_during_scan = set() # ...or enumerated their keys before they were restored
         self.search_delay = None
-        self.current_limit = 50
 
         # Layout Configuration
         self.grid_columnconfigure(1, weight=1)
@@ -98,6 +138,30 @@ class AppWindow(ctk.CTk):
             )
             self.btn_restart.grid(row=4, column=0, padx=20, pady=10)
 
+        # Batch purge controls
+        self.batch_frame = ctk.CTkFrame(self.sidebar_frame, fg_color="transparent")
+        self.batch_frame.grid(row=5, column=0, padx=20, pady=10, sticky="n")
+
+        self.btn_select_ghosts = ctk.CTkButton(
+            self.batch_frame,
+            text="Select Shown Ghosts",
+            fg_color="transparent",
+            border_width=1,
+            text_color=("gray10", "gray90"),
+            command=self.select_shown_ghosts
+        )
+        self.btn_select_ghosts.pack(pady=(0, 10))
+
+        self.btn_purge_selected = ctk.CTkButton(
+            self.batch_frame,
+            text="Purge Selected Ghosts (0)",
+            fg_color="darkred",
+            hover_color="#B91C1C",
+            state="disabled",
+            command=self.confirm_purge_selected
+        )
+        self.btn_purge_selected.pack()
+
         # Help Text Area in Sidebar
         self.help_label = ctk.CTkLabel(self.sidebar_frame, text="Details:", anchor="w", font=ctk.CTkFont(weight="bold"))
         self.help_label.grid(row=6, column=0, padx=20, pady=(10,0), sticky="w")
@@ -107,48 +171,251 @@ class AppWindow(ctk.CTk):
         self.help_textbox.insert("0.0", "Select an app to see details here.")
         self.help_textbox.configure(state="disabled")
 
+        self.btn_diagnostics = ctk.CTkButton(
+            self.sidebar_frame,
+            text="Diagnostics",
+            fg_color="transparent",
+            border_width=1,
+            text_color=("gray10", "gray90"),
+            command=self.show_diagnostics_window
+        )
+        self.btn_diagnostics.grid(row=8, column=0, padx=20, pady=(0, 20))
+
         # --- Main Area ---
         # Search
         self.search_var = ctk.StringVar()
         self.search_var.trace("w", self.filter_list_debounced)
-        self.entry_search = ctk.CTkEntry(self, placeholder_text="Search apps...", textvariable=self.search_var)
-        self.entry_search.grid(row=0, column=1, padx=(20, 20), pady=(20, 10), sticky="ew")
-
-        # Scrollable List
-        self.scrollable_frame = ctk.CTkScrollableFrame(self, label_text="Installed Applications")
-        self.scrollable_frame.grid(row=1, column=1, padx=(20, 20), pady=(10, 20), sticky="nsew")
-        self.scrollable_frame.grid_columnconfigure(0, weight=1) # Name
-        self.scrollable_frame.grid_columnconfigure(1, weight=0) # Status
-        self.scrollable_frame.grid_columnconfigure(2, weight=0) # Action
-
-        # Initial Load
-        self.refresh_list()
-
-    def refresh_list(self):
-        # Clear existing
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-            
-        self.help_textbox.configure(state="normal")
-        self.help_textbox.delete("0.0", "end")
-        self.help_textbox.insert("0.0", "Scanning registry...")
-        self.help_textbox.configure(state="disabled")
-        self.update() # Force redraw to show scanning text
+        self.entry_search = ctk.CTkEntry(
+            self,
+            placeholder_text="Search apps... (e.g. publisher:adobe status:ghost)",
+            textvariable=self.search_var
+        )
+        self.entry_search.grid(row=0, column=1, padx=(20, 10), pady=(20, 10), sticky="ew")
+
+        # Sort order (ranks are precomputed by the search index)
+        self.sort_var = ctk.StringVar(value="Scan order")
+        self.menu_sort = ctk.CTkOptionMenu(
+            self,
+            values=list(SORT_OPTIONS),
+            variable=self.sort_var,
+            width=140,
+            command=lambda _: self.reset_and_filter()
+        )
+        self.menu_sort.grid(row=0, column=2, padx=(0, 20), pady=(20, 10))
+
+        # Virtualized list: a fixed pool of row widgets rebound on scroll
+        self.app_list = VirtualList(
+            self,
+            label_text=LIST_TITLE,
+            on_select=self.show_details,
+            on_action=self.confirm_remove,
+            on_selection_change=self.update_selection_count
+        )
+        self.app_list.grid(row=1, column=1, columnspan=2, padx=(20, 20), pady=(10, 20), sticky="nsew")
+
+        # Initial Load: show the last scan right away if there is one,
+        # then rescan in the background and patch in only what changed
+        if not self.show_cached_scan():
+            self.refresh_list()
+
+    @property
+    def backup_mgr(self):
+        # Backups (and the modules behind them) aren't needed to show the list
+        if self._backup_mgr is None:
+            from backend.backup_manager import BackupManager
+            self._backup_mgr = BackupManager(backend=self.reg_mgr.backend)
+        return self._backup_mgr
+
+    def show_cached_scan(self):
+        """
+        Renders the cached result of the previous scan, marked as stale, and starts revalidating it.
+        Returns False if there is no usable cache.
+        """
+        apps, saved_at = self.scan_cache.load()
+        if not apps:
+            return False
 
-        # Threading scanning to prevent freeze
-        threading.Thread(target=self._scan_thread, daemon=True).start()
+        self.all_apps = apps
+        self.search_index = SearchIndex(apps)
+        self.refresh_list(revalidate=True)
+        self.app_list.header.configure(text=f"{LIST_TITLE} (last scan, checking for changes...)")
+        self._perform_filter()
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(saved_at)) if saved_at else "an earlier run"
+        self._show_help(f"Showing {len(apps)} apps from the scan of {when}.\nChecking for changes...")
+        return True
 
-    def _scan_thread(self):
-        apps = self.reg_mgr.get_installed_apps()
-        # Analyze ghosts
-        for app in apps:
-            status, reason = self.scanner.check_app_health(app)
+    def refresh_list(self, revalidate=False):
+        """
+        Rescans the registry.
+        revalidate: Keep the current rows on screen and apply only the differences
+                    once the scan is complete (used after showing the cached scan).
+        """
+        # Results stream in through a queue; each scan gets its own so a
+        # superseded scan can't leak rows into the new list
+        self.scan_queue = queue.Queue()
+        self.scan_revalidating = revalidate
+        self.pending_scan = []
+        self.purged_during_scan = set()
+        self.restored_during_scan = set()
+
+        if not revalidate:
+            # Clear existing
+            self.app_list.set_items([], keep_offset=False)
+            self.app_list.header.configure(text=LIST_TITLE)
+
+            self.help_textbox.configure(state="normal")
+            self.help_textbox.delete("0.0", "end")
+            self.help_textbox.insert("0.0", "Scanning registry...")
+            self.help_textbox.configure(state="disabled")
+            self.update() # Force redraw to show scanning text
+
+            self.all_apps = []
+            self.search_index = SearchIndex()
+
+        # Threading scanning to prevent freeze
+        threading.Thread(target=self._scan_thread, args=(self.scan_queue,), daemon=True).start()
+        self.after(SCAN_DRAIN_MS, self._drain_scan_queue, self.scan_queue)
+
+    def _scan_thread(self, scan_queue):
+        with METRICS.span("ui.scan"):
+            self._run_scan(scan_queue)
+
+    def _run_scan(self, scan_queue):
+        self.scanner.begin_scan()
+        # Small first batch so the first rows show up almost immediately,
+        # then bigger ones to keep the thread pool busy
+        batch_size = 8
+        batch = []
+        try:
+            for app in self.reg_mgr.iter_installed_apps():
+                batch.append(app)
+                if len(batch) >= batch_size:
+                    self._check_batch(batch, scan_queue)
+                    batch = []
+                    batch_size = min(batch_size * 2, 256)
+            if batch:
+                self._check_batch(batch, scan_queue)
+        finally:
+            stats = self.scanner.stat_cache
+            logging.getLogger(__name__).info(
+                f"Scan finished: {stats.syscalls} filesystem calls for {stats.lookups} lookups"
+            )
+            if stats.unreachable_volumes:
+                logging.getLogger(__name__).warning(
+                    f"Unreachable volumes skipped: {', '.join(stats.unreachable_volumes)}"
+                )
+            scan_queue.put(None) # Done
+
+    def _check_batch(self, batch, scan_queue):
+        # Analyze ghosts (paths are probed in parallel and deduplicated).
+        # Entries reused from the registry snapshot keep their previous result,
+        # unless it was Unreachable (RegistryManager drops those so they are retried).
+        pending = [app for app in batch if 'Status' not in app]
+        results = self.scanner.check_many(pending)
+        for app, (status, reason) in zip(pending, results):
             app['Status'] = status
             app['Reason'] = reason
-        
-        self.all_apps = apps
-        # Update UI in main thread
-        self.after(0, lambda: self.reset_and_filter())
+        scan_queue.put(batch)
+
+    def _drain_scan_queue(self, scan_queue):
+        if scan_queue is not self.scan_queue:
+            return # A newer scan took over
+
+        # Take everything that arrived since the last tick, then update the UI once
+        finished = False
+        received = False
+        while True:
+            try:
+                batch = scan_queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            if self.scan_revalidating:
+                # The stale rows stay up until the scan is complete
+                self.pending_scan.extend(batch)
+                continue
+            self.all_apps.extend(batch)
+            self.search_index.add(batch)
+            received = True
+
+        if finished:
+            if self.scan_revalidating:
+                self._apply_scan_diff(self.pending_scan)
+                self.pending_scan = []
+            else:
+                self.reset_and_filter()
+            self._save_scan_cache()
+            return
+
+        if received:
+            self._perform_filter()
+            self.help_textbox.configure(state="normal")
+            self.help_textbox.delete("0.0", "end")
+            self.help_textbox.insert("0.0", f"Scanning registry...\n{len(self.all_apps)} apps found so far.")
+            self.help_textbox.configure(state="disabled")
+        self.after(SCAN_DRAIN_MS, self._drain_scan_queue, scan_queue)
+
+    def _apply_scan_diff(self, fresh):
+        """
+        Replaces the stale rows with the result of the revalidation scan.
+        Unchanged apps keep their record (and row/selection state); only added,
+        changed and removed apps touch the search index.
+        """
+        old_by_id = {app.unique_id: app for app in self.all_apps}
+        merged = []
+        new_records = []
+        changed = 0
+        for app in fresh:
+            if app.unique_id in self.purged_during_scan:
+                continue
+            old = old_by_id.pop(app.unique_id, None)
+            if old is not None and old.to_dict() == app.to_dict():
+                merged.append(old)
+                continue
+            if old is not None:
+                changed += 1
+                self.search_index.remove(old)
+            new_records.append(app)
+            merged.append(app)
+
+        # Restored after the scan had enumerated their keys: still there, just not seen
+        for unique_id, old in list(old_by_id.items()):
+            if any(location.unique_id in self.restored_during_scan for location in old.locations):
+                merged.append(old)
+                del old_by_id[unique_id]
+
+        # Whatever is left was not found by the scan anymore
+        for old in old_by_id.values():
+            self.search_index.remove(old)
+        self.search_index.add(new_records)
+        self.all_apps = merged
+        self.app_list.selected -= set(old_by_id)
+
+        added = len(new_records) - changed
+        removed = len(old_by_id)
+        logging.getLogger(__name__).info(
+            f"Revalidated cached scan: {added} added, {changed} changed, {removed} removed"
+        )
+        self.app_list.header.configure(text=LIST_TITLE)
+        self._perform_filter()
+        self.update_selection_count(self.app_list.selected)
+        self._show_help(
+            f"Scan complete: {len(merged)} apps.\n"
+            f"Since the last run: {added} new, {changed} changed, {removed} gone."
+        )
+
+    def _save_scan_cache(self):
+        # Serializing a few thousand records is quick, but keep it off the UI thread anyway
+        apps = list(self.all_apps)
+        threading.Thread(target=self.scan_cache.save, args=(apps,), daemon=True).start()
+
+    def _report_first_row(self, source):
+        if self.started_at is None:
+            return
+        elapsed = (time.perf_counter() - self.started_at) * 1000
+        logging.getLogger(__name__).info(f"Time to first row: {elapsed:.0f} ms ({source})")
 
     def filter_list_debounced(self, *args):
         # Triggered by typing: reset limit and debounce
@@ -158,91 +425,44 @@ class AppWindow(ctk.CTk):
 
     def reset_and_filter(self):
         # Triggered by Search or Toggle
-        self.current_limit = 50
         self._perform_filter()
-        # Fix scroll bug: Reset to top when filter changes
-        self.scrollable_frame._parent_canvas.yview_moveto(0.0)
+        # Reset to top when filter changes
+        self.app_list.scroll_to(0)
 
     def _perform_filter(self):
-        query = self.search_var.get().lower()
-        show_ghosts = self.var_show_ghosts.get()
-        
-        filtered = []
-        for a in self.all_apps:
-            # 1. Ghost Filter
-            if show_ghosts and a.get('Status') != "Ghost":
-                continue
-            
-            # 2. Search Filter
-            if query in a.get('DisplayName', '').lower():
-                filtered.append(a)
-                
-        self.render_list(filtered)
+        # Supports plain name search plus field queries like "publisher:adobe status:ghost"
+        with METRICS.timer("ui.filter"):
+            filtered = self.search_index.search(
+                self.search_var.get(),
+                ghosts_only=self.var_show_ghosts.get(),
+                sort=SORT_OPTIONS[self.sort_var.get()]
+            )
+        with METRICS.timer("ui.render"):
+            self.render_list(filtered)
 
     def render_list(self, apps_to_show):
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-
         self.help_textbox.configure(state="normal")
         self.help_textbox.delete("0.0", "end")
         self.help_textbox.insert("0.0", f"Found {len(apps_to_show)} apps.\nSelect one for details.")
         self.help_textbox.configure(state="disabled")
 
-        # Pagination
-        displayed_apps = apps_to_show[:self.current_limit]
-
-        for i, app in enumerate(displayed_apps):
-            # Use grid in scrollable frame
-            name = app.get('DisplayName', 'Unknown')
-            status = app.get('Status', 'Unknown')
-            
-            # Color coding
-            status_color = "green" if status == "Valid" else "red" if status == "Ghost" else "orange"
-            
-            # Truncate long names
-            display_name = (name[:40] + '...') if len(name) > 40 else name
-            
-            lbl_name = ctk.CTkLabel(self.scrollable_frame, text=display_name, anchor="w")
-            lbl_name.grid(row=i, column=0, padx=10, pady=5, sticky="w")
-            # Bind click for details
-            lbl_name.bind("<Button-1>", lambda event, a=app: self.show_details(a))
-
-            lbl_status = ctk.CTkLabel(self.scrollable_frame, text=status, text_color=status_color, width=60)
-            lbl_status.grid(row=i, column=1, padx=10, pady=5)
-            lbl_status.bind("<Button-1>", lambda event, a=app: self.show_details(a))
-
-            btn_action = ctk.CTkButton(
-                self.scrollable_frame, 
-                text="Remove" if status == "Ghost" else "Force Del",
-                fg_color="darkred" if status == "Ghost" else "#D97706", # Red for Ghost, Orange for Force
-                hover_color="#B91C1C" if status == "Ghost" else "#B45309",
-                width=80,
-                command=lambda a=app: self.confirm_remove(a)
-            )
-            btn_action.grid(row=i, column=2, padx=10, pady=5)
-            
-        # Load More Button
-        if len(apps_to_show) > self.current_limit:
-            remaining = len(apps_to_show) - self.current_limit
-            btn_load_more = ctk.CTkButton(
-                self.scrollable_frame,
-                text=f"Load More ({remaining})",
-                fg_color="transparent",
-                border_width=1,
-                text_color=("gray10", "gray90"),
-                command=self.load_more
-            )
-            btn_load_more.grid(row=len(displayed_apps), column=0, columnspan=3, pady=20)
+        # Only the rows in view get (re)bound, however many apps matched
+        self.app_list.set_items(apps_to_show)
 
-    def load_more(self):
-        self.current_limit += 50
-        self._perform_filter()
+        if apps_to_show and not self.first_row_shown:
+            self.first_row_shown = True
+            source = "cached scan" if self.scan_revalidating else "live scan"
+            # Measured once Tk has drawn the pending rows
+            self.after_idle(self._report_first_row, source)
 
     def show_details(self, app):
         text = f"Name: {app.get('DisplayName')}\n"
         text += f"Status: {app.get('Status')}\n"
         text += f"Reason: {app.get('Reason')}\n\n"
-        text += f"Registry Path: {app.get('registry_path')}\n\n"
+        text += f"Registry Path: {app.get('registry_path')}\n"
+        for location in app.locations[1:]:
+            text += f"Also registered at: {location.root_key}\\{location.registry_path}\n"
+        text += "\n"
         text += f"Install Location: {app.get('InstallLocation')}\n"
         text += f"Uninstall String: {app.get('UninstallString')}\n"
         
@@ -252,6 +472,7 @@ class AppWindow(ctk.CTk):
         self.help_textbox.configure(state="disabled")
 
     def confirm_remove(self, app):
+        locations = app.locations
         msg = f"Are you sure you want to remove the registry entry for:\n\n{app.get('DisplayName')}\n\nA backup will be created before deletion."
         
         if app['Status'] == "Valid":
@@ -262,26 +483,201 @@ class AppWindow(ctk.CTk):
                    f"It will only remove the record from Windows Settings.\n\n"
                    f"Are you strictly sure you want to proceed?")
 
+        # Appended to either message: a forced removal takes every copy with it too
+        if len(locations) > 1:
+            msg += f"\n\nThe app is registered in {len(locations)} places; all of them are removed."
+
         confirm = messagebox.askyesno("Confirm Deletion", msg)
         
         if confirm:
             try:
-                # 1. Backup
-                backup_file = self.backup_mgr.backup_registry_key(app['root_key'], app['registry_path'], app['DisplayName'])
+                # 1. Backup (one file covering every location of the app)
+                if len(locations) == 1:
+                    backup_file = self.backup_mgr.backup_registry_key(app['root_key'], app['registry_path'], app['DisplayName'])
+                else:
+                    keys = [(a['root_key'], a['registry_path']) for a in locations]
+                    backup_file = self.backup_mgr.backup_registry_keys(keys, app['DisplayName'])
                 
                 # 2. Delete
-                self.reg_mgr.delete_registry_key(app['root_key'], app['registry_path'], app['wow64_flag'])
+                removed = []
+                try:
+                    for location in locations:
+                        removed.append(self.reg_mgr.delete_registry_key(
+                            location['root_key'], location['registry_path'], location['wow64_flag']
+                        ))
+                except Exception:
+                    if removed:
+                        # Don't leave the app registered in only some of its places
+                        self.backup_mgr.restore_backup(backup_file)
+                    raise
                 
                 messagebox.showinfo("Success", f"Entry removed.\nBackup saved to: {backup_file}")
-                self.refresh_list()
+                self._remove_from_list(removed)
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Operation failed: {str(e)}\n\nTry running as Administrator.")
 
+    def update_selection_count(self, selected):
+        count = len(self._selected_ghosts())
+        self.btn_purge_selected.configure(
+            text=f"Purge Selected Ghosts ({count})",
+            state="normal" if count else "disabled"
+        )
+
+    def _selected_ghosts(self):
+        selected = self.app_list.selected
+        return [a for a in self.all_apps if a.get('Status') == "Ghost" and a.unique_id in selected]
+
+    def select_shown_ghosts(self):
+        shown = [a.unique_id for a in self.app_list.items if a.get('Status') == "Ghost"]
+        self.app_list.set_selected(self.app_list.selected | set(shown))
+
+    def confirm_purge_selected(self):
+        apps = self._selected_ghosts()
+        if not apps:
+            return
+
+        msg = (f"Remove the registry entries of {len(apps)} ghost apps?\n\n"
+               f"One backup containing all of them will be created first. "
+               f"If any deletion fails, the whole batch is restored from it.")
+        if not messagebox.askyesno("Confirm Batch Deletion", msg):
+            return
+
+        self.btn_purge_selected.configure(state="disabled")
+        self.btn_scan.configure(state="disabled")
+        self._show_help(f"Backing up {len(apps)} entries...")
+        threading.Thread(target=self._purge_thread, args=(apps,), daemon=True).start()
+
+    def _purge_thread(self, apps):
+        try:
+            # 1. One consolidated backup for the whole batch, every location of each app
+            keys = [(a['root_key'], a['registry_path']) for app in apps for a in app.locations]
+            backup_file = self.backup_mgr.backup_registry_keys(keys, f"Batch purge {len(apps)} apps")
+        except Exception as e:
+            error = f"Backup failed: {e}"
+            self.after(0, lambda: self._purge_finished([], None, error))
+            return
+
+        # 2. Delete, rolling the whole batch back on the first failure
+        removed = []
+        for i, app in enumerate(apps, 1):
+            try:
+                for location in app.locations:
+                    removed.append(self.reg_mgr.delete_registry_key(
+                        location['root_key'], location['registry_path'], location['wow64_flag']
+                    ))
+            except Exception as e:
+                error = f"Deleting '{app.get('DisplayName')}' failed: {e}"
+                try:
+                    self.backup_mgr.restore_backup(backup_file)
+                    error += "\n\nAll entries of this batch were restored from the backup."
+                except Exception as restore_error:
+                    error += f"\n\nRollback failed: {restore_error}\nBackup file: {backup_file}"
+                self.after(0, lambda: self._purge_finished([], backup_file, error))
+                return
+            if i % 10 == 0 or i == len(apps):
+                self.after(0, lambda i=i: self._show_help(f"Purging... {i}/{len(apps)}"))
+
+        self.after(0, lambda: self._purge_finished(removed, backup_file, None))
+
+    def _purge_finished(self, removed, backup_file, error):
+        """
+        removed: unique_ids of the deleted entries.
+        """
+        self.btn_scan.configure(state="normal")
+        if removed:
+            self._remove_from_list(removed)
+        self.update_selection_count(self.app_list.selected)
+
+        if error:
+            messagebox.showerror("Error", f"Batch purge failed: {error}\n\nTry running as Administrator.")
+        else:
+            messagebox.showinfo("Success", f"{len(removed)} entries removed.\nBackup saved to: {backup_file}")
+
+    def _remove_from_list(self, unique_ids):
+        """
+        Drops deleted entries from the list and the search index in place, instead of rescanning.
+        unique_ids: The deleted registry locations; an app stays listed while it has others left.
+        """
+        removed_ids = set(unique_ids)
+        kept = []
+        for app in self.all_apps:
+            remaining = [location for location in app.locations if location.unique_id not in removed_ids]
+            if not remaining:
+                self.search_index.remove(app)
+                continue
+            if remaining[0] is not app:
+                # The listed location is gone; another one carries the app (and its row) now
+                self.search_index.remove(app)
+                primary = remaining[0]
+                primary.status, primary.reason = app.status, app.reason
+                self.search_index.add([primary])
+                app = primary
+            app.duplicates = remaining[1:] or None
+            kept.append(app)
+        self.all_apps = kept
+        self.app_list.selected -= removed_ids
+        if self.scan_revalidating:
+            self.purged_during_scan |= removed_ids
+            self.restored_during_scan -= removed_ids
+        self._perform_filter()
+        self.update_selection_count(self.app_list.selected)
+        self._save_scan_cache()
+
+    def _reload_entries(self, unique_ids):
+        """
+        Re-reads just these registry entries (e.g. the keys a restore brought back),
+        regroups and health-checks them and patches them into the list where they were.
+        Every other record and row stays as it is.
+        """
+        wanted = {unique_id.lower() for unique_id in unique_ids}
+        fresh = [app for app in map(self.reg_mgr.read_app, unique_ids) if app is not None]
+
+        merged = []
+        survivors = [] # Locations of affected apps that were not re-read
+        position = None
+        for old in self.all_apps:
+            if all(location.unique_id.lower() not in wanted for location in old.locations):
+                merged.append(old)
+                continue
+            self.search_index.remove(old)
+            if position is None:
+                position = len(merged)
+            survivors.extend(location for location in old.locations if location.unique_id.lower() not in wanted)
+
+        # A restored key matching an app that is still listed becomes another location of it
+        added = list(group_locations(survivors + fresh, listed=merged))
+        pending = [app for app in added if 'Status' not in app]
+        # The stat cache of the last scan is kept: restoring registry keys doesn't touch any files
+        for app, (status, reason) in zip(pending, self.scanner.check_many(pending)):
+            app['Status'] = status
+            app['Reason'] = reason
+
+        if position is None:
+            position = len(merged)
+        merged[position:position] = added
+        self.search_index.add(added)
+        self.all_apps = merged
+        # A running revalidation must not drop entries that were purged and are now back,
+        # nor restored ones whose keys it enumerated before the restore
+        restored_ids = {app.unique_id for app in fresh}
+        self.purged_during_scan -= restored_ids
+        if self.scan_revalidating:
+            self.restored_during_scan |= restored_ids
+        self._perform_filter()
+        self.update_selection_count(self.app_list.selected)
+        self._save_scan_cache()
+
+    def _show_help(self, text):
+        self.help_textbox.configure(state="normal")
+        self.help_textbox.delete("0.0", "end")
+        self.help_textbox.insert("0.0", text)
+        self.help_textbox.configure(state="disabled")
+
     def show_history_window(self):
         history_window = ctk.CTkToplevel(self)
         history_window.title("Restore Backup")
-        history_window.geometry("600x400")
+        history_window.geometry("700x500")
         
         # Ensure it pops up in front of the main UI
         history_window.lift()
@@ -290,44 +686,188 @@ class AppWindow(ctk.CTk):
         
         lbl_title = ctk.CTkLabel(history_window, text="Backup History", font=ctk.CTkFont(size=18, weight="bold"))
         lbl_title.pack(pady=10)
+
+        # Search box and "Restore Selected" share the top bar
+        top_bar = ctk.CTkFrame(history_window, fg_color="transparent")
+        top_bar.pack(fill="x", padx=20)
+
+        # Several backups can be checked and restored in one go; kept across pages
+        selected = set()
+        btn_restore_selected = ctk.CTkButton(
+            top_bar,
+            text="Restore Selected",
+            command=lambda: self.perform_bulk_restore(sorted(selected), history_window)
+        )
+        btn_restore_selected.pack(side="right")
+
+        entry_search = ctk.CTkEntry(top_bar, placeholder_text="Search backups (name or key path)...")
+        entry_search.pack(side="left", fill="x", expand=True, padx=(0, 10))
         
         scroll_frame = ctk.CTkScrollableFrame(history_window)
         scroll_frame.pack(fill="both", expand=True, padx=20, pady=10)
-        
-        backups = [f for f in os.listdir(self.backup_mgr.backup_dir) if f.endswith(".reg")]
-        backups.sort(key=lambda x: os.path.getmtime(os.path.join(self.backup_mgr.backup_dir, x)), reverse=True)
-        
-        if not backups:
-            ctk.CTkLabel(scroll_frame, text="No backups found.").pack(pady=20)
-            return
 
-        for f in backups:
-            row = ctk.CTkFrame(scroll_frame)
-            row.pack(fill="x", padx=5, pady=5)
-            
-            lbl_name = ctk.CTkLabel(row, text=f, anchor="w")
-            lbl_name.pack(side="left", padx=10)
-            
-            btn_restore = ctk.CTkButton(
-                row, 
-                text="Restore", 
-                width=80,
-                command=lambda fname=f: self.perform_restore(fname, history_window)
-            )
-            btn_restore.pack(side="right", padx=10)
+        # Paging controls
+        nav_bar = ctk.CTkFrame(history_window, fg_color="transparent")
+        nav_bar.pack(fill="x", padx=20, pady=(0, 10))
+        btn_prev = ctk.CTkButton(nav_bar, text="< Newer", width=80)
+        btn_prev.pack(side="left")
+        btn_next = ctk.CTkButton(nav_bar, text="Older >", width=80)
+        btn_next.pack(side="right")
+        lbl_page = ctk.CTkLabel(nav_bar, text="")
+        lbl_page.pack(side="left", expand=True)
+
+        state = {'offset': 0, 'search_delay': None}
+        catalog = self.backup_mgr.catalog
+
+        def show_page():
+            # Only one page of rows exists at a time, however many backups there are
+            for child in scroll_frame.winfo_children():
+                child.destroy()
+
+            entries, total = catalog.query(entry_search.get(), state['offset'], HISTORY_PAGE_SIZE)
+            if not entries:
+                ctk.CTkLabel(scroll_frame, text="No backups found.").pack(pady=20)
+
+            for entry in entries:
+                self._history_row(scroll_frame, entry, selected, history_window)
+
+            pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+            page = state['offset'] // HISTORY_PAGE_SIZE + 1
+            lbl_page.configure(text=f"Page {page} of {pages} ({total} backups)")
+            btn_prev.configure(state="normal" if state['offset'] > 0 else "disabled")
+            btn_next.configure(state="normal" if state['offset'] + HISTORY_PAGE_SIZE < total else "disabled")
+
+        def turn_page(step):
+            state['offset'] = max(0, state['offset'] + step * HISTORY_PAGE_SIZE)
+            show_page()
+
+        def search_changed(*args):
+            if state['search_delay']:
+                history_window.after_cancel(state['search_delay'])
+            state['offset'] = 0
+            state['search_delay'] = history_window.after(300, show_page)
+
+        btn_prev.configure(command=lambda: turn_page(-1))
+        btn_next.configure(command=lambda: turn_page(1))
+        entry_search.bind("<KeyRelease>", search_changed)
+
+        if catalog.needs_import():
+            # First run with the catalog: index the backups made by older versions off the UI thread
+            ctk.CTkLabel(scroll_frame, text="Indexing existing backups...").pack(pady=20)
+
+            def import_thread():
+                try:
+                    catalog.import_existing()
+                except Exception as e:
+                    logging.error(f"Backup import failed: {e}")
+                # The window may have been closed in the meantime
+                self.after(0, lambda: history_window.winfo_exists() and show_page())
+
+            threading.Thread(target=import_thread, daemon=True).start()
+        else:
+            show_page()
+
+    def _history_row(self, parent, entry, selected, history_window):
+        fname = entry['file']
+        row = ctk.CTkFrame(parent)
+        row.pack(fill="x", padx=5, pady=5)
+
+        var_selected = ctk.BooleanVar(value=fname in selected)
+        chk_select = ctk.CTkCheckBox(
+            row,
+            text="",
+            width=24,
+            variable=var_selected,
+            command=lambda: selected.add(fname) if var_selected.get() else selected.discard(fname)
+        )
+        chk_select.pack(side="left", padx=(10, 0))
+
+        keys = entry.get('keys') or []
+        detail = keys[0] if len(keys) == 1 else f"{len(keys)} keys"
+        text = f"{entry['app_name']}  -  {entry['timestamp'].replace('T', ' ')}\n{detail}"
+        lbl_name = ctk.CTkLabel(row, text=text, anchor="w", justify="left")
+        lbl_name.pack(side="left", padx=10)
+        
+        btn_restore = ctk.CTkButton(
+            row, 
+            text="Restore", 
+            width=80,
+            command=lambda: self.perform_restore(fname, history_window)
+        )
+        btn_restore.pack(side="right", padx=10)
 
     def perform_restore(self, filename, window):
         confirm = messagebox.askyesno("Confirm Restore", f"Are you sure you want to restore:\n{filename}?")
         if confirm:
             try:
                 filepath = os.path.join(self.backup_mgr.backup_dir, filename)
-                self.backup_mgr.restore_backup(filepath)
-                messagebox.showinfo("Success", "Registry key restored successfully.\nYou may need to restart the app or computer to see changes.")
+                restored = self.backup_mgr.restore_backup(filepath)
+                messagebox.showinfo("Success", "Registry key restored successfully.")
                 window.destroy()
-                self.refresh_list()
+                self._reload_entries(restored)
             except Exception as e:
                 messagebox.showerror("Error", f"Restore failed: {str(e)}")
 
+    def perform_bulk_restore(self, filenames, window):
+        if not filenames:
+            messagebox.showinfo("Restore", "Select one or more backups first.")
+            return
+
+        filepaths = [os.path.join(self.backup_mgr.backup_dir, f) for f in filenames]
+        try:
+            # Dry run first so the user sees what will actually change
+            changes = self.backup_mgr.restore_backups(filepaths, dry_run=True)
+        except Exception as e:
+            messagebox.showerror("Error", f"Restore failed: {str(e)}")
+            return
+
+        if not changes:
+            messagebox.showinfo("Restore", "The registry already matches the selected backups.")
+            return
+
+        preview = "\n".join(f"{change}: {desc}" for change, desc in changes[:15])
+        if len(changes) > 15:
+            preview += f"\n... and {len(changes) - 15} more"
+        confirm = messagebox.askyesno(
+            "Confirm Restore",
+            f"Restoring {len(filenames)} backups will make {len(changes)} changes:\n\n{preview}\n\nContinue?"
+        )
+        if confirm:
+            try:
+                restored = self.backup_mgr.restore_backups(filepaths)
+                messagebox.showinfo("Success", f"{len(filenames)} backups restored.")
+                window.destroy()
+                self._reload_entries(restored)
+            except Exception as e:
+                messagebox.showerror("Error", f"Restore failed: {str(e)}")
+
+    def show_diagnostics_window(self):
+        """
+        Live view of the counters and phase timings collected by backend.metrics.
+        """
+        window = ctk.CTkToplevel(self)
+        window.title("Diagnostics")
+        window.geometry("760x520")
+        window.lift()
+        window.focus_force()
+        window.after(10, window.lift)
+
+        textbox = ctk.CTkTextbox(window, font=ctk.CTkFont(family="Consolas", size=12), wrap="none")
+        textbox.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            textbox.configure(state="normal")
+            textbox.delete("0.0", "end")
+            textbox.insert("0.0", METRICS.format_report())
+            textbox.configure(state="disabled")
+            # Keeps updating while a scan is running; stops when the window is closed
+            window.after(DIAGNOSTICS_REFRESH_MS, refresh)
+
+        ctk.CTkButton(window, text="Reset Counters", command=METRICS.reset).pack(pady=(0, 10))
+        refresh()
+
     def trigger_restart(self):
         """
         Restarts the application, attempting to elevate permissions.
@@ -0,0 +1,221 @@
+import customtkinter as ctk
+from backend.metrics import METRICS
+
+class _Row:
+    """
+    One recycled row: the widgets stay alive, only the bound item changes.
+    """
+    __slots__ = ("chk_select", "lbl_name", "lbl_status", "btn_action", "item", "state")
+
+    def __init__(self, chk_select, lbl_name, lbl_status, btn_action):
+        self.chk_select = chk_select
+        self.lbl_name = lbl_name
+        self.lbl_status = lbl_status
+        self.btn_action = btn_action
+        self.item = None
+        self.state = None # Last (name, status, selected) drawn, to skip redundant configure calls
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Scrollable list of apps that only creates widgets for the rows that fit the viewport.
+    Scrolling rebinds the same row widgets to different items, so showing a new
+    result set costs time proportional to the visible rows, not the number of items.
+    Checked items are tracked by unique_id in self.selected, independent of the widgets.
+    """
+    def __init__(self, master, on_select, on_action, on_selection_change=None, row_height=36, label_text=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_select = on_select
+        self.on_action = on_action
+        self.on_selection_change = on_selection_change
+        self.selected = set()
+        self.row_height = row_height
+        self.items = []
+        self.offset = 0
+        self.rows = []
+        self._visible = 0 # Rows that fit the viewport
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        if label_text:
+            self.header = ctk.CTkLabel(self, text=label_text, font=ctk.CTkFont(weight="bold"))
+            self.header.grid(row=0, column=0, columnspan=2, padx=10, pady=(5, 0), sticky="ew")
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew")
+        self.body.grid_columnconfigure(0, weight=0) # Select
+        self.body.grid_columnconfigure(1, weight=1) # Name
+        self.body.grid_columnconfigure(2, weight=0) # Status
+        self.body.grid_columnconfigure(3, weight=0) # Action
+        # Keep the pool from resizing the frame it is measured against
+        self.body.grid_propagate(False)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+
+        self.body.bind("<Configure>", self._on_configure)
+        self._bind_wheel(self.body)
+
+    # --- public API ---
+
+    def set_items(self, items, keep_offset=True):
+        self.items = items
+        if not keep_offset:
+            self.offset = 0
+        self._clamp_offset()
+        self._refresh()
+
+    def scroll_to(self, index):
+        self.offset = index
+        self._clamp_offset()
+        self._refresh()
+
+    def set_selected(self, unique_ids):
+        self.selected = set(unique_ids)
+        self._refresh()
+        if self.on_selection_change:
+            self.on_selection_change(self.selected)
+
+    def refresh(self):
+        """
+        Redraws visible rows, e.g. after the bound items changed in place.
+        """
+        for row in self.rows:
+            row.state = None
+        self._refresh()
+
+    # --- pool management ---
+
+    def _on_configure(self, event):
+        wanted = max(1, event.height // self.row_height)
+        while len(self.rows) < wanted:
+            self.rows.append(self._create_row(len(self.rows)))
+        # Rows beyond the viewport are hidden but kept for when the window grows again
+        self._visible = wanted
+        self._clamp_offset()
+        self._refresh()
+
+    def _create_row(self, i):
+        chk_select = ctk.CTkCheckBox(self.body, text="", width=24)
+        lbl_name = ctk.CTkLabel(self.body, text="", anchor="w")
+        lbl_status = ctk.CTkLabel(self.body, text="", width=80)
+        btn_action = ctk.CTkButton(self.body, text="", width=80)
+        row = _Row(chk_select, lbl_name, lbl_status, btn_action)
+        METRICS.incr("ui.widgets_created", 4)
+
+        # Bound once; the handlers look up whatever item the row currently shows
+        lbl_name.bind("<Button-1>", lambda event, r=row: r.item is not None and self.on_select(r.item))
+        lbl_status.bind("<Button-1>", lambda event, r=row: r.item is not None and self.on_select(r.item))
+        btn_action.configure(command=lambda r=row: r.item is not None and self.on_action(r.item))
+        chk_select.configure(command=lambda r=row: self._toggle(r))
+        for widget in (chk_select, lbl_name, lbl_status, btn_action):
+            self._bind_wheel(widget)
+        return row
+
+    def _refresh(self):
+        with METRICS.timer("ui.list_refresh"):
+            self._refresh_rows()
+
+    def _refresh_rows(self):
+        visible = self._visible
+        for i, row in enumerate(self.rows):
+            index = self.offset + i
+            if i < visible and index < len(self.items):
+                self._bind_row(row, i, self.items[index])
+            elif row.item is not None or row.state is not None:
+                row.item = None
+                row.state = None
+                row.chk_select.grid_remove()
+                row.lbl_name.grid_remove()
+                row.lbl_status.grid_remove()
+                row.btn_action.grid_remove()
+
+        total = len(self.items)
+        if total and visible < total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _bind_row(self, row, i, app):
+        row.item = app
+        name = app.get('DisplayName', 'Unknown')
+        status = app.get('Status', 'Unknown')
+        selected = app.unique_id in self.selected
+        state = (name, status, selected)
+        if row.state == state:
+            return
+        if row.state is None:
+            row.chk_select.grid(row=i, column=0, padx=(10, 0), pady=5)
+            row.lbl_name.grid(row=i, column=1, padx=10, pady=5, sticky="w")
+            row.lbl_status.grid(row=i, column=2, padx=10, pady=5)
+            row.btn_action.grid(row=i, column=3, padx=10, pady=5)
+        row.state = state
+
+        if selected:
+            row.chk_select.select()
+        else:
+            row.chk_select.deselect()
+
+        # Color coding
+        if status == "Valid":
+            status_color = "green"
+        elif status == "Ghost":
+            status_color = "red"
+        elif status == "Unreachable":
+            status_color = "gray" # Offline share/disk: not known to be broken
+        else:
+            status_color = "orange"
+
+        # Truncate long names
+        display_name = (name[:40] + '...') if len(name) > 40 else name
+
+        row.lbl_name.configure(text=display_name)
+        row.lbl_status.configure(text=status, text_color=status_color)
+        row.btn_action.configure(
+            text="Remove" if status == "Ghost" else "Force Del",
+            fg_color="darkred" if status == "Ghost" else "#D97706", # Red for Ghost, Orange for Force
+            hover_color="#B91C1C" if status == "Ghost" else "#B45309",
+        )
+
+    def _toggle(self, row):
+        if row.item is None:
+            return
+        unique_id = row.item.unique_id
+        if row.chk_select.get():
+            self.selected.add(unique_id)
+        else:
+            self.selected.discard(unique_id)
+        row.state = None
+        if self.on_selection_change:
+            self.on_selection_change(self.selected)
+
+    # --- scrolling ---
+
+    def _clamp_offset(self):
+        visible = self._visible
+        self.offset = max(0, min(self.offset, len(self.items) - visible))
+
+    def _scroll_by(self, rows):
+        old = self.offset
+        self.offset += rows
+        self._clamp_offset()
+        if self.offset != old:
+            self._refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        # Tk scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"|"pages")
+        if action == "moveto":
+            self.offset = int(float(value) * len(self.items))
+            self._clamp_offset()
+            self._refresh()
+        elif action == "scroll":
+            step = max(1, self._visible) if unit == "pages" else 1
+            self._scroll_by(int(value) * step)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", lambda event: self._scroll_by(-3), add="+") # X11
+        widget.bind("<Button-5>", lambda event: self._scroll_by(3), add="+")
+
+    def _on_wheel(self, event):
+        self._scroll_by(-3 if event.delta > 0 else 3)